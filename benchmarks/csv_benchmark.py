@@ -0,0 +1,153 @@
+"""Compares the rows per second of
+:class:`pyTagger.operations.from_csv.Context` against a copy of the original
+parser, which read a character at a time and stepped through a state object
+for each one.
+
+The CSV file is generated by :func:`pyTagger.operations.to_csv.writeCsv`,
+with a comment in every row that needs quotes and lyrics on several lines.
+
+Usage::
+
+    python -m benchmarks.csv_benchmark [rows] [repeat]
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import os
+import sys
+import tempfile
+import timeit
+from pyTagger.operations.from_csv import Context
+from pyTagger.operations.to_csv import writeCsv
+
+
+class _State(object):
+    """The states of the original parser, one step per character"""
+    def run(self, context, c):
+        raise NotImplementedError
+
+    def onCharacter(self, context, c):
+        if c == context.separator:
+            return _State.EndOfField
+        elif c == '"':
+            return _State.DoubleQuote
+        elif c == '\n':
+            return _State.NewLine
+        else:
+            return _State.Raw
+
+    isEndOfRecord = False
+
+
+class _RawState(_State):
+    def run(self, context, c):
+        if c != '\r':
+            context.buffer.append(c)
+
+
+class _EndOfFieldState(_State):
+    def run(self, context, c):
+        context.buffer.append('\x1f')
+
+
+class _DoubleQuoteState(_State):
+    def run(self, context, c):
+        if c != '"':
+            context.buffer.append(c)
+
+    def onCharacter(self, context, c):
+        return _State.EscapingDoubleQuote if c == '"' else self
+
+
+class _EscapingDoubleQuoteState(_State):
+    def run(self, context, c):
+        pass
+
+    def onCharacter(self, context, c):
+        if c == context.separator:
+            return _State.EndOfField
+        elif c == '"':
+            context.buffer.append('"')
+            return _State.DoubleQuote
+        elif c == '\n':
+            return _State.NewLine
+        else:
+            return _State.Raw
+
+
+class _NewLineState(_State):
+    def run(self, context, c):
+        pass
+
+    isEndOfRecord = True
+
+
+_State.Initial = _State()
+_State.Raw = _RawState()
+_State.EndOfField = _EndOfFieldState()
+_State.DoubleQuote = _DoubleQuoteState()
+_State.EscapingDoubleQuote = _EscapingDoubleQuoteState()
+_State.NewLine = _NewLineState()
+
+
+class _LegacyContext(object):
+    def __init__(self, separator):
+        self.separator = separator
+        self.buffer = []
+
+
+def legacyParse(inFile, excelFormat=True):
+    context = _LegacyContext('\t' if excelFormat else ',')
+    state = _State.Initial
+
+    with io.open(inFile, 'r', encoding='utf_16_le') as f:
+        c = f.read(1)  # skip BOM
+        c = f.read(1)
+        while c:
+            state = state.onCharacter(context, c)
+            state.run(context, c)
+            if state.isEndOfRecord:
+                yield ''.join(context.buffer).split('\x1f')
+                context.buffer = []
+                state = _State.Initial
+            c = f.read(1)
+
+
+def _snapshot(rows):
+    for i in range(rows):
+        yield '/music/artist{0}/album/track{0}.mp3'.format(i), {
+            'title': 'Title {0}'.format(i),
+            'artist': 'Artist {0}'.format(i % 100),
+            'album': 'Album, Vol. {0}'.format(i % 1000),
+            'track': i % 20 + 1,
+            'comments': [{'lang': 'eng', 'description': '',
+                          'text': 'A "quoted" comment'}],
+            'lyrics': [{'lang': 'eng', 'description': '',
+                        'text': 'One\nTwo\nThree'}]
+        }
+
+
+def main(rows=100000, repeat=3):
+    fd, fileName = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+
+    try:
+        writeCsv(_snapshot(rows), fileName)
+        assert list(Context().parse(fileName)) == list(legacyParse(fileName))
+
+        candidates = [
+            ('legacy, a character at a time',
+             lambda: list(legacyParse(fileName))),
+            ('blocks', lambda: list(Context().parse(fileName)))
+        ]
+
+        print('{0} rows, best of {1}'.format(rows, repeat))
+        for name, fn in candidates:
+            best = min(timeit.repeat(fn, number=1, repeat=repeat))
+            print('{0:<32} {1:10.0f} rows/s'.format(name, rows / best))
+    finally:
+        os.remove(fileName)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,63 @@
+"""Compares the throughput of :func:`pyTagger.operations.hash.hashFile`
+against the original 1 KiB implementation.
+
+Usage::
+
+    python -m benchmarks.hash_benchmark [megabytes] [repeat]
+"""
+from __future__ import print_function
+import binascii
+import hashlib
+import os
+import sys
+import tempfile
+import timeit
+from pyTagger.operations.hash import hashFile, newDigest
+
+
+def legacyHashFile(fileName, offset=0):
+    chunk_size = 1024
+    shaAccum = hashlib.sha1()
+    with open(fileName, "rb") as f:
+        f.seek(offset)
+        byte = f.read(chunk_size)
+        while byte:
+            shaAccum.update(byte)
+            byte = f.read(chunk_size)
+    return binascii.b2a_base64(shaAccum.digest()).strip()
+
+
+def _algorithms():
+    for algorithm in ['sha1', 'blake2b', 'xxhash']:
+        try:
+            newDigest(algorithm)
+            yield algorithm
+        except ValueError:
+            pass
+
+
+def main(megabytes=8, repeat=5):
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(os.urandom(megabytes * 1024 * 1024))
+
+    try:
+        assert hashFile(f.name, 10) == legacyHashFile(f.name, 10)
+
+        candidates = [('legacy sha1, 1 KiB reads',
+                       lambda: legacyHashFile(f.name, 10))]
+        for algorithm in _algorithms():
+            candidates.append((
+                '{0}, readinto'.format(algorithm),
+                lambda a=algorithm: hashFile(f.name, 10, a)
+            ))
+
+        print('{0} MB file, best of {1}'.format(megabytes, repeat))
+        for name, fn in candidates:
+            best = min(timeit.repeat(fn, number=1, repeat=repeat))
+            print('{0:<28} {1:8.1f} MB/s'.format(name, megabytes / best))
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,77 @@
+"""Compares the cost of turning a track into a row with
+:class:`pyTagger.proxies.id3.ProjectionPlan` against evaluating every entry
+of ``ID3Proxy._projection``, as ``scan --all`` used to.
+
+No MP3 files are needed, the tags are built in memory.
+
+Usage::
+
+    python -m benchmarks.projection_benchmark [number] [repeat]
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+import sys
+import timeit
+import eyed3.core
+import eyed3.id3
+from pyTagger.proxies.id3 import ID3Proxy, TagOnlyAudioFile
+
+
+def buildTrack():
+    tag = eyed3.id3.Tag()
+    tag.artist = 'Young MC'
+    tag.album_artist = 'Young MC'
+    tag.album = 'Stone Cold Rhymin\''
+    tag.title = 'Bust A Move'
+    tag.publisher = 'Delicious Vinyl'
+    tag.track_num = (1, 12)
+    tag.disc_num = (1, 1)
+    tag.bpm = 118
+    tag.recording_date = eyed3.core.Date(1989)
+    for fid, text in [('TCOM', 'Matt Dike'), ('TPE3', 'Michael Ross'),
+                      ('TMED', 'DIG'), ('TLAN', 'eng'), ('TKEY', 'Am'),
+                      ('TIT1', 'Hip Hop'), ('TIT3', 'Single')]:
+        tag.setTextFrame(fid, text)
+    tag.comments.set('Amazon.com Song ID: 12345', '', 'eng')
+    tag.lyrics.set('Break it down', '', 'eng')
+    tag.unique_file_ids.set(b'1234567890', b'DJTagger')
+
+    track = TagOnlyAudioFile.__new__(TagOnlyAudioFile)
+    track._tag = tag
+    track._info = None
+    return track
+
+
+def legacyExtract(fieldSet, track):
+    row = {}
+    for k in fieldSet:
+        row[k] = ID3Proxy._projection[k](track)
+    return row
+
+
+def main(number=2000, repeat=5):
+    track = buildTrack()
+    columns = [x for x in ID3Proxy.columns if x != 'genre']
+    proxy = ID3Proxy(columns)
+
+    assert proxy.extractTagsFromTrack(track) == legacyExtract(columns, track)
+
+    def lazy():
+        row = proxy.extractTagsFromTrack(track, lazy=True)
+        return row['artist'], row['album'], row['title']
+
+    candidates = [
+        ('legacy, every column', lambda: legacyExtract(columns, track)),
+        ('plan, every column', lambda: proxy.extractTagsFromTrack(track)),
+        ('lazy, three columns', lazy),
+    ]
+
+    print('{0} columns, {1} tracks, best of {2}'.format(
+        len(columns), number, repeat))
+    for name, fn in candidates:
+        best = min(timeit.repeat(fn, number=number, repeat=repeat))
+        print('{0:<24} {1:8.1f} us/track'.format(name, best * 1e6 / number))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -3,10 +3,13 @@ import logging
 import os
 import sys
 import traceback
+import pyTagger.actions.clones as clones
 import pyTagger.actions.convert_csv as convert_csv
+import pyTagger.actions.convert_snapshot as convert_snapshot
 import pyTagger.actions.diff as diff
 import pyTagger.actions.export as export
 import pyTagger.actions.images as images
+import pyTagger.actions.index_snapshot as index_snapshot
 import pyTagger.actions.isonom as isonom
 import pyTagger.actions.prepare as prepare
 import pyTagger.actions.rename as rename
@@ -26,9 +29,12 @@ except ImportError:
 
 
 modules = {
+    'clones': clones.process,
     'convert-csv': convert_csv.process,
+    'convert-snapshot': convert_snapshot.process,
     'diff': diff.process,
     'images': images.process,
+    'index-snapshot': index_snapshot.process,
     'isonom': isonom.process,
     'prepare': prepare.process,
     'rename': rename.process,
@@ -0,0 +1,72 @@
+from __future__ import unicode_literals
+import os
+from configargparse import getArgumentParser
+from pyTagger.operations.find_duplicates import groupClones
+from pyTagger.operations.find_duplicates import groupIdenticalFiles
+from pyTagger.operations.hash import tagSize
+from pyTagger.operations.on_directory import walk, walkAll
+from pyTagger.proxies.id3 import ID3Proxy
+from pyTagger.utils import iterSnapshot, saveJsonIncrementalArray
+from pyTagger.utils import defaultConfigFiles
+
+# -----------------------------------------------------------------------------
+# Configuration
+
+p = getArgumentParser('clones',
+                      default_config_files=defaultConfigFiles,
+                      ignore_unknown_config_file_keys=True,
+                      parents=[getArgumentParser('id3')],
+                      description='find tracks that have the same audio')
+group = p.add_argument_group('Files')
+group.add('infile',
+          help='a snapshot with fileHash, or a directory of MP3s to hash')
+group.add('outfile', nargs='?', default='clones.json',
+          help='the name of the file that will hold the groups of clones')
+group = p.add_argument_group('Directories')
+group.add('--all-files', action='store_true',
+          help='compare every file in full, e.g. extracted images, instead '
+               'of the audio in MP3s')
+
+# -----------------------------------------------------------------------------
+
+
+def _groupDirectory(args):
+    if args.all_files:
+        for group in groupIdenticalFiles(walkAll(args.infile)):
+            yield group
+        return
+
+    # Hash the audio the same way as fileHash, so the cache is shared
+    hashCache = ID3Proxy(['fileHash']).hashCache
+    try:
+        groups = groupIdenticalFiles(walk(args.infile), tagSize,
+                                     hashCache.hashFile)
+        for group in groups:
+            yield group
+    finally:
+        hashCache.save()
+
+
+def process(args):
+    if os.path.isdir(args.infile):
+        groups = _groupDirectory(args)
+    else:
+        groups = groupClones(iterSnapshot(args.infile))
+
+    duplicates, reclaimable = 0, 0
+
+    output = saveJsonIncrementalArray(args.outfile)
+    found = next(output)
+    for group in groups:
+        found = output.send({
+            'fileHash': group.fileHash,
+            'paths': group.paths,
+            'sizes': group.sizes,
+            'reclaimable': group.reclaimable
+        })
+        duplicates += len(group.paths) - 1
+        reclaimable += group.reclaimable
+    output.close()
+
+    return ('Found {0} groups of clones\nDuplicates {1}\n'
+            'Reclaimable {2} bytes'.format(found, duplicates, reclaimable))
@@ -0,0 +1,47 @@
+from __future__ import unicode_literals
+import os
+from configargparse import getArgumentParser
+from pyTagger.utils import BINARY_SNAPSHOT_EXTENSION, defaultConfigFiles
+from pyTagger.utils import isBinarySnapshot, iterSnapshot
+from pyTagger.utils import saveJsonIncrementalDict
+
+# -----------------------------------------------------------------------------
+# Configuration
+
+p = getArgumentParser('convert-snapshot',
+                      default_config_files=defaultConfigFiles,
+                      ignore_unknown_config_file_keys=True,
+                      parents=[getArgumentParser()],
+                      description='convert a snapshot between JSON and binary')
+group = p.add_argument_group('Files')
+group.add('infile', help='the snapshot to convert')
+group.add('outfile', nargs='?', help='the snapshot that will hold the results')
+group.add('--compact', action='store_true', dest='compact',
+          help='output the JSON in a compact format')
+
+# -----------------------------------------------------------------------------
+
+
+def _getOutputName(args):
+    if args.outfile:
+        return args.outfile
+
+    root, _ = os.path.splitext(args.infile)
+    if isBinarySnapshot(args.infile):
+        return root + '.json'
+    return root + BINARY_SNAPSHOT_EXTENSION
+
+
+def process(args):
+    outfile = _getOutputName(args)
+    if os.path.abspath(outfile) == os.path.abspath(args.infile):
+        raise ValueError('The input and output snapshots are the same file')
+
+    output = saveJsonIncrementalDict(outfile, args.compact)
+    converted = next(output)
+
+    for fullPath, tags in iterSnapshot(args.infile):
+        converted = output.send((fullPath.replace('\\', '\\\\'), tags))
+    output.close()
+
+    return 'Converted {0} files to {1}'.format(converted, outfile)
@@ -2,7 +2,9 @@ from __future__ import unicode_literals
 from configargparse import getArgumentParser
 from pyTagger.models import Snapshot
 from pyTagger.operations.two_tags import difference
-from pyTagger.utils import defaultConfigFiles, loadJson
+from pyTagger.utils import defaultConfigFiles, loadJson, iterSnapshot
+from pyTagger.utils import iterSortedPairs
+from pyTagger.utils import isSqliteSnapshot, openSnapshotStore
 from pyTagger.utils import saveJsonIncrementalDict
 
 # -----------------------------------------------------------------------------
@@ -17,6 +19,10 @@ group = p.add_argument_group('Files')
 group.add('left', help='the first snapshot to compare')
 group.add('right', help='the second snapshot to compare')
 group.add('outfile', help='the snapshot that will hold the results')
+group.add('--left-only', metavar='FILE',
+          help='a snapshot of the tracks that are only in the left snapshot')
+group.add('--right-only', metavar='FILE',
+          help='a snapshot of the tracks that are only in the right snapshot')
 group = p.add_argument_group('Options')
 group.add('--compact', action='store_true', dest='compact',
           help='output the JSON in a compact format')
@@ -26,10 +32,12 @@ group.add('--match-on', choices=['id', 'path'], default='path',
           help='select which field should be used for comparison')
 group.add('--write-empty', action='store_true',
           help='output empty differences')
+group.add('--merge', action='store_true',
+          help='stream both snapshots in order instead of loading them')
+group.add('--buffer-size', type=int, default=100000,
+          help='the number of tracks sorted in memory by --merge')
 
 
-# type: same, left-only, right-only, diff-left, diff-right
-
 # -----------------------------------------------------------------------------
 
 def _filter(tags):
@@ -58,7 +66,7 @@ def _keyOnId(tags):
     return t
 
 
-def process(args):
+def _loadedPairs(args):
     a = loadJson(args.left)
     b = loadJson(args.right)
 
@@ -67,16 +75,120 @@ def process(args):
         a = _keyOnId(a)
         b = _keyOnId(b)
 
-    ka = set(a.keys())
-    kb = set(b.keys())
-    kboth = ka & kb
+    for k in sorted(set(a.keys()) | set(b.keys())):
+        yield k, a.get(k), b.get(k)
+
+
+def _keyedPairs(pairs, matchOn):
+    if matchOn != 'id':
+        return pairs
+    return (
+        (v['id'], dict(v, path=k)) for k, v in pairs
+        if v.get('id') is not None
+    )
+
+
+def _sortedPairs(fileName, args):
+    pairs = _keyedPairs(iterSnapshot(fileName), args.match_on)
+    previous = None
+
+    # A repeated key replaces the earlier one, like loading a dict
+    for pair in iterSortedPairs(pairs, args.buffer_size):
+        if previous is not None and previous[0] != pair[0]:
+            yield previous
+        previous = pair
+
+    if previous is not None:
+        yield previous
+
+
+def _mergedPairs(args):
+    """Joins the two snapshots in key order, sorting them on disk first, so
+    only a buffer of each is in memory
+    """
+    left = _sortedPairs(args.left, args)
+    right = _sortedPairs(args.right, args)
+    a, b = next(left, None), next(right, None)
+
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a[0], a[1], None
+            a = next(left, None)
+        elif a is None or b[0] < a[0]:
+            yield b[0], None, b[1]
+            b = next(right, None)
+        else:
+            yield a[0], a[1], b[1]
+            a, b = next(left, None), next(right, None)
+
+
+def _indexedPairs(args):
+    """Streams the left snapshot and looks up each track in the right one,
+    which is a SQLite store
+    """
+    left = iterSnapshot(args.left)
+    byId = args.match_on == 'id'
+    seen = set()
+
+    with openSnapshotStore(args.right) as right:
+        for k, a in left:
+            key = a.get('id') if byId else k
+            if key is None or key in seen:
+                continue
+            # paths are unique, so only remember them to find right-only
+            if byId or args.right_only:
+                seen.add(key)
+
+            if byId:
+                b = next((dict(t, path=path)
+                          for path, t in right.findBy('id', key)), None)
+                yield key, dict(a, path=k), b
+
+            else:
+                yield k, a, right[k] if k in right else None
+
+        if not args.right_only:
+            return
+
+        for path, b in right.iterPairs():
+            key = b.get('id') if byId else path
+            if key is not None and key not in seen:
+                seen.add(key)
+                yield key, None, dict(b, path=path) if byId else b
+
+
+def _openOutput(fileName, compact):
+    if not fileName:
+        return None
+
+    output = saveJsonIncrementalDict(fileName, compact)
+    next(output)
+    return output
+
+
+def process(args):
+    if args.merge:
+        pairs = _mergedPairs(args)
+    elif isSqliteSnapshot(args.right):
+        pairs = _indexedPairs(args)
+    else:
+        pairs = _loadedPairs(args)
 
     output = saveJsonIncrementalDict(args.outfile, args.compact)
+    leftOnly = _openOutput(args.left_only, args.compact)
+    rightOnly = _openOutput(args.right_only, args.compact)
 
     extracted = next(output)
 
-    for k in sorted(kboth):
-        tags = difference(_filter(a[k]), _filter(b[k]))
+    for k, a, b in pairs:
+        if a is None or b is None:
+            unmatched = rightOnly if a is None else leftOnly
+            if unmatched:
+                tags = a if b is None else b
+                unmatched.send((k.replace('\\', '\\\\'), tags))
+            continue
+
+        tags = difference(_filter(a), _filter(b))
         if not args.include_nulls:
             tags = _removeNulls(tags)
 
@@ -85,5 +197,8 @@ def process(args):
             extracted = output.send(pair)
 
     output.close()
+    for unmatched in (leftOnly, rightOnly):
+        if unmatched:
+            unmatched.close()
 
     return '{} tags processed'.format(extracted)
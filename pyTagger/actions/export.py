@@ -1,8 +1,9 @@
 from __future__ import unicode_literals
 import os
 from configargparse import getArgumentParser
+from pyTagger.models import ColumnarSnapshot
 from pyTagger.operations.to_csv import writeCsv
-from pyTagger.utils import loadJson, defaultConfigFiles
+from pyTagger.utils import iterSnapshot, defaultConfigFiles
 
 # -----------------------------------------------------------------------------
 # Configuration
@@ -17,6 +18,10 @@ group.add('infile', help='the snapshot to process')
 group.add('outfile', nargs='?', help='the CSV file that will hold the results')
 group.add('--csv-format', action='store_true', default=False,
           help='use commas not tabs')
+group.add('--columnar', action='store_true', default=False,
+          help='hold the snapshot in memory a column at a time, so the '
+          'columns are found without spooling the rows to a temporary file. '
+          'The rows are written in path order')
 
 # -----------------------------------------------------------------------------
 
@@ -34,6 +39,8 @@ def _getOutputName(args):
 
 def process(args):
     outfile = _getOutputName(args)
-    snapshot = loadJson(args.infile)
+    snapshot = iterSnapshot(args.infile)
+    if args.columnar:
+        snapshot = ColumnarSnapshot(snapshot)
     writeCsv(snapshot, outfile, not args.csv_format)
     return "Exported to " + outfile
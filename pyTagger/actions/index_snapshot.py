@@ -0,0 +1,23 @@
+from __future__ import unicode_literals
+from configargparse import getArgumentParser
+from pyTagger.operations.snapshot_index import buildIndex, indexFileName
+from pyTagger.utils import defaultConfigFiles
+
+# -----------------------------------------------------------------------------
+# Configuration
+
+p = getArgumentParser('index-snapshot',
+                      default_config_files=defaultConfigFiles,
+                      ignore_unknown_config_file_keys=True,
+                      parents=[getArgumentParser()],
+                      description='index a snapshot to speed up where')
+group = p.add_argument_group('Files')
+group.add('infile', help='the JSON or binary snapshot to index')
+
+# -----------------------------------------------------------------------------
+
+
+def process(args):
+    indexed = buildIndex(args.infile)
+    return 'Indexed {0} files in {1}'.format(indexed,
+                                             indexFileName(args.infile))
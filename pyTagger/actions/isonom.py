@@ -6,7 +6,8 @@ from pyTagger.actions.upload import uploadToElasticsearch
 from pyTagger.operations.find_duplicates import findIsonoms
 from pyTagger.operations.interview import Interview
 from pyTagger.proxies.es import Client
-from pyTagger.utils import loadJson, saveJsonIncrementalArray
+from pyTagger.proxies.isonom_index import IsonomIndex
+from pyTagger.utils import iterSnapshot, loadJson, saveJsonIncrementalArray
 from pyTagger.utils import defaultConfigFiles
 
 # -----------------------------------------------------------------------------
@@ -26,6 +27,12 @@ group.add('--interview', default='interview.json',
           help='communcation with the user about the match results')
 group.add('--min-score', default=4,
           help='lower values lead to more matches, but less accurate')
+group = p.add_argument_group('Isonom Engine')
+group.add('--engine', choices=['elasticsearch', 'local'],
+          default='elasticsearch',
+          help='where the library is searched')
+group.add('--isonom-index', default='library.isonom',
+          help='the file where the local engine keeps its index')
 
 # -----------------------------------------------------------------------------
 
@@ -33,8 +40,17 @@ _success = "Success"
 _notFinished = "Interview Not Complete"
 
 
-def _buildIndex(args):
-    uploadToElasticsearch(args)
+def _client(args):
+    if args.engine == 'local':
+        return IsonomIndex(args.isonom_index)
+    return Client()
+
+
+def _buildIndex(args, client=None):
+    if isinstance(client, IsonomIndex):
+        client.load(iterSnapshot(args.library_snapshot))
+    else:
+        uploadToElasticsearch(args)
 
 
 def _findIsonoms(args, client):
@@ -43,7 +59,8 @@ def _findIsonoms(args, client):
     output = saveJsonIncrementalArray(args.interview)
     rows = next(output)
 
-    for row in findIsonoms(client, snapshot, args.min_score):
+    for row in findIsonoms(client, snapshot, args.min_score,
+                           client.batchSize, client.threads):
         rows = output.send(row._asdict())
 
     output.close()
@@ -53,11 +70,11 @@ def _findIsonoms(args, client):
 
 def process(args):
     if not os.path.exists(args.interview):
-        cli = Client()
+        cli = _client(args)
 
         if not cli.exists():
             print('Building Index')
-            _buildIndex(args)
+            _buildIndex(args, cli)
         else:
             print('Using Existing Index')
 
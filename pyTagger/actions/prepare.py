@@ -5,7 +5,7 @@ from configargparse import getArgumentParser
 from pyTagger.operations.from_csv import convert
 from pyTagger.operations.on_directory import buildSnapshot, prepareForLibrary
 from pyTagger.operations.on_directory import renameFiles
-from pyTagger.operations.on_mp3 import updateFromSnapshot
+from pyTagger.operations.on_mp3 import formatTally, updateFromSnapshot
 from pyTagger.operations.to_csv import writeCsv
 from pyTagger.proxies.id3 import ID3Proxy
 from pyTagger.utils import loadJson, defaultConfigFiles
@@ -34,6 +34,9 @@ group.add('--csv-format', action='store_true', default=False,
 group = p.add_argument_group('Step 2')
 group.add('--update-snapshot', default='update.json',
           help='a snapshot of what the mp3s should look like')
+group = p.add_argument_group('Performance')
+group.add('--workers', type=int, default=1,
+          help='the number of processes used to read and write the MP3s')
 
 # -----------------------------------------------------------------------------
 
@@ -42,13 +45,13 @@ SUCCESS = "Success"
 
 def _step1(args):
     print('Changing tags to conform with library')
-    prepared = prepareForLibrary(args.download_dir)
-    print(prepared, 'files processed')
+    c = prepareForLibrary(args.download_dir, args.workers)
+    print(formatTally(c))
 
     print('Creating a snapshot of files')
     id3Proxy = ID3Proxy()
     s, f = buildSnapshot(args.download_dir, args.prepare_snapshot,
-                         id3Proxy, args.compact)
+                         id3Proxy, args.compact, workers=args.workers)
     print('Extracted tags from {0} files\nFailed {1}'.format(s, f))
 
     print('Converting to CSV')
@@ -71,8 +74,8 @@ def _step2(args):
     print('Updating files from snapshot')
     snapshot = loadJson(args.update_snapshot)
     id3Proxy = ID3Proxy()
-    updated, failed = updateFromSnapshot(id3Proxy, snapshot, upgrade=True)
-    print('Updated {0}\nFailed {1}'.format(updated, failed))
+    c = updateFromSnapshot(id3Proxy, snapshot, True, args.workers)
+    print(formatTally(c))
 
     print('Renaming Files')
     c = renameFiles(args.download_dir, args.download_dir, id3Proxy)
@@ -11,7 +11,7 @@ from pyTagger.operations.from_csv import convert
 from pyTagger.operations.on_directory import extractImages, deleteFiles
 from pyTagger.operations.on_directory import renameFiles, replaceFiles
 from pyTagger.operations.on_directory import deleteEmptyDirectories
-from pyTagger.operations.on_mp3 import updateFromSnapshot
+from pyTagger.operations.on_mp3 import formatTally, updateFromSnapshot
 from pyTagger.operations.to_csv import writeCsv
 from pyTagger.operations.two_tags import union
 from pyTagger.proxies.id3 import ID3Proxy
@@ -55,6 +55,8 @@ group.add('--to-move', default='to-move.txt',
           help='the file that lists the MP3s to be moved')
 group.add('--to-update', default='to-update.txt',
           help='the file that lists the MP3s to be overwritten')
+group.add('--workers', type=int, default=1,
+          help='the number of processes used to write the MP3s')
 group = p.add_argument_group('Step 3')
 group.add('--library-dir', default=os.path.join(os.getcwd(), 'Music'),
           help='the directory where the managed MP3s are located')
@@ -167,10 +169,10 @@ def _step2(args):
     _writeText(l, args.to_extract)
 
     id3Proxy = ID3Proxy()
-    updated, failed = updateFromSnapshot(id3Proxy, snapshot, upgrade=True)
+    c = updateFromSnapshot(id3Proxy, snapshot, True, args.workers)
     counter = extractImages(args.to_extract, args.images_dir, id3Proxy)
 
-    print('Updated {0}\nFailed {1}'.format(updated, failed))
+    print(formatTally(c))
     print('Images', counter)
 
     return SUCCESS
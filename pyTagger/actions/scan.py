@@ -2,6 +2,7 @@ import datetime
 import eyed3
 import os
 import platform
+from collections import Counter
 from configargparse import getArgumentParser
 from pyTagger.models import Snapshot
 from pyTagger.operations.on_directory import buildSnapshot
@@ -35,6 +36,13 @@ group.add('--modified-min', default=MIN_DATE,
           help='only include files that have been modified since')
 group.add('--modified-max', default=MAX_DATE,
           help='only include files that have been modified before')
+group = p.add_argument_group('Performance')
+group.add('--workers', type=int, default=1,
+          help='the number of processes used to read the MP3s')
+group.add('--incremental', action='store_true',
+          help='reuse the tags in the existing output for unchanged files')
+group.add('--walk-threads', type=int, default=1,
+          help='the number of directories listed at the same time')
 
 
 # -----------------------------------------------------------------------------
@@ -53,16 +61,19 @@ def postelDate(s):
     return d1
 
 
-def creationDate(path):  # pragma: no cover
+def creationDate(path, stat=None):  # pragma: no cover
     """
     Try to get the date that a file was created, falling back to when it was
-    last modified if that isn't possible.
+    last modified if that isn't possible.  ``stat`` saves looking the file up
+    again when its ``os.stat`` result is already known.
     See http://stackoverflow.com/questions/237079/
     """
+    if stat is None:
+        stat = os.stat(path)
+
     if platform.system() == 'Windows':
-        return os.path.getctime(path)
+        return stat.st_ctime
     else:
-        stat = os.stat(path)
         try:
             return stat.st_birthtime
         except AttributeError:
@@ -77,13 +88,16 @@ def buildFilter(args):
     minCreateTime = postelDate(args.created_min)
     maxCreateTime = postelDate(args.created_max)
 
-    def innerFilter(path):
+    def innerFilter(path, entry=None):
         if path[-3:].lower() not in ['mp3']:
             return False
 
-        stats = os.stat(path)
+        # The walk caches the stat of each directory entry
+        stats = entry.stat() if entry is not None else os.stat(path)
         modTime = datetime.datetime.fromtimestamp(stats.st_mtime)
-        createTime = datetime.datetime.fromtimestamp(creationDate(path))
+        createTime = datetime.datetime.fromtimestamp(
+            creationDate(path, stats)
+        )
 
         createOk = minCreateTime <= createTime <= maxCreateTime
         modOk = minModTime <= modTime <= maxModTime
@@ -91,6 +105,8 @@ def buildFilter(args):
             return True
 
         return False
+
+    innerFilter.usesEntry = True
     return innerFilter
 
 
@@ -102,9 +118,22 @@ def process(args):
     ):
         filterFn = buildFilter(args)
 
+    previous = args.outfile if args.incremental else None
+    report = Counter()
+
     columns = Snapshot.columnsFromArgs(args)
     id3Proxy = ID3Proxy(columns)
     s, f = buildSnapshot(
-        args.path, args.outfile, id3Proxy, args.compact, filterFn
+        args.path, args.outfile, id3Proxy, args.compact, filterFn,
+        args.workers, previous, report, args.walk_threads
     )
-    return 'Extracted tags from {0} files\nFailed {1}'.format(s, f)
+    result = 'Extracted tags from {0} files\nFailed {1}'.format(s, f)
+
+    if previous:
+        template = '\nReused {0}\nRefreshed {1}\nAdded {2}\nRemoved {3}'
+        result += template.format(
+            report['reused'], report['refreshed'], report['added'],
+            report['removed']
+        )
+
+    return result
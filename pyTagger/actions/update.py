@@ -1,8 +1,10 @@
 from configargparse import getArgumentParser
 from pyTagger.models import Snapshot
-from pyTagger.operations.on_mp3 import updateFromSnapshot
+from pyTagger.operations.on_mp3 import formatTally, planFromSnapshot
+from pyTagger.operations.on_mp3 import tallyUpdates, updateFromSnapshot
 from pyTagger.proxies.id3 import ID3Proxy
-from pyTagger.utils import loadJson, defaultConfigFiles
+from pyTagger.utils import iterSnapshot, defaultConfigFiles
+from pyTagger.utils import saveJsonIncrementalDict
 
 # -----------------------------------------------------------------------------
 # Configuration
@@ -17,12 +19,43 @@ group.add('infile', help='the snapshot to process')
 group = p.add_argument_group('Options')
 group.add('--upgrade', action='store_true', dest='upgrade',
           help='Upgrade the tags to be at least 2.3')
+group.add('--workers', type=int, default=1,
+          help='the number of processes used to write the MP3s')
+group.add('--plan',
+          help='write the changes to this file instead of to the MP3s')
 
 # -----------------------------------------------------------------------------
 
 
+def _writePlan(plans, outFileName):
+    output = saveJsonIncrementalDict(outFileName)
+    next(output)
+
+    statuses = []
+    size = 0
+    for fullPath, plan in plans:
+        statuses.append(plan['status'])
+        size += plan.get('bytes', 0)
+        if plan['status'] != 'unchanged':
+            output.send((fullPath.replace('\\', '\\\\'), plan))
+
+    output.close()
+
+    return tallyUpdates(statuses), size
+
+
 def process(args):
     columns = Snapshot.columnsFromArgs(args)
     id3Proxy = ID3Proxy(columns)
-    snapshot = loadJson(args.infile)
-    return updateFromSnapshot(id3Proxy, snapshot, args.upgrade)
+    snapshot = iterSnapshot(args.infile)
+
+    if args.plan:
+        plans = planFromSnapshot(id3Proxy, snapshot, args.upgrade,
+                                 args.workers)
+        c, size = _writePlan(plans, args.plan)
+        return ('Would write {written}\nRewrite in full {rewritten}\n'
+                'Unchanged {unchanged}\nFailed {failed}\n'
+                'Bytes {0}').format(size, **c)
+
+    c = updateFromSnapshot(id3Proxy, snapshot, args.upgrade, args.workers)
+    return formatTally(c)
@@ -1,6 +1,6 @@
 from configargparse import getArgumentParser
 from pyTagger.proxies.es import Client
-from pyTagger.utils import loadJson
+from pyTagger.utils import iterSnapshot
 from pyTagger.utils import defaultConfigFiles
 
 # -----------------------------------------------------------------------------
@@ -23,7 +23,7 @@ group.add('--reload', action='store_true',
 
 
 def uploadToElasticsearch(args):
-    snapshot = loadJson(args.library_snapshot)
+    snapshot = iterSnapshot(args.library_snapshot)
 
     cli = Client()
     exists = cli.exists()
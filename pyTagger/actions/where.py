@@ -1,8 +1,11 @@
 from __future__ import unicode_literals
+import operator
 from configargparse import getArgumentParser
-from pyTagger.models import COMPARISON, FilterCondition, Snapshot
-from pyTagger.operations.name import _safeGet as safeGet
-from pyTagger.utils import defaultConfigFiles, loadJson
+from pyTagger.models import COMPARISON, GROUP, ConditionGroup
+from pyTagger.models import FilterCondition, Snapshot
+from pyTagger.operations.snapshot_index import loadIndex
+from pyTagger.utils import defaultConfigFiles, iterSnapshot
+from pyTagger.utils import isSqliteSnapshot, openSnapshotStore
 from pyTagger.utils import saveJsonIncrementalDict
 
 
@@ -16,6 +19,18 @@ comparisonParse = {
     '%': COMPARISON.LIKE
 }
 
+_rangeOperators = {
+    COMPARISON.GT: operator.gt,
+    COMPARISON.GTE: operator.ge,
+    COMPARISON.LT: operator.lt,
+    COMPARISON.LTE: operator.le
+}
+
+try:
+    _text = unicode
+except NameError:  # pragma: no cover
+    _text = str
+
 
 # -----------------------------------------------------------------------------
 # Configuration
@@ -28,6 +43,11 @@ p = getArgumentParser('where',
 group = p.add_argument_group('Files')
 group.add('infile', help='the input snapshot')
 group.add('outfile', help='the output snapshot')
+group = p.add_argument_group('Matching')
+group.add('--any', action='store_true',
+          help='match files that meet any condition, instead of all of them')
+group.add('--invert', action='store_true',
+          help='match the files that the conditions would skip')
 group = p.add_argument_group('Fields')
 for field in sorted(Snapshot.orderedAllColumns()):
     group.add('--' + field, help='matches on ' + field, nargs='*',
@@ -39,7 +59,7 @@ for field in sorted(Snapshot.orderedAllColumns()):
 def _buildCondition(x, args):
     values = getattr(args, x)
     if not values:
-        raise StopIteration
+        return
 
     if isinstance(values, str):
         values = [values]
@@ -73,48 +93,108 @@ def _parseComparison(field, s):
     return comparison, value
 
 
-def _testCondition(condition, tags):
-    tagValue = safeGet(tags, condition.field)
-    if condition.comparison == COMPARISON.NOT:
-        return tagValue != condition.value
-    elif condition.comparison == COMPARISON.GT:
-        return tagValue > condition.value
-    elif condition.comparison == COMPARISON.GTE:
-        return tagValue >= condition.value
-    elif condition.comparison == COMPARISON.LT:
-        return tagValue < condition.value
-    elif condition.comparison == COMPARISON.LTE:
-        return tagValue <= condition.value
-    elif condition.comparison == COMPARISON.LIKE:
-        return condition.value.lower() in tagValue.lower() if tagValue \
-            else False
+def _compileCondition(condition):
+    if isinstance(condition, ConditionGroup):
+        return compileConditions(condition.conditions, condition.match)
+
+    field, comparison, value = condition
+    if (field in Snapshot.integerTags and
+            isinstance(value, _text) and value.lstrip('-').isdigit()):
+        value = int(value)
+
+    if comparison == COMPARISON.LIKE and value is not None:
+        needle = _text(value).lower()
+
+        def test(tags):
+            tagValue = tags.get(field)
+            if not tagValue:
+                return False
+            try:
+                return needle in tagValue.lower()
+            except AttributeError:
+                return needle in _text(tagValue).lower()
+
+    elif comparison in _rangeOperators:
+        compare = _rangeOperators[comparison]
+        if value is None:
+            return lambda tags: False
+
+        def test(tags):
+            tagValue = tags.get(field)
+            if tagValue is None:
+                return False
+            try:
+                return compare(tagValue, value)
+            except TypeError:
+                # e.g. a number compared with text in Python 3
+                return False
+
+    elif comparison == COMPARISON.NOT:
+        def test(tags):
+            return tags.get(field) != value
+
     else:
-        return tagValue == condition.value
+        def test(tags):
+            return tags.get(field) == value
 
+    return test
 
-def process(args):
-    conditions = [
-        c
-        for x in Snapshot.orderedAllColumns()
-        for c in _buildCondition(x, args)
-    ]
 
-    if not conditions:
-        return 'No conditions specified.  Exiting'
+def compileConditions(conditions, match=GROUP.ALL):
+    """Builds a single function that tests a track against ``conditions``
+
+    The work that does not depend on the track, like lowering the case of a
+    ``LIKE`` value, is done once here instead of for every track, and the
+    tests stop as soon as the result is known.
+
+    Args:
+        conditions (list): :class:`pyTagger.models.FilterCondition` or
+        :class:`pyTagger.models.ConditionGroup` instances
+
+        match (:data:`pyTagger.models.GROUP`): How to combine the conditions
 
-    snapshot = loadJson(args.infile)
-    output = saveJsonIncrementalDict(args.outfile)
+    Returns:
+        A function that takes the tags of a track and returns ``True`` when
+        it matches
+    """
+    tests = [_compileCondition(c) for c in conditions]
+
+    if match == GROUP.ALL:
+        if len(tests) == 1:
+            return tests[0]
+
+        def matches(tags):
+            for test in tests:
+                if not test(tags):
+                    return False
+            return True
+
+    elif match == GROUP.ANY:
+        def matches(tags):
+            for test in tests:
+                if test(tags):
+                    return True
+            return False
+
+    else:
+        def matches(tags):
+            for test in tests:
+                if test(tags):
+                    return False
+            return True
+
+    return matches
+
+
+def _writeMatches(snapshot, matches, outFileName):
+    output = saveJsonIncrementalDict(outFileName)
     next(output)
 
     included = 0
     excluded = 0
 
-    for fullPath, tags in snapshot.items():
-        matches = True
-        for c in conditions:
-            matches &= _testCondition(c, tags)
-
-        if matches:
+    for fullPath, tags in snapshot:
+        if matches(tags):
             pair = (fullPath.replace('\\', '\\\\'), tags)
             output.send(pair)
             included += 1
@@ -123,4 +203,53 @@ def process(args):
 
     output.close()
 
+    return included, excluded
+
+
+def _matchFromArgs(args):
+    anyCondition = getattr(args, 'any', False)
+    if getattr(args, 'invert', False):
+        # not (a or b) is none of them, not (a and b) is any of them failing
+        return GROUP.NONE if anyCondition else None
+    return GROUP.ANY if anyCondition else GROUP.ALL
+
+
+def process(args):
+    conditions = [
+        c
+        for x in Snapshot.orderedAllColumns()
+        for c in _buildCondition(x, args)
+    ]
+
+    if not conditions:
+        return 'No conditions specified.  Exiting'
+
+    match = _matchFromArgs(args)
+    if match is None:
+        group = ConditionGroup(GROUP.ALL, conditions)
+        matches = compileConditions([group], GROUP.NONE)
+    else:
+        matches = compileConditions(conditions, match)
+
+    if isSqliteSnapshot(args.infile):
+        # The store uses its indexes to skip most of the rows, but can only
+        # narrow the search when every condition must be met
+        pushed = conditions if match == GROUP.ALL else []
+        with openSnapshotStore(args.infile) as store:
+            snapshot = store.select(pushed)
+            included, _ = _writeMatches(snapshot, matches, args.outfile)
+            excluded = len(store) - included
+    else:
+        index = loadIndex(args.infile) if match == GROUP.ALL else None
+        rows = index.candidates(conditions) if index else None
+        if rows is None:
+            snapshot = iterSnapshot(args.infile)
+            included, excluded = _writeMatches(snapshot, matches,
+                                               args.outfile)
+        else:
+            # Only read the files that the index could not rule out
+            snapshot = index.fetch(rows)
+            included, _ = _writeMatches(snapshot, matches, args.outfile)
+            excluded = len(index) - included
+
     return 'Matched {} files\nSkipped {} files'.format(included, excluded)
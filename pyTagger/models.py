@@ -1,7 +1,13 @@
+from array import array
 from configargparse import getArgumentParser
 from collections import namedtuple
 from pyTagger.utils import defaultConfigFiles
 
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
 
 def makeEnum(name, *sequential, **named):
     """Implement an enum type in python
@@ -34,6 +40,25 @@ class FilterCondition(namedtuple('FilterCondition_', [
     pass
 
 
+GROUP = makeEnum('Group', 'ALL', 'ANY', 'NONE')
+"""Enumerated ways to combine the members of a :class:`ConditionGroup`"""
+
+
+class ConditionGroup(namedtuple('ConditionGroup_', ['match', 'conditions'])):
+    """A named tuple class that combines WHERE conditions
+
+    Members:
+            match (:data:`GROUP`): ``ALL`` when every condition must be met,
+            ``ANY`` when at least one must be met and ``NONE`` when none of
+            them can be met
+
+            conditions (list): :class:`FilterCondition` or nested
+            :class:`ConditionGroup` instances
+
+    """
+    pass
+
+
 class TrackMatch(namedtuple('TrackMatch_', [
     'status', 'newPath', 'oldPath', 'score', 'newTags', 'oldTags'
 ])):
@@ -68,6 +93,31 @@ class TrackMatch(namedtuple('TrackMatch_', [
     pass
 
 
+class CloneGroup(namedtuple('CloneGroup_', ['fileHash', 'paths', 'sizes'])):
+    """Instances of this class are generated by
+    :func:`pyTagger.operations.find_duplicates.groupClones` and list the
+    tracks that have the same audio
+
+    Members:
+        fileHash (str): The hash of the audio
+
+        paths (list[str]): The file locations of the tracks, sorted
+
+        sizes (list[int]): The size in bytes of each file, or ``None`` when
+        the file cannot be found
+    """
+    @property
+    def size(self):
+        """The number of bytes used by all the files that can be found"""
+        return sum(x for x in self.sizes if x is not None)
+
+    @property
+    def reclaimable(self):
+        """The number of bytes freed by keeping only the largest file"""
+        known = [x for x in self.sizes if x is not None]
+        return sum(known) - max(known) if known else 0
+
+
 #------ Snapshot --------------------------------------------------------------
 
 class Snapshot(object):
@@ -119,6 +169,12 @@ class Snapshot(object):
     ]
     """Numeric tags"""
 
+    dateTags = [
+        'year', 'releaseDate', 'originalReleaseDate', 'recordingDate',
+        'encodingDate', 'taggingDate'
+    ]
+    """Tags holding a date as text, which sorts in date order"""
+
     @staticmethod
     def orderedAllColumns():
         """Provides an ordered list of all supported ID3 tags"""
@@ -145,6 +201,9 @@ class Snapshot(object):
             1. The standard order
             2. Any unrecognized fields in alphanumeric order
         """
+        if isinstance(data, ColumnarSnapshot):
+            return data.columns()
+
         header = set()
 
         for v in data.values():
@@ -198,6 +257,290 @@ class Snapshot(object):
         return columns
 
 
+#------ Columnar Snapshot -----------------------------------------------------
+
+class _Bitmap(object):
+    """A growable array of bits"""
+    def __init__(self):
+        self.bits = bytearray()
+
+    def __getitem__(self, i):
+        byte = i >> 3
+        if byte >= len(self.bits):
+            return False
+        return bool(self.bits[byte] & (1 << (i & 7)))
+
+    def set(self, i):
+        while len(self.bits) <= i >> 3:
+            self.bits.append(0)
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def clear(self, i):
+        if i >> 3 < len(self.bits):
+            self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xff
+
+
+class _Column(object):
+    """The values of one tag for every row of a :class:`ColumnarSnapshot`
+
+    ``present`` has a bit for each row that has the tag and ``nulls`` a bit
+    for each row where it is ``None``.  The other values are kept as:
+
+    * ``'int'``: a machine integer in an :class:`array.array`
+    * ``'pool'``: an index into a pool of the distinct values, so every
+      repeated string is only kept once, or ``-1`` when there is no value
+    * ``'object'``: the value itself, for lists and dictionaries
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        self.present = _Bitmap()
+        self.nulls = _Bitmap()
+        self.values = array('l') if kind != 'object' else []
+        self.pool = []
+        self.codes = {}
+
+    def _fits(self, value):
+        if self.kind == 'int':
+            return type(value) in _integerTypes
+        if self.kind == 'pool':
+            return isinstance(value, _scalarTypes)
+        return True
+
+    def _demote(self):
+        if self.kind == 'int':
+            values = list(self.values)
+            self.kind = 'pool'
+            self.values = array('l')
+            for i, v in enumerate(values):
+                if self.present[i] and not self.nulls[i]:
+                    self.values.append(self._encode(v))
+                else:
+                    self.values.append(self._pad())
+        else:
+            values = [self.pool[c] if c >= 0 else None for c in self.values]
+            self.kind = 'object'
+            self.values = values
+            self.pool, self.codes = [], {}
+
+    def _encode(self, value):
+        if self.kind == 'pool':
+            # keep 1, 1.0 and True apart without a tuple for every string
+            if isinstance(value, _textTypes):
+                key = value
+            else:
+                key = (type(value), value)
+            code = self.codes.get(key)
+            if code is None:
+                code = self.codes[key] = len(self.pool)
+                self.pool.append(value)
+            return code
+        return value
+
+    def set(self, row, value):
+        """Sets the value of ``row``, which may already have one"""
+        self.present.set(row)
+        if value is None:
+            self.nulls.set(row)
+        else:
+            self.nulls.clear(row)
+            while not self._fits(value):
+                self._demote()
+
+        # pad the rows that do not have this tag
+        while len(self.values) <= row:
+            self.values.append(self._pad())
+
+        if value is None:
+            self.values[row] = self._pad()
+            return
+        try:
+            self.values[row] = self._encode(value)
+        except OverflowError:
+            self._demote()
+            self.values[row] = self._encode(value)
+
+    def remove(self, row):
+        """Removes the tag from ``row``"""
+        self.present.clear(row)
+        self.nulls.clear(row)
+        if row < len(self.values):
+            self.values[row] = self._pad()
+
+    def _pad(self):
+        # a missing value is not put in the pool
+        if self.kind == 'pool':
+            return -1
+        return None if self.kind == 'object' else 0
+
+    def has(self, row):
+        return self.present[row]
+
+    def get(self, row):
+        if self.nulls[row]:
+            return None
+        value = self.values[row]
+        return self.pool[value] if self.kind == 'pool' else value
+
+    def rows(self, count):
+        """Yields ``(row, value)`` for every row that has the tag"""
+        for i in range(count):
+            if self.present[i]:
+                yield i, self.get(i)
+
+
+try:
+    _integerTypes = (int, long)
+    _textTypes = (basestring,)
+except NameError:  # pragma: no cover
+    _integerTypes = (int,)
+    _textTypes = (str,)
+_scalarTypes = _textTypes + _integerTypes + (float,)
+
+
+class ColumnarSnapshot(Mapping):
+    """A :data:`Snapshot` stored one column at a time
+
+    Each tag is kept in a single column, with the integer tags as machine
+    integers and the other scalar values pooled, so a repeated album or
+    artist is stored once.  This takes a fraction of the memory of the
+    dictionary of dictionaries and makes the whole-column operations,
+    like :meth:`columns`, :meth:`distinct` and :meth:`sortedPaths`, cheap.
+
+    It can be used wherever a snapshot is read.  Looking up a path builds a
+    new ``dict`` of its tags, so changing that ``dict`` does not change the
+    snapshot.  Use :meth:`add` to add or replace a path.
+
+    Args:
+        data: A snapshot ``dict`` or an iterable of ``(path, tags)`` pairs,
+        like :func:`pyTagger.utils.iterSnapshot`
+    """
+    def __init__(self, data=None):
+        self.paths = []
+        self._rows = {}
+        self._columns = {}
+
+        pairs = data.items() if isinstance(data, dict) else (data or [])
+        for path, tags in pairs:
+            self.add(path, tags)
+
+    def add(self, path, tags):
+        if path in self._rows:
+            self._replace(path, tags)
+            return
+
+        row = len(self.paths)
+        self.paths.append(path)
+        self._rows[path] = row
+        self._setRow(row, tags)
+
+    def _replace(self, path, tags):
+        row = self._rows[path]
+        for k, column in self._columns.items():
+            if k not in tags and column.has(row):
+                column.remove(row)
+        self._setRow(row, tags)
+
+    def _setRow(self, row, tags):
+        for k, v in tags.items():
+            column = self._columns.get(k)
+            if column is None:
+                kind = ('int' if k in Snapshot.integerTags else
+                        'object' if k in Snapshot.complexTags else 'pool')
+                column = self._columns[k] = _Column(kind)
+            column.set(row, v)
+
+    def __getitem__(self, path):
+        row = self._rows[path]
+        tags = {}
+        for k, column in self._columns.items():
+            if column.has(row):
+                tags[k] = column.get(row)
+        return tags
+
+    def __contains__(self, path):
+        return path in self._rows
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def columns(self):
+        """The tags in the snapshot, in the same order as
+        :meth:`Snapshot.columnsFromSnapshot`, without reading any rows
+        """
+        known = Snapshot.orderedAllColumns()
+        columns = [c for c in known if c in self._columns]
+        columns.extend(sorted(set(self._columns) - set(known)))
+        return columns
+
+    def column(self, tag):
+        """Yields ``(path, value)`` for every path that has ``tag``"""
+        if tag not in self._columns:
+            return
+        for row, value in self._columns[tag].rows(len(self.paths)):
+            yield self.paths[row], value
+
+    def distinct(self, tag):
+        """The set of distinct values of ``tag``, including ``None``"""
+        column = self._columns.get(tag)
+        if column is None:
+            return set()
+
+        count = len(self.paths)
+        if column.kind == 'pool':
+            codes = set(column.values[i] for i in range(count)
+                        if column.has(i) and not column.nulls[i])
+            values = set(column.pool[c] for c in codes)
+        elif column.kind == 'int':
+            values = set(column.values[i] for i in range(count)
+                         if column.has(i) and not column.nulls[i])
+        else:
+            raise TypeError("'{0}' does not have scalar values".format(tag))
+
+        if any(column.has(i) and column.nulls[i] for i in range(count)):
+            values.add(None)
+        return values
+
+    def sortedPaths(self, tag, reverse=False):
+        """The paths ordered by the value of ``tag``
+
+        Paths without the tag, or where it is ``None``, are first.
+        """
+        column = self._columns.get(tag)
+        if column is None:
+            return list(self.paths)
+        if column.kind == 'object':
+            raise TypeError("'{0}' does not have scalar values".format(tag))
+
+        if column.kind == 'pool':
+            # rank the distinct values once instead of comparing every row
+            order = sorted(range(len(column.pool)),
+                           key=lambda c: _sortKey(column.pool[c]))
+            rank = array('l', [0] * len(column.pool))
+            for i, c in enumerate(order):
+                rank[c] = i
+        else:
+            rank = None
+
+        def key(row):
+            if not column.has(row) or column.nulls[row]:
+                return (0, 0)
+            value = column.values[row]
+            return (1, rank[value] if rank is not None else value)
+
+        rows = sorted(range(len(self.paths)), key=key, reverse=reverse)
+        return [self.paths[i] for i in rows]
+
+
+def _sortKey(value):
+    # Python 3 cannot compare strings with numbers
+    if isinstance(value, _integerTypes + (float,)):
+        return (0, value, '')
+    return (1, 0, value)
+
+
 p = getArgumentParser('snapshot',
                       default_config_files=defaultConfigFiles,
                       parents=[getArgumentParser()],
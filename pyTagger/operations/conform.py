@@ -104,14 +104,13 @@ class LibraryStandard(object):
     # Process
     # -------------------------------------------------------------------------
 
-    def processFile(self, fullPath):
-        tags = self.reader.extractTags(fullPath)
-
+    def conform(self, tags):
         pipeline = [
             self.extractArtist, self.removeAnnotations, self.timestamp,
             self.assignID, self.digitalMedia, self.clearComments,
             self.clearRating
         ]
-        tags = fmap(pipeline, tags)
+        return fmap(pipeline, tags)
 
-        updateOne(self.reader, fullPath, tags, True)
+    def processFile(self, fullPath):
+        return updateOne(self.reader, fullPath, self.conform, True)
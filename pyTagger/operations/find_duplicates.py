@@ -1,5 +1,10 @@
 from __future__ import unicode_literals
-from pyTagger.models import TrackMatch
+import os
+from functools import partial
+from multiprocessing.dummy import Pool
+from pyTagger.models import CloneGroup, TrackMatch
+from pyTagger.operations.hash import hashFile, hashSample
+from pyTagger.proxies.sqlite import SnapshotStore
 
 # -----------------------------------------------------------------------------
 # Clones = Exact Duplicates
@@ -15,6 +20,17 @@ def _flattenAggregation(response):
 
 
 def findClones(client):
+    """Yields ``(fileHash, path)`` for every track that has the same audio as
+    another track
+
+    ``client`` can be an Elasticsearch client or a
+    :class:`pyTagger.proxies.sqlite.SnapshotStore`, which answers from its
+    ``fileHash`` index without a limit on the number of hashes
+    """
+    if isinstance(client, SnapshotStore):
+        return client.duplicates('fileHash')
+
+    # A size of 0 returns every bucket
     r = client.search({
         'from': 0, 'size': 0,
         'aggs': {
@@ -22,12 +38,13 @@ def findClones(client):
                 'terms': {
                     'field': 'fileHash',
                     'min_doc_count': 2,
-                    'size': 100
+                    'size': 0
                 },
                 'aggs': {
                     'secondary': {
                         'terms': {
-                            'field': 'path'
+                            'field': 'path',
+                            'size': 0
                         }
                     }
                 }
@@ -37,6 +54,108 @@ def findClones(client):
 
     return _flattenAggregation(r)
 
+
+def _fileSize(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def groupClones(pairs, sizeOf=_fileSize):
+    """Yields a :class:`pyTagger.models.CloneGroup` for every set of tracks
+    that have the same audio, sorted by ``fileHash``
+
+    The tracks are read once, keeping only the path of the first track with
+    each hash, so ``pairs`` can be a snapshot read with
+    :func:`pyTagger.utils.iterSnapshot`.  Tracks without a ``fileHash`` are
+    skipped.
+
+    Args:
+        pairs (iterable): ``(path, tags)`` for each track
+
+        sizeOf (function): Returns the size of a file, or ``None``
+    """
+    first = {}
+    groups = {}
+
+    for path, tags in pairs:
+        fileHash = tags.get('fileHash') if tags else None
+        if not fileHash:
+            continue
+
+        if fileHash in groups:
+            groups[fileHash].append(path)
+        elif fileHash in first:
+            groups[fileHash] = [first.pop(fileHash), path]
+        else:
+            first[fileHash] = path
+
+    for fileHash in sorted(groups):
+        paths = sorted(groups[fileHash])
+        yield CloneGroup(fileHash, paths, [sizeOf(p) for p in paths])
+
+
+def _decoded(value):
+    return value.decode('ascii') if isinstance(value, bytes) else value
+
+
+def _matchingSamples(candidates, sampleSize):
+    bySample = {}
+    for path, offset, size in candidates:
+        sample = hashSample(path, offset, sampleSize)
+        if sample:
+            bySample.setdefault(sample, []).append((path, offset, size))
+    return [x for x in bySample.values() if len(x) > 1]
+
+
+def groupIdenticalFiles(paths, offsetOf=None, hasher=hashFile,
+                        sampleSize=16384):
+    """Yields a :class:`pyTagger.models.CloneGroup` for every set of files
+    with the same content, sorted by hash
+
+    The files are compared in stages.  Only files with the same size are
+    sampled with :func:`pyTagger.operations.hash.hashSample`, and only the
+    files whose samples also match are hashed in full, so most files are
+    never read.
+
+    Args:
+        paths (iterable): The files to compare
+
+        offsetOf (function): Returns where the content to compare starts in
+        a file, e.g. :func:`pyTagger.operations.hash.tagSize` to compare only
+        the audio in MP3s.  By default the whole file is compared
+
+        hasher (function): Hashes a file from an offset, e.g.
+        :meth:`pyTagger.operations.hash.HashCache.hashFile`
+
+        sampleSize (int): The number of bytes sampled at each end
+    """
+    bySize = {}
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        offset = offsetOf(path) if offsetOf else 0
+        bySize.setdefault(size - offset, []).append((path, offset, size))
+
+    groups = {}
+    for candidates in bySize.values():
+        if len(candidates) < 2:
+            continue
+        for matches in _matchingSamples(candidates, sampleSize):
+            for path, offset, size in matches:
+                value = _decoded(hasher(path, offset))
+                if value:
+                    groups.setdefault(value, []).append((path, size))
+
+    for value in sorted(groups):
+        if len(groups[value]) > 1:
+            members = sorted(groups[value])
+            yield CloneGroup(value, [p for p, _ in members],
+                             [x for _, x in members])
+
 # -----------------------------------------------------------------------------
 # Isonom = Name based matches
 
@@ -79,11 +198,7 @@ def _projectIsonomResults(response):
         yield (hit['_score'], hit['_source'])
 
 
-def findIsonomTracks(client, track, minScore):
-    client.log.info('=' * 50)
-    client.log.info('\t'.join([track['title'], track['album']]))
-    query = _isonomQuery(track, minScore)
-    response = client.search(query)
+def _logIsonomResults(client, track, response):
     for score, isonom in _projectIsonomResults(response):
         path = isonom['path']
         del isonom['path']
@@ -93,24 +208,99 @@ def findIsonomTracks(client, track, minScore):
         yield (path, score, isonom)
 
 
-def findIsonoms(client, snapshot, minScore):
+def findIsonomTracks(client, track, minScore):
+    client.log.info('=' * 50)
+    client.log.info('\t'.join([track['title'], track['album']]))
+    query = _isonomQuery(track, minScore)
+    response = client.search(query)
+    for match in _logIsonomResults(client, track, response):
+        yield match
+
+
+def _trackMatches(k, v, matches):
+    quality = [x for x in matches if x[1] >= 12]
+
+    if len(quality) == 1:
+        path, score, tags = quality[0]
+        yield TrackMatch('single', k, path, score, v, tags)
+    elif len(matches) == 1:
+        path, score, tags = matches[0]
+        yield TrackMatch('single', k, path, score, v, tags)
+    elif len(matches) > 1:
+        for path, score, tags in matches:
+            yield TrackMatch('multiple', k, path, score, v, tags)
+    else:
+        yield TrackMatch('nothing', k, None, 0.0, v, None)
+
+
+def _isonomBatches(snapshot, minScore, batchSize):
+    batch = []
+    for k in sorted(snapshot):
+        v = snapshot[k]
+        try:
+            query = _isonomQuery(v, minScore)
+        except ValueError:
+            query = None
+
+        batch.append((k, v, query))
+        if len(batch) == batchSize:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _searchBatch(client, batch):
+    queries = [q for _, _, q in batch if q is not None]
+    responses = iter(client.msearch(queries) if queries else [])
+    return [(k, v, None if q is None else next(responses))
+            for k, v, q in batch]
+
+
+def _findIsonomsInBatches(client, snapshot, minScore, batchSize, threads):
+    batches = _isonomBatches(snapshot, minScore, batchSize)
+    pool = Pool(max(threads, 1))
+    try:
+        for results in pool.imap(partial(_searchBatch, client), batches):
+            for k, v, response in results:
+                if response is None:
+                    yield TrackMatch('insufficient', k, None, 0.0, v, None)
+                    continue
+
+                client.log.info('=' * 50)
+                client.log.info('\t'.join([v['title'], v['album']]))
+                matches = list(_logIsonomResults(client, v, response))
+                for match in _trackMatches(k, v, matches):
+                    yield match
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def findIsonoms(client, snapshot, minScore, batchSize=0, threads=1):
+    """Yields a :class:`pyTagger.models.TrackMatch` for every track in the
+    snapshot that has a similar name in the index, sorted by path
+
+    When ``batchSize`` is set, the searches are sent that many at a time
+    through the multi-search API, with up to ``threads`` requests in flight.
+    The matches are the same and come back in the same order.
+    """
+    if batchSize > 0:
+        for match in _findIsonomsInBatches(client, snapshot, minScore,
+                                           batchSize, threads):
+            yield match
+        return
+
     for k in sorted(snapshot):
         v = snapshot[k]
 
         try:
             matches = list(findIsonomTracks(client, v, minScore))
-            quality = [x for x in matches if x[1] >= 12]
-
-            if len(quality) == 1:
-                path, score, tags = quality[0]
-                yield TrackMatch('single', k, path, score, v, tags)
-            elif len(matches) == 1:
-                path, score, tags = matches[0]
-                yield TrackMatch('single', k, path, score, v, tags)
-            elif len(matches) > 1:
-                for path, score, tags in matches:
-                    yield TrackMatch('multiple', k, path, score, v, tags)
-            else:
-                yield TrackMatch('nothing', k, None, 0.0, v, None)
         except ValueError:
             yield TrackMatch('insufficient', k, None, 0.0, v, None)
+            continue
+
+        for match in _trackMatches(k, v, matches):
+            yield match
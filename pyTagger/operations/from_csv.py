@@ -4,128 +4,99 @@ from pyTagger.models import Snapshot
 from pyTagger.operations.to_csv import SUBFIELD_SEP
 from pyTagger.utils import saveJsonIncrementalDict
 
-import sys
-if sys.version < '3':  # pragma: no cover
-    _unicode = unicode
-else:  # pragma: no cover
-    _unicode = lambda x: x
-
 # -----------------------------------------------------------------------------
-# State Machine
+# Parser
 # -----------------------------------------------------------------------------
 
 
-class Context(object):
-    def __init__(self):
-        self._reset()
+def _splitRecord(record, separator):
+    """Splits a record that has quotes into fields
+
+    Splitting on the quotes leaves the quoted text at the odd indexes.  An
+    empty unquoted part between two quoted ones was a doubled quote.
+    """
+    parts = record.split('"')
+    last = len(parts) - 1
+    fields = []
+    current = []
+
+    for i, part in enumerate(parts):
+        if i % 2:
+            current.append(part)
+        elif not part:
+            if 0 < i < last:
+                current.append('"')
+        else:
+            if '\r' in part:
+                part = part.replace('\r', '')
+            pieces = part.split(separator)
+            current.append(pieces[0])
+            for piece in pieces[1:]:
+                fields.append(''.join(current))
+                current = [piece]
+
+    fields.append(''.join(current))
+    return fields
 
-    def _reset(self):
-        self._buffer = []
-        self._state = State.Initial
 
-    def push(self, c):
-        self._buffer.append(c)
+class Context(object):
+    """Reads the UTF-16 CSV files written by
+    :func:`pyTagger.operations.to_csv.writeCsv`, or saved by Excel
+
+    Fields may be quoted, with a doubled quote for a quote, and a quoted
+    field can span lines.  A carriage return outside of quotes is ignored.
+    The file is read ``chunkSize`` characters at a time, and a line without
+    quotes is simply split.
+    """
+    def __init__(self, chunkSize=1 << 20):
+        self.chunkSize = chunkSize
+        self._separator = '\t'
 
     @property
     def separator(self):
         return self._separator
 
     def parse(self, inFile, excelFormat=True):
-        self._reset()
         self._separator = '\t' if excelFormat else ','
 
         with io.open(inFile, 'r', encoding='utf_16_le') as f:
-            c = f.read(1)  # skip BOM
-            c = f.read(1)
-            while c:
-                self._state = self._state.onCharacter(self, c)
-                self._state.run(self, c)
-                if self._state.isEndOfRecord:
-                    row = _unicode(''.join(self._buffer))
-                    yield row.split('\x1f')
-                    self._reset()
-                c = f.read(1)
-
-
-class State(object):
-    def run(self, context, c):
-        raise NotImplementedError
-
-    def onCharacter(self, context, c):
-        if c == context.separator:
-            return State.EndOfField
-        elif c == '"':
-            return State.DoubleQuote
-        elif c == '\n':
-            return State.NewLine
-        else:
-            return State.Raw
-
-    @property
-    def isEndOfRecord(self):
-        return False
-
-
-class InitialState(State):
-    pass
-
-
-class RawState(State):
-    def run(self, context, c):
-        if c != '\r':
-            context.push(c)
-
-
-class EndOfFieldState(State):
-    def run(self, context, c):
-        context.push('\x1f')
-
-
-class DoubleQuoteState(State):
-    def run(self, context, c):
-        if c != '"':
-            context.push(c)
-
-    def onCharacter(self, context, c):
-        if c == '"':
-            return State.EscapingDoubleQuote
-        else:
-            return self
-
-
-class EscapingDoubleQuoteState(State):
-    def run(self, context, c):
-        pass
-
-    def onCharacter(self, context, c):
-        if c == context.separator:
-            return State.EndOfField
-        elif c == '"':
-            context.push('"')
-            return State.DoubleQuote
-        elif c == '\n':
-            return State.NewLine
-        else:
-            return State.Raw
-
-
-class NewLineState(State):
-    def run(self, context, c):
-        pass
-
-    def onCharacter(self, context, c):
-        return self
-
-    def isEndOfRecord(self):
-        return True
-
-
-State.Initial = InitialState()
-State.Raw = RawState()
-State.EndOfField = EndOfFieldState()
-State.DoubleQuote = DoubleQuoteState()
-State.EscapingDoubleQuote = EscapingDoubleQuoteState()
-State.NewLine = NewLineState()
+            f.read(1)  # skip BOM
+            buf = ''
+            pos = 0
+            atEnd = False
+
+            while True:
+                # Every quote opens or closes quoting, so a record ends at
+                # the first new line after an even number of them
+                quotes = 0
+                scan = pos
+                end = buf.find('\n', pos)
+                while end != -1:
+                    quotes += buf.count('"', scan, end)
+                    if not quotes % 2:
+                        break
+                    scan = end
+                    end = buf.find('\n', end + 1)
+
+                if end != -1:
+                    record = buf[pos:end]
+                    pos = end + 1
+                    if quotes:
+                        yield _splitRecord(record, self._separator)
+                    else:
+                        if '\r' in record:
+                            record = record.replace('\r', '')
+                        yield record.split(self._separator)
+                    continue
+
+                # A record without an end of line is incomplete
+                if atEnd:
+                    return
+
+                chunk = f.read(self.chunkSize)
+                buf = buf[pos:] + chunk
+                pos = 0
+                atEnd = not chunk
 
 # -----------------------------------------------------------------------------
 
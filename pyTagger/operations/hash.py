@@ -1,26 +1,216 @@
 import binascii
 import hashlib
+import io
 import logging
+import os
+from collections import OrderedDict
+from pyTagger.utils import loadJson, saveJson
 
+try:
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
 
-def hashBuffer(b):
-    shaAccum = hashlib.sha1()
+DEFAULT_ALGORITHM = 'sha1'
+"""The digest used for ``fileHash``.  Changing it invalidates old snapshots"""
+
+BLOCK_SIZE = 1 << 20
+"""The number of bytes read from a file at a time"""
+
+
+def _text(value):
+    return value.decode('ascii') if isinstance(value, bytes) else value
+
+
+def _bytes(value):
+    return value if isinstance(value, bytes) else value.encode('ascii')
+
+
+def newDigest(algorithm=DEFAULT_ALGORITHM):
+    """Creates a digest object for any :mod:`hashlib` algorithm
+    (e.g. ``sha1`` or ``blake2b``) or ``xxhash`` when it is installed
+    """
+    if algorithm == 'xxhash':
+        if xxhash is None:
+            raise ValueError('xxhash is not installed')
+        return xxhash.xxh64()
+    return hashlib.new(algorithm)
+
+
+def hashBuffer(b, algorithm=DEFAULT_ALGORITHM):
+    shaAccum = newDigest(algorithm)
     shaAccum.update(b)
     return binascii.b2a_base64(shaAccum.digest()).strip()
 
 
-def hashFile(fileName, offset=0):
-    chunk_size = 1024
-    shaAccum = hashlib.sha1()
+def hashFile(fileName, offset=0, algorithm=DEFAULT_ALGORITHM):
+    shaAccum = newDigest(algorithm)
+
+    # Read into the same buffer so a large file is a handful of calls
+    buffer = bytearray(BLOCK_SIZE)
+    view = memoryview(buffer)
     try:
-        with open(fileName, "rb") as f:
+        with io.open(fileName, "rb") as f:
             f.seek(offset)
-            byte = f.read(chunk_size)
-            while byte:  # pragma: no branch
-                shaAccum.update(byte)
-                byte = f.read(chunk_size)
+            size = f.readinto(buffer)
+            while size:
+                shaAccum.update(view[:size])
+                size = f.readinto(buffer)
     except IOError:
         log = logging.getLogger(__name__)
         log.error("Cannot Hash '%s'", fileName)
         return ''
     return binascii.b2a_base64(shaAccum.digest()).strip()
+
+
+def hashSample(fileName, offset=0, blockSize=65536):
+    """Hashes the first and last ``blockSize`` bytes after ``offset``
+
+    This is a cheap way to tell if the audio in a file has moved without
+    reading all of it
+    """
+    shaAccum = hashlib.sha1()
+    try:
+        with open(fileName, "rb") as f:
+            f.seek(offset)
+            shaAccum.update(f.read(blockSize))
+            f.seek(0, os.SEEK_END)
+            f.seek(max(offset, f.tell() - blockSize))
+            shaAccum.update(f.read(blockSize))
+    except IOError:
+        return ''
+    return _text(binascii.b2a_base64(shaAccum.digest()).strip())
+
+
+def tagSize(fileName):
+    """The size of the ID3v2 tag at the start of a file, as eyeD3 reports it
+
+    Hashing from this offset gives the same value as ``fileHash``.  Only the
+    10 byte header is read.
+    """
+    try:
+        with io.open(fileName, 'rb') as f:
+            header = f.read(10)
+    except IOError:
+        return 0
+
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+
+    # A sync safe integer, 7 bits a byte
+    size = 0
+    for b in bytearray(header[6:10]):
+        size = (size << 7) | (b & 0x7f)
+    return size
+
+# -----------------------------------------------------------------------------
+# Cache
+
+
+class HashCache(object):
+    """Remembers the results of :func:`hashFile` between runs
+
+    Entries are keyed on the path, size, modification time and offset
+    (the size of the ID3 tag) of the file, and the file is hashed again
+    when any of them change.  With ``sampleAudio``, a file whose tags were
+    rewritten is trusted to have the same audio when its length and a
+    :func:`hashSample` of it still match.  That skips reading the whole
+    file, but misses an edit to the middle of the audio that keeps its size.
+
+    The least recently used entries are dropped once there are more than
+    ``maxEntries``.  Nothing is written to disk unless a ``fileName`` is
+    provided, and a saved cache is ignored if it used another ``algorithm``.
+    """
+    def __init__(self, fileName=None, maxEntries=100000,
+                 algorithm=DEFAULT_ALGORITHM, sampleAudio=False):
+        self.fileName = fileName
+        self.maxEntries = maxEntries
+        self.algorithm = algorithm
+        self.sampleAudio = sampleAudio
+        self._entries = OrderedDict()
+        self._changes = []
+        self._loaded = False
+        self._dirty = False
+
+    def __len__(self):
+        self._load()
+        return len(self._entries)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if self.fileName and os.path.exists(self.fileName):
+            saved = loadJson(self.fileName)
+            if saved.get('algorithm', 'sha1') != self.algorithm:
+                return
+            for row in saved['entries']:
+                self._entries[row[0]] = row[1:]
+
+    def _store(self, fileName, entry):
+        self._entries.pop(fileName, None)
+        self._entries[fileName] = entry
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def _sampleMatches(self, fileName, offset, size, entry):
+        """Whether the audio of a file is the same as a previous entry"""
+        if not self.sampleAudio or not entry[3]:
+            return False
+        if entry[0] - entry[2] != size - offset:
+            return False
+        return entry[3] == hashSample(fileName, offset)
+
+    def hashFile(self, fileName, offset=0):
+        self._load()
+        try:
+            stats = os.stat(fileName)
+        except OSError:
+            return hashFile(fileName, offset, self.algorithm)
+
+        key = [stats.st_size, stats.st_mtime, offset]
+        entry = self._entries.get(fileName)
+
+        # Nothing has changed, so only the order of use is updated
+        if entry and entry[:3] == key:
+            self._entries.pop(fileName)
+            self._entries[fileName] = entry
+            return _bytes(entry[4])
+
+        if entry and self._sampleMatches(fileName, offset, stats.st_size,
+                                         entry):
+            sample, value = entry[3], entry[4]
+        else:
+            value = _text(hashFile(fileName, offset, self.algorithm))
+            if not value:
+                return value
+            sample = hashSample(fileName, offset) if self.sampleAudio else ''
+
+        entry = key + [sample, value]
+        self._store(fileName, entry)
+        self._changes.append([fileName] + entry)
+        return _bytes(value)
+
+    def changes(self):
+        """Returns and clears the entries added since the last call"""
+        result, self._changes = self._changes, []
+        return result
+
+    def merge(self, changes):
+        """Adds entries produced by another instance, e.g. in another process
+        """
+        self._load()
+        for row in changes:
+            self._store(row[0], row[1:])
+
+    def save(self):
+        if not self.fileName or not self._dirty:
+            return
+
+        saveJson(self.fileName, {
+            'algorithm': self.algorithm,
+            'entries': [[k] + v for k, v in self._entries.items()]
+        })
+        self._dirty = False
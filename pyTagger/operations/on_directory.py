@@ -3,12 +3,23 @@ import io
 import os
 import shutil
 from collections import Counter
+from multiprocessing.dummy import Pool as ThreadPool
 from pyTagger.operations.conform import LibraryStandard
 from pyTagger.operations.hash import hashFile
 from pyTagger.operations.name import buildPath
 from pyTagger.operations.on_mp3 import extractImages as singleExtract
+from pyTagger.operations.on_mp3 import tallyUpdates
+from pyTagger.utils import loadJson, parallelMap, saveJson
 from pyTagger.utils import saveJsonIncrementalDict
 
+try:
+    from os import scandir
+except ImportError:  # pragma: no cover
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
 import sys
 if sys.version < '3':  # pragma: no cover
     _unicode = unicode
@@ -27,8 +38,78 @@ def _filterMp3s(fullPath):
     return fullPath[-3:].lower() in ['mp3']
 
 
-def _walkDirectory(path, filterFn):
-    for currentDir, _, files in os.walk(_unicode(path)):
+def _listDirectory(directory, filterFn):
+    """Lists a directory with ``scandir``, so the file types come from the
+    listing.  A ``filterFn`` with a true ``usesEntry`` attribute is also given
+    the entry, so it can reuse its ``stat``
+
+    Returns:
+        tuple: The files that pass the filter and the directories to walk
+    """
+    files, directories = [], []
+    try:
+        entries = list(scandir(directory))
+    except OSError:
+        # The same as os.walk, a directory that cannot be read is skipped
+        return files, directories
+
+    usesEntry = getattr(filterFn, 'usesEntry', False)
+    for entry in entries:
+        try:
+            isDirectory = entry.is_dir()
+        except OSError:
+            isDirectory = False
+
+        if isDirectory:
+            # Links to directories are not followed, the same as os.walk
+            if not entry.is_symlink():
+                directories.append(entry.path)
+        elif usesEntry:
+            if filterFn(entry.path, entry):
+                files.append(entry.path)
+        elif filterFn(entry.path):
+            files.append(entry.path)
+
+    return files, directories
+
+
+def _scanDirectory(path, filterFn, threads):
+    root = os.path.abspath(_unicode(path))
+
+    if threads < 2:
+        stack = [root]
+        while stack:
+            files, directories = _listDirectory(stack.pop(), filterFn)
+            for fullPath in files:
+                yield fullPath
+            stack.extend(reversed(directories))
+        return
+
+    # Every directory is listed as soon as it is found, but the files are
+    # yielded in the same order as the walk on a single thread
+    pool = ThreadPool(threads)
+    try:
+        stack = [pool.apply_async(_listDirectory, (root, filterFn))]
+        while stack:
+            files, directories = stack.pop().get()
+            for fullPath in files:
+                yield fullPath
+            stack.extend(
+                pool.apply_async(_listDirectory, (x, filterFn))
+                for x in reversed(directories)
+            )
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _walkDirectory(path, filterFn, threads=1):
+    if scandir is not None:
+        for fullPath in _scanDirectory(path, filterFn, threads):
+            yield fullPath
+        return
+
+    for currentDir, _, files in os.walk(_unicode(path)):  # pragma: no cover
         # Get the absolute path of the currentDir parameter
         currentDir = os.path.abspath(currentDir)
 
@@ -49,7 +130,22 @@ def _walkFile(path, filterFn):
                 yield fullPath
 
 
-def walk(path, filterFn=None):
+def walk(path, filterFn=None, threads=1):
+    """Finds the MP3s in a directory, or listed in a text file
+
+    Args:
+        filterFn (function): Decides which files are included from their
+        full path.  When it has a true ``usesEntry`` attribute, a file found
+        in a directory listing is also given its ``os.DirEntry``, so the
+        cached ``stat()`` can be reused
+
+        threads (int): The number of directories that are listed at the same
+        time, which helps on network drives.  The files are found in the same
+        order whatever the number
+
+    Yields:
+        str: The absolute path of each file
+    """
     if not filterFn:
         filterFn = _filterMp3s
 
@@ -57,18 +153,18 @@ def walk(path, filterFn=None):
         for f in _walkFile(path, filterFn):
             yield f
     elif os.path.isdir(path):
-        for f in _walkDirectory(path, filterFn):
+        for f in _walkDirectory(path, filterFn, threads):
             yield f
     else:
         raise ValueError(path + ' is not a file or directory')
 
 
-def walkAll(path):
+def walkAll(path, threads=1):
     if os.path.isfile(path):
         for f in _walkFile(path, _filterAll):
             yield f
     elif os.path.isdir(path):
-        for f in _walkDirectory(path, _filterAll):
+        for f in _walkDirectory(path, _filterAll, threads):
             yield f
     else:
         raise ValueError(path + ' is not a file or directory')
@@ -86,20 +182,140 @@ def needsMove(current, proposed):
 
     return True
 
+# -----------------------------------------------------------------------------
+# Worker Processes
+
+_worker = {}
+
+
+def _initScanWorker(readerType, fieldSet):
+    _worker['reader'] = readerType(fieldSet)
+
+
+def _scanOne(fullPath):
+    reader = _worker['reader']
+    row = reader.extractTags(fullPath)
+    return fullPath, row, reader.hashCache.changes()
+
+
+def _initConformWorker():
+    _worker['standard'] = LibraryStandard()
+
+
+def _conformOne(fullPath):
+    return _worker['standard'].processFile(fullPath)
+
+
+def _mergeHashes(results, hashCache):
+    for fullPath, row, changes in results:
+        hashCache.merge(changes)
+        yield fullPath, row
+
+
+def _extractAll(paths, id3Reader, workers):
+    if workers < 2:
+        return ((x, id3Reader.extractTags(x)) for x in paths)
+
+    # Each process builds its own reader with the same fields
+    initargs = (type(id3Reader), list(id3Reader.fieldSet))
+    results = parallelMap(_scanOne, paths, workers, _initScanWorker, initargs)
+    return _mergeHashes(results, id3Reader.hashCache)
+
+# -----------------------------------------------------------------------------
+# Incremental Scans
+
+
+def statCacheName(snapshotName):
+    """The sidecar file that remembers the state of each file in a snapshot"""
+    return snapshotName + '.stat'
+
+
+def _fingerprint(fullPath):
+    stats = os.stat(fullPath)
+    return [stats.st_size, stats.st_mtime, stats.st_ino]
+
+
+def _loadPrevious(previous, fieldSet):
+    rows, known = {}, {}
+
+    if os.path.exists(previous):
+        rows = loadJson(previous)
+
+        cacheName = statCacheName(previous)
+        if os.path.exists(cacheName):
+            cache = loadJson(cacheName)
+            # Rows scanned with other columns cannot be reused
+            if cache['columns'] == sorted(fieldSet):
+                known = cache['files']
+
+    return rows, known
+
+
+def _planRescan(paths, previous, fieldSet, report):
+    rows, known = _loadPrevious(previous, fieldSet)
+
+    plan, current = [], {}
+    for fullPath in paths:
+        fingerprint = _fingerprint(fullPath)
+        current[fullPath] = fingerprint
+
+        if fullPath not in rows:
+            report['added'] += 1
+            plan.append((fullPath, None))
+        elif known.get(fullPath) == fingerprint:
+            report['reused'] += 1
+            plan.append((fullPath, rows[fullPath]))
+        else:
+            report['refreshed'] += 1
+            plan.append((fullPath, None))
+
+    report['removed'] += sum(1 for k in rows if k not in current)
+
+    return plan, current
+
+
+def _extractStale(plan, id3Reader, workers):
+    stale = (fullPath for fullPath, row in plan if row is None)
+    extracted = _extractAll(stale, id3Reader, workers)
+
+    for fullPath, row in plan:
+        if row is None:
+            yield next(extracted)
+        else:
+            yield fullPath, row
+
 # -----------------------------------------------------------------------------
 # Directory Functions
 
 
 def buildSnapshot(
-    path, outFileName, id3Reader, compact=False, walkFilter=None
+    path, outFileName, id3Reader, compact=False, walkFilter=None, workers=1,
+    previous=None, report=None, walkThreads=1
 ):
+    """Extracts the tags of every MP3 under ``path`` into a snapshot
+
+    When ``previous`` names an earlier snapshot, files whose size,
+    modification time and inode match its :func:`statCacheName` sidecar
+    reuse the earlier row instead of being read again.  The tallies of
+    reused, refreshed, added and removed files are added to ``report``.
+    ``walkThreads`` is passed to :func:`walk`.
+    """
+    paths = walk(path, walkFilter, walkThreads)
+
+    if previous is not None:
+        report = Counter() if report is None else report
+        plan, current = _planRescan(paths, previous, id3Reader.fieldSet,
+                                    report)
+        rows = _extractStale(plan, id3Reader, workers)
+    else:
+        rows = _extractAll(paths, id3Reader, workers)
+
     output = saveJsonIncrementalDict(outFileName, compact)
 
     extracted = next(output)
     failed = 0
 
-    for fullPath in walk(path, walkFilter):
-        row = id3Reader.extractTags(fullPath)
+    for fullPath, row in rows:
         if row:
             pair = (fullPath.replace('\\', '\\\\'), row)
             extracted = output.send(pair)
@@ -107,14 +323,23 @@ def buildSnapshot(
             failed += 1
 
     output.close()
+    id3Reader.hashCache.save()
+
+    if previous is not None:
+        saveJson(statCacheName(outFileName), {
+            'columns': sorted(id3Reader.fieldSet),
+            'files': current
+        })
 
     return extracted, failed
 
 
-def buildHashTable(path):
+def buildHashTable(path, hashCache=None):
+    hasher = hashFile if hashCache is None else hashCache.hashFile
+
     table = {}
     for fullPath in walkAll(path):
-        v = hashFile(fullPath)
+        v = hasher(fullPath)
         table[v] = fullPath
     return table
 
@@ -155,21 +380,34 @@ def extractImages(path, outputDir, id3Proxy):
     if not os.path.exists(outputDir):
         os.makedirs(outputDir)
     else:
-        hashTable = buildHashTable(outputDir)
+        hashTable = buildHashTable(outputDir, id3Proxy.hashCache)
 
     c = Counter()
     for fullPath in walk(path):
         c += singleExtract(id3Proxy, hashTable, outputDir, fullPath)
+
+    id3Proxy.hashCache.save()
     return c
 
 
-def prepareForLibrary(path):
-    i = 0
-    standards = LibraryStandard()
-    for fullPath in walk(path):
-        standards.processFile(fullPath)
-        i += 1
-    return i
+def prepareForLibrary(path, workers=1):
+    """Conforms every MP3 under ``path`` with :class:`LibraryStandard`
+
+    Args:
+        workers (int): The number of processes changing files.  Each one
+        builds its own :class:`LibraryStandard`
+
+    Returns:
+        Counter: The statuses, as counted by
+        :func:`pyTagger.operations.on_mp3.tallyUpdates`
+    """
+    if workers < 2:
+        standards = LibraryStandard()
+        results = (standards.processFile(x) for x in walk(path))
+    else:
+        results = parallelMap(_conformOne, walk(path), workers,
+                              _initConformWorker)
+    return tallyUpdates(results)
 
 
 def renameFiles(path, destDir, reader):
@@ -5,6 +5,7 @@ from collections import Counter
 from pyTagger.operations.hash import hashBuffer
 from pyTagger.operations.name import imageFileName
 from pyTagger.operations.two_tags import difference
+from pyTagger.utils import parallelMap
 
 
 def _writeImage(outputDir, tags, image_data, mime_type):
@@ -22,9 +23,9 @@ def extractImages(id3Proxy, hashTable, outputDir, fileName):
 
     track = id3Proxy.loadID3(fileName)
     for image_data, mime_type in id3Proxy.extractImages(track):
-        k = hashBuffer(image_data)
+        k = hashBuffer(image_data, id3Proxy.hashCache.algorithm)
         if k not in hashTable:
-            tags = id3Proxy.extractTagsFromTrack(track)
+            tags = id3Proxy.extractTagsFromTrack(track, lazy=True)
             try:
                 v = _writeImage(outputDir, tags, image_data, mime_type)
                 hashTable[k] = v
@@ -39,27 +40,143 @@ def extractImages(id3Proxy, hashTable, outputDir, fileName):
     return c
 
 
-def updateOne(id3Proxy, fileName, updates, upgrade=False):
-    track = id3Proxy.loadID3(fileName)
+def _loadDelta(id3Proxy, fileName, updates):
+    # The MPEG frames are only scanned when the proxy reads audio columns
+    track = id3Proxy.loadID3(fileName, id3Proxy.tagOnly)
     if not track or not track.tag:
-        return 0
+        raise ValueError('no ID3 tag')
+
+    if callable(updates):
+        updates = updates(id3Proxy.extractTagsFromTrack(track))
+
+    asIs = id3Proxy.extractTagsFromTrack(track, lazy=True)
+    return track, difference(updates, asIs)
+
 
+def updateOne(id3Proxy, fileName, updates, upgrade=False):
+    """Writes the tags in ``updates`` that differ from those in the file
+
+    ``updates`` can also be a function that is given the tags in the file and
+    returns the tags it should have, so the file is only read once.  Files are
+    only saved when a tag differs or the version has to change.
+
+    Returns:
+        str: ``'written'`` when the tags were saved over the old ones,
+        ``'rewritten'`` when the whole file had to be copied to fit them,
+        ``'unchanged'`` when nothing differed and ``'failed'`` when the file
+        could not be updated
+    """
     try:
-        asIs = id3Proxy.extractTagsFromTrack(track)
-        delta = difference(updates, asIs)
+        track, delta = _loadDelta(id3Proxy, fileName, updates)
+        if not id3Proxy.needsSave(track, delta, upgrade):
+            return 'unchanged'
 
-        id3Proxy.saveID3(track, delta, upgrade)
-        return 1
-    except Exception:
-        return 0
+        if id3Proxy.saveID3(track, delta, upgrade):
+            return 'rewritten'
+        return 'written'
+    except Exception as e:
+        log = logging.getLogger(__name__)
+        log.error('Update failed on %s - %r', fileName, e)
+        return 'failed'
 
-def updateFromSnapshot(id3Proxy, snapshot, upgrade=False):
-    updated, failed = 0, 0
 
-    for k, v in sorted(snapshot.items()):
-        if updateOne(id3Proxy, k, v, upgrade):
-            updated += 1
-        else:
-            failed += 1
+def planOne(id3Proxy, fileName, updates, upgrade=False):
+    """Works out what :func:`updateOne` would do, without saving the file
+
+    Returns:
+        dict: The ``status`` that :func:`updateOne` would return, the
+        ``delta`` that would be written and the ``bytes`` that saving it would
+        write.  Failures have an ``error`` instead
+    """
+    try:
+        track, delta = _loadDelta(id3Proxy, fileName, updates)
+        if not id3Proxy.needsSave(track, delta, upgrade):
+            return {'status': 'unchanged', 'delta': {}, 'bytes': 0}
+
+        size, rewrite = id3Proxy.projectSave(track, delta, upgrade)
+        status = 'rewritten' if rewrite else 'written'
+        return {'status': status, 'delta': delta, 'bytes': size}
+    except Exception as e:
+        return {'status': 'failed', 'error': repr(e)}
+
+
+def tallyUpdates(statuses):
+    """Counts the statuses returned by :func:`updateOne`
+
+    Returns:
+        Counter: The number of files ``written``, ``unchanged`` and
+        ``failed``.  Files that had to be copied in full to fit their tag are
+        also counted as ``rewritten``
+    """
+    c = Counter(written=0, rewritten=0, unchanged=0, failed=0)
+    for status in statuses:
+        c[status] += 1
+        if status == 'rewritten':
+            c['written'] += 1
+    return c
+
+
+def formatTally(c):
+    """The counts from :func:`tallyUpdates` as lines of text"""
+    return ('Written {written}\nRewritten in full {rewritten}\n'
+            'Unchanged {unchanged}\nFailed {failed}').format(**c)
+
+# -----------------------------------------------------------------------------
+# Worker Processes
+
+_worker = {}
+
+
+def _initUpdateWorker(fn, readerType, fieldSet, upgrade):
+    _worker['fn'] = fn
+    _worker['reader'] = readerType(fieldSet)
+    _worker['upgrade'] = upgrade
+
+
+def _runWorker(pair):
+    return _worker['fn'](_worker['reader'], _worker['upgrade'], pair)
+
+
+def _updatePair(id3Proxy, upgrade, pair):
+    return updateOne(id3Proxy, pair[0], pair[1], upgrade)
+
+
+def _planPair(id3Proxy, upgrade, pair):
+    return pair[0], planOne(id3Proxy, pair[0], pair[1], upgrade)
+
+
+def _distribute(fn, id3Proxy, snapshot, upgrade, workers):
+    if isinstance(snapshot, dict):
+        snapshot = sorted(snapshot.items())
+
+    if workers < 2:
+        return (fn(id3Proxy, upgrade, x) for x in snapshot)
+
+    # Each process builds its own reader with the same fields
+    initargs = (fn, type(id3Proxy), list(id3Proxy.fieldSet), upgrade)
+    return parallelMap(_runWorker, snapshot, workers, _initUpdateWorker,
+                       initargs)
+
+
+def updateFromSnapshot(id3Proxy, snapshot, upgrade=False, workers=1):
+    """Updates every file in a snapshot with :func:`updateOne`
+
+    Args:
+        workers (int): The number of processes writing files.  Each one
+        builds its own reader with the fields of ``id3Proxy``
+
+    Returns:
+        Counter: The statuses, as counted by :func:`tallyUpdates`
+    """
+    return tallyUpdates(_distribute(_updatePair, id3Proxy, snapshot, upgrade,
+                                    workers))
+
+
+def planFromSnapshot(id3Proxy, snapshot, upgrade=False, workers=1):
+    """Runs :func:`planOne` on every file in a snapshot.  Nothing is saved
 
-    return updated, failed
+    Returns:
+        iterator: Pairs of the file name and its plan, in the order of the
+        snapshot
+    """
+    return _distribute(_planPair, id3Proxy, snapshot, upgrade, workers)
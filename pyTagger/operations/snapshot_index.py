@@ -0,0 +1,320 @@
+from __future__ import unicode_literals
+import io
+import json
+import marshal
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from pyTagger.models import COMPARISON, Snapshot
+from pyTagger.utils import BinarySnapshot, isBinarySnapshot, isSqliteSnapshot
+from pyTagger.utils import iterSnapshot, iterSnapshotSpans
+
+INDEX_EXTENSION = '.idx'
+"""Added to the name of a snapshot to name its index"""
+
+_VERSION = 1
+_MARSHAL_VERSION = 2
+_MAGIC = b'pyTagIdx'
+_footer = struct.Struct('<Q8s')
+_wordPattern = re.compile(r'\w+', re.UNICODE)
+
+sortedTags = Snapshot.integerTags + Snapshot.dateTags
+"""Tags that are indexed by value, so they can be used for ranges"""
+
+try:
+    _integerTypes = (int, long)
+    _text = unicode
+except NameError:  # pragma: no cover
+    _integerTypes = (int,)
+    _text = str
+
+
+def _words(value):
+    return _wordPattern.findall(value.lower())
+
+
+def _toBytes(a):
+    return a.tobytes() if hasattr(a, 'tobytes') else a.tostring()
+
+
+def _fromBytes(typecode, b):
+    a = array(str(typecode))
+    if hasattr(a, 'frombytes'):
+        a.frombytes(b)
+    else:  # pragma: no cover
+        a.fromstring(b)
+    return a
+
+
+def indexFileName(snapshotName):
+    return snapshotName + INDEX_EXTENSION
+
+
+def _sourceStats(snapshotName):
+    stats = os.stat(snapshotName)
+    return [stats.st_size, stats.st_mtime]
+
+# -----------------------------------------------------------------------------
+# Building
+
+
+def _canSort(tag, value):
+    if tag in Snapshot.integerTags:
+        return type(value) in _integerTypes
+    return isinstance(value, _text)
+
+
+def _sortedValues(entries):
+    entries.sort()
+    rows = array(str('i'), [row for _, row in entries])
+    return [v for v, _ in entries], _toBytes(rows)
+
+
+def buildIndex(snapshotName):
+    """Writes an index of the tags in a JSON or binary snapshot
+
+    Every word in a text tag points to the files that use it, and the values
+    of the tags in :data:`sortedTags` are kept in order.  A tag is left out
+    when one of its values cannot be indexed, e.g. a number in a text tag,
+    so the index never misses a file.
+
+    Returns:
+        int: The number of files indexed
+    """
+    if isSqliteSnapshot(snapshotName):
+        raise ValueError('A SQLite snapshot has its own indexes')
+
+    source = _sourceStats(snapshotName)
+    pairs = iterSnapshot(snapshotName)
+    if isBinarySnapshot(snapshotName):
+        spans = None
+    else:
+        spans = iterSnapshotSpans(snapshotName)
+        starts, lengths = array(str('d')), array(str('i'))
+
+    paths = []
+    words = {}
+    values = {}
+    skipped = set()
+
+    for row, (path, tags) in enumerate(pairs):
+        paths.append(path)
+        if spans is not None:
+            start, end = next(spans)
+            starts.append(start)
+            lengths.append(end - start)
+
+        for k, v in tags.items():
+            if v is None or k in skipped or k in Snapshot.complexTags:
+                continue
+
+            if k in sortedTags:
+                if not _canSort(k, v):
+                    skipped.add(k)
+                    values.pop(k, None)
+                    continue
+                values.setdefault(k, []).append((v, row))
+
+            if k in Snapshot.integerTags:
+                continue
+            if not isinstance(v, _text):
+                skipped.add(k)
+                words.pop(k, None)
+                values.pop(k, None)
+                continue
+
+            postings = words.setdefault(k, {})
+            for w in set(_words(v)):
+                postings.setdefault(w, array(str('i'))).append(row)
+
+    sections = {'paths': paths}
+    if spans is not None:
+        # doubles hold any offset up to 2**53 on every platform
+        sections['spans'] = (_toBytes(starts), _toBytes(lengths))
+    for k, postings in words.items():
+        sections['words:' + k] = dict(
+            (w, _toBytes(rows)) for w, rows in postings.items()
+        )
+    for k, entries in values.items():
+        sections['values:' + k] = _sortedValues(entries)
+
+    # Each section is read only when a query needs it
+    with io.open(indexFileName(snapshotName), 'wb') as f:
+        offsets = {}
+        for name, section in sections.items():
+            data = marshal.dumps(section, _MARSHAL_VERSION)
+            offsets[name] = (f.tell(), len(data))
+            f.write(data)
+
+        header = f.tell()
+        marshal.dump({
+            'version': _VERSION,
+            'source': source,
+            'count': len(paths),
+            'sections': offsets
+        }, f, _MARSHAL_VERSION)
+        f.write(_footer.pack(header, _MAGIC))
+
+    return len(paths)
+
+
+def loadIndex(snapshotName):
+    """Reads the index of a snapshot
+
+    Returns:
+        :class:`SnapshotIndex`, or ``None`` when there is no index or the
+        snapshot has changed since it was built
+    """
+    fileName = indexFileName(snapshotName)
+    if not os.path.exists(fileName):
+        return None
+
+    with io.open(fileName, 'rb') as f:
+        data = f.read()
+
+    if len(data) < _footer.size:
+        return None
+    header, magic = _footer.unpack(data[-_footer.size:])
+    if magic != _MAGIC:
+        return None
+
+    index = marshal.loads(data[header:-_footer.size])
+    if (index.get('version') != _VERSION or
+            index['source'] != _sourceStats(snapshotName)):
+        return None
+
+    return SnapshotIndex(snapshotName, data, index)
+
+# -----------------------------------------------------------------------------
+# Class
+
+
+class SnapshotIndex(object):
+    """The index of a snapshot, as written by :func:`buildIndex`
+
+    Files are numbered in the order they appear in the snapshot.  Use
+    :meth:`candidates` to find the numbers of the files that could meet some
+    conditions and :meth:`fetch` to read only those files.
+    """
+    def __init__(self, snapshotName, data, header):
+        self.snapshotName = snapshotName
+        self._data = data
+        self._count = header['count']
+        self._offsets = header['sections']
+        self._sections = {}
+
+    def __len__(self):
+        return self._count
+
+    def _section(self, name):
+        if name not in self._sections:
+            start, length = self._offsets[name]
+            self._sections[name] = marshal.loads(
+                self._data[start:start + length]
+            )
+        return self._sections[name]
+
+    def _wordRows(self, condition):
+        tag, comparison, value = condition
+        words = _words(value)
+        if not words:
+            return None
+
+        vocabulary = self._section('words:' + tag)
+        best = None
+        for w in set(words):
+            if comparison == COMPARISON.EQUAL:
+                postings = [vocabulary.get(w, b'')]
+            else:
+                # LIKE matches part of a word
+                postings = [b for k, b in vocabulary.items() if w in k]
+
+            # Any one word narrows the files down, so use the rarest one
+            size = sum(len(b) for b in postings)
+            if best is None or size < best[0]:
+                best = (size, postings)
+
+        rows = set()
+        for b in best[1]:
+            rows.update(_fromBytes('i', b))
+        return rows
+
+    def _valueRows(self, condition):
+        tag, comparison, value = condition
+        if tag in Snapshot.integerTags and isinstance(value, _text):
+            if not value.lstrip('-').isdigit():
+                return None
+            value = int(value)
+        if not _canSort(tag, value):
+            return None
+
+        values, rows = self._section('values:' + tag)
+        if comparison == COMPARISON.EQUAL:
+            lo, hi = bisect_left(values, value), bisect_right(values, value)
+        elif comparison == COMPARISON.GT:
+            lo, hi = bisect_right(values, value), len(values)
+        elif comparison == COMPARISON.GTE:
+            lo, hi = bisect_left(values, value), len(values)
+        elif comparison == COMPARISON.LT:
+            lo, hi = 0, bisect_left(values, value)
+        else:
+            lo, hi = 0, bisect_right(values, value)
+
+        # 4 bytes a row
+        return set(_fromBytes('i', rows[lo * 4:hi * 4]))
+
+    def _rows(self, condition):
+        tag, comparison, value = condition
+        if value is None or comparison == COMPARISON.NOT:
+            return None
+
+        if ('values:' + tag in self._offsets and
+                comparison != COMPARISON.LIKE):
+            return self._valueRows(condition)
+        if ('words:' + tag in self._offsets and isinstance(value, _text) and
+                comparison in (COMPARISON.EQUAL, COMPARISON.LIKE)):
+            return self._wordRows(condition)
+        return None
+
+    def candidates(self, conditions):
+        """The files that could meet every one of ``conditions``
+
+        The result can include files that do not meet them, e.g. a ``LIKE``
+        on two words that are not next to each other, so each file should
+        still be tested.
+
+        Args:
+            conditions (list[:class:`pyTagger.models.FilterCondition`]): The
+            conditions that must all be met
+
+        Returns:
+            set: The numbers of the files, or ``None`` when the index cannot
+            help with any of the conditions
+        """
+        result = None
+        for c in conditions:
+            rows = self._rows(c)
+            if rows is not None:
+                result = rows if result is None else result & rows
+        return result
+
+    def fetch(self, rows):
+        """Yields ``(path, tags)`` for each file number, in snapshot order"""
+        rows = sorted(rows)
+        paths = self._section('paths')
+        if 'spans' not in self._offsets:
+            with BinarySnapshot(self.snapshotName) as snapshot:
+                for row in rows:
+                    yield paths[row], snapshot[paths[row]]
+            return
+
+        starts, lengths = self._section('spans')
+        starts = _fromBytes('d', starts)
+        lengths = _fromBytes('i', lengths)
+        with io.open(self.snapshotName, 'rb') as f:
+            for row in rows:
+                f.seek(int(starts[row]))
+                data = f.read(lengths[row]).decode('utf-8')
+                yield paths[row], json.loads(data)
@@ -1,20 +1,31 @@
 from __future__ import unicode_literals
 import io
-from pyTagger.models import Snapshot
+import re
+import tempfile
+from pyTagger.models import ColumnarSnapshot, Snapshot
+from pyTagger.utils import readRun, writeBlock
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
 
-# yield from is only available <= Python 3.3
 SUBFIELD_SEP = '\u2027'
 
 
+_needDoubleQuotes = re.compile('[,"\r\n\t]')
+
+_BLOCK_SIZE = 1024
+"""The number of rows buffered before they are written"""
+
+
 def _encapsulate(field):
+    if not field:
+        return ''
     try:
-        if not field:
-            return ''
-        needDoubleQuotes = [',', '"', '\r', '\n', '\t']
-        addDoubleQuotes = any([x in field for x in needDoubleQuotes])
-        if addDoubleQuotes:
-            return '"' + field.replace('"', '""') + '"'
-        return field
+        if _needDoubleQuotes.search(field) is None:
+            return field
+        return '"' + field.replace('"', '""') + '"'
     except (TypeError, AttributeError):
         return str(field)
 
@@ -38,15 +49,40 @@ def flattenOne(row):
             yield (k, v)
 
 
+def _pairs(snapshot):
+    # a dict is written in path order, a stream in file order
+    if isinstance(snapshot, Mapping):
+        return sorted(snapshot.items())
+    return snapshot
+
+
 def flattenSnapshot(snapshot):
-    for _, row in snapshot.items():
+    pairs = snapshot.items() if isinstance(snapshot, Mapping) else snapshot
+    for _, row in pairs:
         for k, v in flattenOne(row):
             yield (k, v)
 
 
+def _flattenedHeader(snapshot):
+    if not isinstance(snapshot, ColumnarSnapshot):
+        return set(k for k, _ in flattenSnapshot(snapshot))
+
+    # Only the complex tags need to be read to find their sub-fields
+    header = set()
+    for k in snapshot.columns():
+        if k in Snapshot.complexTags:
+            for _, v in snapshot.column(k):
+                header.update(k0 for k0, _ in flattenOne({k: v}))
+        else:
+            header.add(k)
+    return header
+
+
 def listFlattenedColumns(snapshot):
-    header = set(k for k, _ in flattenSnapshot(snapshot))
+    return _orderColumns(_flattenedHeader(snapshot))
 
+
+def _orderColumns(header):
     # Build the ordered set with the extra columns at the end
     known = Snapshot.orderedAllColumns()
     unknown = header - set(known)
@@ -58,9 +94,51 @@ def listFlattenedColumns(snapshot):
     return columns
 
 
-def writeCsv(snapshot, outFileName, excelFormat=True):
-    columns = listFlattenedColumns(snapshot)
-    columns.append('fullPath')
+def _cells(fullPath, row):
+    cells = dict((k, _encapsulate(v)) for k, v in flattenOne(row))
+    cells['fullPath'] = _encapsulate(fullPath)
+    return cells
+
+
+def _spoolCells(pairs):
+    """Encapsulates every row into a temporary file, collecting the columns
+    on the way, so a stream is only read once
+    """
+    header = set()
+    f = tempfile.TemporaryFile()
+    block = []
+
+    for k, row in pairs:
+        cells = _cells(k, row)
+        header.update(cells)
+        block.append(cells)
+        if len(block) >= _BLOCK_SIZE:
+            writeBlock(f, block)
+            block = []
+
+    if block:
+        writeBlock(f, block)
+
+    header.discard('fullPath')
+    return _orderColumns(header), readRun(f)
+
+
+def writeCsv(snapshot, outFileName, excelFormat=True, columns=None):
+    """Writes a snapshot as a UTF-16 CSV file
+
+    ``snapshot`` can be a dict or an iterable of ``(path, tags)`` pairs, like
+    :func:`pyTagger.utils.iterSnapshot`, and is only read once.  When
+    ``columns`` are not provided for an iterable, the rows are held in a
+    temporary file until all of the columns are known.
+    """
+    if columns is not None:
+        rows = (_cells(k, row) for k, row in _pairs(snapshot))
+    elif isinstance(snapshot, Mapping):
+        columns = listFlattenedColumns(snapshot)
+        rows = (_cells(k, row) for k, row in _pairs(snapshot))
+    else:
+        columns, rows = _spoolCells(snapshot)
+    columns = columns + ['fullPath']
 
     # not using csv.DictWriter since the Python 2.x version has a hard time
     # supporting unicode
@@ -74,14 +152,15 @@ def writeCsv(snapshot, outFileName, excelFormat=True):
         a = sep.join([_encapsulate(col) for col in columns])
         f.writelines([a, '\n'])
 
-        # write the rows
-        for k in sorted(snapshot):
-            row = snapshot[k]
-            row['fullPath'] = k
-
-            flattened = dict(flattenOne(row))
-
-            a = sep.join([_encapsulate(flattened[col])
-                          if col in flattened else ''
-                          for col in columns])
-            f.writelines([a, '\n'])
+        # write the rows, a block at a time
+        lines = []
+        for cells in rows:
+            lines.append(sep.join([cells.get(col, '') for col in columns]))
+            if len(lines) >= _BLOCK_SIZE:
+                lines.append('')
+                f.write('\n'.join(lines))
+                lines = []
+
+        if lines:
+            lines.append('')
+            f.write('\n'.join(lines))
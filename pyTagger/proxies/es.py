@@ -1,10 +1,17 @@
 from __future__ import unicode_literals
 import logging
+from collections import deque
 from configargparse import getArgumentParser
-from elasticsearch import Elasticsearch, ConnectionError, RequestError
+from elasticsearch import Elasticsearch, ConnectionError, TransportError
+from elasticsearch.helpers import parallel_bulk
 from pyTagger.utils import loadJson, toAbsolute
 from pyTagger.utils import configurationOptions, defaultConfigFiles
 
+try:
+    from collections.abc import Iterator
+except ImportError:  # pragma: no cover
+    from collections import Iterator
+
 # -----------------------------------------------------------------------------
 # Configuration
 
@@ -24,6 +31,11 @@ group.add('--es-logging',
                    logging.ERROR],
           default=logging.WARNING, type=int,
           help='how verbose the Elasticsearch client should be')
+group.add('--es-batch-size', default=500, type=int,
+          help='the number of tracks sent in each bulk request or search')
+group.add('--es-threads', default=4, type=int,
+          help='the number of bulk requests or searches sent at the same '
+               'time')
 # -----------------------------------------------------------------------------
 # Class
 
@@ -35,6 +47,8 @@ class Client(object):
         self.host = options.es_host
         self.index = options.es_index
         self.doc_type = options.es_type
+        self.batchSize = options.es_batch_size
+        self.threads = options.es_threads
         self.es = Elasticsearch([self.host])
         self.log = logging.getLogger(__name__)
         self.log.setLevel(options.es_logging)
@@ -61,9 +75,45 @@ class Client(object):
         self.log.info("index '%s' created", self.index)
         return result['acknowledged']
 
+    def _refreshInterval(self):
+        settings = self.es.indices.get_settings(
+            index=self.index, name='index.refresh_interval'
+        )
+        settings = settings.get(self.index, {}).get('settings', {})
+        return settings.get('index', {}).get('refresh_interval', '1s')
+
+    def _setRefreshInterval(self, value):
+        self.es.indices.put_settings(
+            index=self.index, body={'index': {'refresh_interval': value}}
+        )
+
+    def _actions(self, pairs, paths):
+        for k, v in pairs:
+            v['path'] = k
+
+            # Fix dots in field names
+            if 'ufid' in v:
+                v['ufid'] = self._replaceDots(v['ufid'])
+
+            paths.append(k)
+            yield {'_op_type': 'create', '_source': v}
+
     def load(self, snapshot):
-        if not snapshot or not isinstance(snapshot, dict):
-            raise TypeError("'snapshot' must be dictionary")
+        """Adds the tracks in a snapshot to the index
+
+        The tracks are sent in batches through the bulk API, several batches
+        at a time, and the index is not refreshed until they have all been
+        sent.
+
+        Returns:
+            tuple: The number of tracks loaded and the number that failed
+        """
+        if isinstance(snapshot, dict) and snapshot:
+            pairs = snapshot.items()
+        elif isinstance(snapshot, Iterator):
+            pairs = snapshot
+        else:
+            raise TypeError("'snapshot' must be dictionary or iterator")
 
         success, error = 0, 0
 
@@ -71,26 +121,35 @@ class Client(object):
             if not self.exists() and not self.create():
                 raise Exception('Cannot create index')
 
-            for k, v in snapshot.items():
-                v['path'] = k
+            refresh = self._refreshInterval()
+            self._setRefreshInterval('-1')
+
+            # Results come back in the same order as the tracks were sent
+            paths = deque()
+            results = parallel_bulk(
+                self.es, self._actions(pairs, paths),
+                thread_count=self.threads, chunk_size=self.batchSize,
+                raise_on_error=False, raise_on_exception=False,
+                index=self.index, doc_type=self.doc_type
+            )
+
+            try:
+                for ok, item in results:
+                    k = paths.popleft()
+                    if ok:
+                        success += 1
+                    else:
+                        _, info = item.popitem()
+                        if isinstance(info.get('exception'), ConnectionError):
+                            raise info['exception']
+                        self.log.warning("'%s' could not be loaded %s",
+                                         k, info.get('error'))
+                        error += 1
 
-                # Fix dots in field names
-                if 'ufid' in v:
-                    v['ufid'] = self._replaceDots(v['ufid'])
-
-                try:
-                    self.es.create(
-                        index=self.index,
-                        doc_type=self.doc_type,
-                        body=v
-                    )
-                    success += 1
                     if (success + error) % 1000 == 0:
                         self.log.info("%d records loaded", success + error)
-
-                except RequestError as e:
-                    self.log.warning("'%s' could not be loaded %s", k, e)
-                    error += 1
+            finally:
+                self._setRefreshInterval(refresh)
 
         except ConnectionError:
             self.log.error('Cannot connect to Elasticsearch')
@@ -103,6 +162,28 @@ class Client(object):
             index=self.index, doc_type=self.doc_type, body=dsl
         )
 
+    def msearch(self, dsls):
+        """Runs several searches in one request
+
+        Returns:
+            list: The response to each search, in the same order
+        """
+        body = []
+        for dsl in dsls:
+            body.append({})
+            body.append(dsl)
+
+        result = self.es.msearch(
+            index=self.index, doc_type=self.doc_type, body=body
+        )
+
+        responses = result['responses']
+        for response in responses:
+            if 'error' in response:
+                raise TransportError(response.get('status', 500),
+                                     response['error'])
+        return responses
+
     def delete(self):
         result = self.es.indices.delete(index=self.index)
         self.log.info("index '%s' deleted", self.index)
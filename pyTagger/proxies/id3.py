@@ -1,13 +1,24 @@
 from __future__ import unicode_literals
 import binascii
 import logging
+import os
+import shutil
+import tempfile
 import eyed3
+import eyed3.id3
+import eyed3.id3.frames
+import eyed3.mp3
 from configargparse import getArgumentParser
 from hew import Normalizer
 from pyTagger.models import Snapshot
-from pyTagger.operations.hash import hashFile
+from pyTagger.operations.hash import DEFAULT_ALGORITHM, HashCache, tagSize
 from pyTagger.utils import configurationOptions, defaultConfigFiles
 
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
 import sys
 if sys.version < '3':  # pragma: no cover
     _unicode = unicode
@@ -27,6 +38,17 @@ group.add('--id3-logging',
                    logging.ERROR],
           default=logging.WARNING, type=int,
           help='how verbose the id3 client should be')
+group.add('--hash-cache',
+          help='a file that remembers file hashes between runs')
+group.add('--hash-cache-size', default=100000, type=int,
+          help='the most file hashes the cache will remember')
+group.add('--hash-cache-sample', action='store_true',
+          help='reuse a cached hash when only the tags moved, judged by a '
+          'sample of the audio rather than reading all of it')
+group.add('--hash-algorithm', default=DEFAULT_ALGORITHM,
+          help='the digest used for fileHash, e.g. sha1, blake2b or xxhash')
+group.add('--id3-padding', default=8, type=int,
+          help='the KB of padding to reserve when a tag outgrows its space')
 
 # -----------------------------------------------------------------------------
 # Read Methods
@@ -37,6 +59,11 @@ def _extractDate(date):
     return str(date) if date else ''
 
 
+def _extractGenre(track):
+    genre = track.tag.genre
+    return genre.name if genre else ''
+
+
 def _extractFileIds(track):
     # Python 2.6 does not like dictionary comprehensions
     ids = {}
@@ -182,10 +209,184 @@ def _compliance(track, upgrade=False):
 
     return version
 
+
+def _needsCompliance(track, upgrade=False):
+    """``True`` when :func:`_compliance` would change the tag"""
+    version = track.tag.version
+    if version[1] == 2 or (upgrade and version[1] < 3):
+        return True
+
+    if 'MJMD' in track.tag.frame_set:
+        return True
+
+    return version[1] == 3 and bool(track.tag.getTextFrame('TMOO'))
+
+# -----------------------------------------------------------------------------
+# Save Methods
+# -----------------------------------------------------------------------------
+
+
+def _renderTag(track, version, reserve):
+    """Renders a v2 tag the way eyed3 saves it, except that a tag that no
+    longer fits in its old space is given ``reserve`` bytes of padding instead
+    of eyed3's 1KB.  A tag that still fits keeps the padding that is left
+
+    The size of the old tag is read from the file rather than trusted from
+    when the track was loaded, so a tag changed since then is not overwritten
+    by one that no longer fits.
+
+    Returns:
+        tuple: ``True`` when the whole file has to be copied, the size of the
+        old tag, and the rendered tag and its padding
+    """
+    tag = track.tag
+    tag.version = version
+    encoding = eyed3.id3.frames.stringToEncoding('utf8')
+    for frame in tag.frame_set.getAllFrames():
+        frame.encoding = encoding
+
+    # tagSize does not count the 10 byte header, eyed3's tag_size does
+    size = tagSize(tag.file_info.name)
+    current = size + 10 if size else 0
+
+    # Tag._render is private to eyed3.  Its arguments and result are those of
+    # 0.7.10, the version pinned in requirements.txt
+    rewrite, data, padding = tag._render(version, current, None)
+    if rewrite:
+        # Pretend the old tag had room for the padding that is wanted
+        _, data, padding = tag._render(version, len(data) + reserve, None)
+    return rewrite, current, data, padding
+
+
+def _replace(source, destination):
+    try:
+        os.replace(source, destination)
+    except AttributeError:  # pragma: no cover
+        os.remove(destination)
+        os.rename(source, destination)
+
+
+def _copyWithTag(fileName, offset, tagData):
+    """Writes ``tagData`` followed by the audio after ``offset`` to a
+    temporary file beside ``fileName``, then moves it over the original"""
+    fd, tempName = tempfile.mkstemp(dir=os.path.dirname(fileName) or None)
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            output.write(tagData)
+            with open(fileName, 'rb') as source:
+                source.seek(offset)
+                shutil.copyfileobj(source, output, 1 << 20)
+        shutil.copymode(fileName, tempName)
+        _replace(tempName, fileName)
+    except Exception:
+        if os.path.exists(tempName):
+            os.remove(tempName)
+        raise
+
 # -----------------------------------------------------------------------------
 # Classes
 # -----------------------------------------------------------------------------
 
+_audioColumns = ['bitRate', 'length', 'vbr']
+"""Columns that can only be read by decoding the MPEG frames"""
+
+
+class TagOnlyAudioFile(eyed3.mp3.Mp3AudioFile):
+    """A version of :class:`eyed3.mp3.Mp3AudioFile` that only reads the ID3
+    tag.  The MPEG frames are never scanned, so ``info`` is always ``None``
+    """
+    def _read(self):
+        with open(self.path, 'rb') as fileObj:
+            self._tag = eyed3.id3.Tag()
+            if not self._tag.parse(fileObj, self._tag_version):
+                self._tag = None
+
+        self._info = None
+        self.type = eyed3.core.AUDIO_MP3
+
+
+_textFrameColumns = dict(
+    (k, v) for k, v in _useSetTextFrame.items() if k != 'genre'
+)
+"""Columns that are the text of a single frame"""
+
+_numberColumns = {
+    'disc': ('disc_num', 0),
+    'totalDisc': ('disc_num', 1),
+    'track': ('track_num', 0),
+    'totalTrack': ('track_num', 1)
+}
+"""Columns that are one half of a ``n/total`` frame"""
+
+
+class ProjectionPlan(object):
+    """Turns a track into a row of ``columns``
+
+    The plan is built once and reused for every track.  Text frames are read
+    straight from ``frame_set`` and the disc and track numbers are only
+    parsed once each, no matter how many of their columns are requested.
+    """
+    def __init__(self, columns, projection):
+        self.columns = list(columns)
+        self.textFrames = []
+        self.numbers = []
+        self.computed = []
+
+        numbers = {}
+        for k in self.columns:
+            if k in _textFrameColumns:
+                self.textFrames.append((k, _textFrameColumns[k]))
+            elif k in _numberColumns:
+                attr, i = _numberColumns[k]
+                if attr not in numbers:
+                    numbers[attr] = []
+                    self.numbers.append((attr, numbers[attr]))
+                numbers[attr].append((k, i))
+            else:
+                self.computed.append((k, projection[k]))
+
+    def __call__(self, track):
+        row = {}
+
+        frames = track.tag.frame_set
+        for k, fid in self.textFrames:
+            f = frames.get(fid)
+            row[k] = f[0].text if f else None
+
+        for attr, columns in self.numbers:
+            value = getattr(track.tag, attr)
+            for k, i in columns:
+                row[k] = value[i]
+
+        for k, fn in self.computed:
+            row[k] = fn(track)
+
+        return row
+
+
+class LazyRow(Mapping):
+    """A read-only row that only extracts a column from the track the first
+    time it is accessed.  Use ``dict(row)`` to materialize all of it
+    """
+    def __init__(self, track, columns, projection):
+        self._track = track
+        self._columns = columns
+        self._projection = projection
+        self._values = {}
+
+    def __getitem__(self, k):
+        if k not in self._values:
+            if k not in self._columns:
+                raise KeyError(k)
+            self._values[k] = self._projection[k](self._track)
+        return self._values[k]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
 
 class ID3Proxy(object):
     _projection = {
@@ -206,7 +407,7 @@ class ID3Proxy(object):
         'disc': lambda x: x.tag.disc_num[0],
         'encodingDate': lambda x: _extractDate(x.tag.encoding_date),
         'fileHash': lambda x: '',
-        'genre': lambda x: x.tag.genre.name if x.tag.genre else '',
+        'genre': _extractGenre,
         'group': lambda x: x.tag.getTextFrame('TIT1'),
         'id': _extractTaggerId,
         'key': lambda x: x.tag.getTextFrame('TKEY'),
@@ -241,6 +442,13 @@ class ID3Proxy(object):
         options = configurationOptions('id3')
 
         self.fieldSet = self.columns if fieldSet is None else fieldSet
+        self.tagOnly = not any(x in self.fieldSet for x in _audioColumns)
+        self.plan = ProjectionPlan(self.fieldSet, self._projection)
+        self.hashCache = HashCache(options.hash_cache,
+                                   options.hash_cache_size,
+                                   options.hash_algorithm,
+                                   options.hash_cache_sample)
+        self.padding = options.id3_padding * 1024
         self.normalize = Normalizer().to_ascii
         self.log = logging.getLogger(__name__)
         self.log.setLevel(options.id3_logging)
@@ -252,7 +460,7 @@ class ID3Proxy(object):
         offset = (track.tag.header.tag_size
                   if track.tag and track.tag.header
                   else 0)
-        return hashFile(mp3FileName, offset)
+        return self.hashCache.hashFile(mp3FileName, offset)
 
     def extractImages(self, track):
         if track and track.tag and track.tag.images:
@@ -260,7 +468,7 @@ class ID3Proxy(object):
                 yield image.image_data, image.mime_type.split("/")[1]
 
     def extractTags(self, mp3FileName):
-        track = self.loadID3(mp3FileName)
+        track = self.loadID3(mp3FileName, self.tagOnly)
         if not track:
             return None
         a = self.extractTagsFromTrack(track)
@@ -268,25 +476,84 @@ class ID3Proxy(object):
             a['fileHash'] = self._calculateHash(track, mp3FileName)
         return a
 
-    def extractTagsFromTrack(self, obj):
+    def extractTagsFromTrack(self, obj, lazy=False):
         if isinstance(obj, eyed3.mp3.Mp3AudioFile) and obj.tag:
-            # Python 2.6 does not like dictionary comprehensions
-            row = {}
-            for k in self.fieldSet:
-                row[k] = self._projection[k](obj)
-            return row
+            if lazy:
+                return LazyRow(obj, self.plan.columns, self._projection)
+            return self.plan(obj)
         return {}
 
-    def loadID3(self, mp3FileName):
+    def loadID3(self, mp3FileName, tagOnly=False):
         self.log.info("Reading %s", self.normalize(mp3FileName))
         try:
+            if tagOnly:
+                return TagOnlyAudioFile(mp3FileName)
             return eyed3.load(mp3FileName)
         except (IOError, ValueError):
             self.log.error("Cannot load ID3 '%s'", self.normalize(mp3FileName))
             return None
 
     def saveID3(self, track, tags, upgrade=False):
-        self.log.info("Writing %s", self.normalize(track.tag.file_info.name))
+        """Writes the tags to the file
+
+        The new tag is written over the old one when it fits in the old tag
+        and its padding.  Otherwise the whole file is copied, and the tag is
+        given ``--id3-padding`` KB of padding so later edits fit in place.
+
+        Returns:
+            bool: ``True`` when the whole file was copied
+
+        Raises:
+            IOError: The file no longer exists
+        """
+        fileName = track.tag.file_info.name
+        if not os.path.exists(fileName):
+            raise IOError("'{0}' no longer exists".format(fileName))
+
+        self.log.info("Writing %s", self.normalize(fileName))
+        _update(track, tags)
+        version = _compliance(track, upgrade)
+        if version[0] == 1:
+            track.tag.save(version=version, encoding='utf8')
+            return False
+
+        rewrite, current, data, padding = _renderTag(track, version,
+                                                     self.padding)
+        if rewrite:
+            self.log.info("Copying %s to make room for the tag",
+                          self.normalize(fileName))
+            _copyWithTag(fileName, current, data + padding)
+        else:
+            with open(fileName, 'r+b') as f:
+                f.write(data + padding)
+
+        track.tag.file_info.tag_size = len(data) + len(padding)
+        track.tag.file_info.initStatTimes()
+        return rewrite
+
+    def needsSave(self, track, tags, upgrade=False):
+        """``True`` when :meth:`saveID3` would change the file"""
+        return bool(tags) or _needsCompliance(track, upgrade)
+
+    def projectSave(self, track, tags, upgrade=False):
+        """Works out what :meth:`saveID3` would write
+
+        The tag is rendered in memory, so the track should not be saved
+        afterwards.
+
+        Returns:
+            tuple: The number of bytes written, and ``True`` when the new tag
+            does not fit in the space of the old one so the whole file would
+            be copied
+        """
         _update(track, tags)
         version = _compliance(track, upgrade)
-        track.tag.save(version=version, encoding='utf8')
+        if version[0] == 1:
+            return 128, False
+
+        rewrite, current, data, padding = _renderTag(track, version,
+                                                     self.padding)
+        size = len(data) + len(padding)
+        if rewrite:
+            size += os.path.getsize(track.tag.file_info.name) - current
+        return size, rewrite
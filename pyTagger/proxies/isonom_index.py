@@ -0,0 +1,372 @@
+from __future__ import unicode_literals
+import heapq
+import io
+import logging
+import marshal
+import math
+import os
+import re
+from array import array
+from hew import Normalizer
+
+try:
+    from collections.abc import Iterator
+except ImportError:  # pragma: no cover
+    from collections import Iterator
+
+fields = ['album', 'artist', 'title']
+"""Tags that can be searched with a ``match`` query"""
+
+_VERSION = 1
+_MARSHAL_VERSION = 2
+
+# The stop words of the Elasticsearch ``stop`` filter
+_stopWords = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in',
+    'into', 'is', 'it', 'no', 'not', 'of', 'on', 'or', 'such', 'that', 'the',
+    'their', 'then', 'there', 'these', 'they', 'this', 'to', 'was', 'will',
+    'with'
+])
+_mapping = re.compile(r'[&+]')
+_possessive = re.compile(r"'s\b", re.IGNORECASE)
+_wordParts = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+# BM25 parameters
+_k1 = 1.2
+_b = 0.75
+
+_normalizer = Normalizer()
+
+try:
+    _text = unicode
+except NameError:  # pragma: no cover
+    _text = str
+
+
+def _toBytes(a):
+    return a.tobytes() if hasattr(a, 'tobytes') else a.tostring()
+
+
+def _fromBytes(typecode, b):
+    a = array(str(typecode))
+    if hasattr(a, 'frombytes'):
+        a.frombytes(b)
+    else:  # pragma: no cover
+        a.fromstring(b)
+    return a
+
+
+def tokenize(value):
+    """Splits a tag into the terms that the ``normalized`` analyzer in
+    ``es-index-library.json`` would produce
+
+    Returns:
+        list: The unique terms, in the order they first appear
+    """
+    if not value:
+        return []
+
+    value = _normalizer.to_ascii(_mapping.sub(' and ', _text(value)))
+    value = _possessive.sub('', value)
+
+    result = []
+    for term in _wordParts.findall(value):
+        term = term.lower()
+        if term not in _stopWords and term not in result:
+            result.append(term)
+    return result
+
+
+def _asTrack(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# -----------------------------------------------------------------------------
+# Class
+
+
+class IsonomIndex(object):
+    """An in-memory stand-in for :class:`pyTagger.proxies.es.Client` that
+    answers the queries built by
+    :func:`pyTagger.operations.find_duplicates.findIsonoms`
+
+    Each of the :data:`fields` has an inverted index of its terms, and tracks
+    are scored with BM25.  The ``track`` term counts as a match on a term of
+    its own, ``must_not`` excludes tracks and ``min_score`` drops the weak
+    matches, as they do in Elasticsearch.
+
+    The index is kept in ``fileName`` between runs.
+    """
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.log = logging.getLogger(__name__)
+        # Searches are answered in this process, so there is nothing to batch
+        self.batchSize = 0
+        self.threads = 1
+        self._clear()
+        self._loaded = False
+
+    def _clear(self):
+        self._docs = []
+        self._postings = dict((f, {}) for f in fields)
+        self._lengths = dict((f, array(str('H'))) for f in fields)
+        self._tracks = {}
+        self._weights = {}
+
+    def _ensureLoaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.fileName):
+            return
+
+        with io.open(self.fileName, 'rb') as f:
+            data = marshal.loads(f.read())
+
+        if data.get('version') != _VERSION:
+            raise ValueError(
+                "'{0}' was written by a different version".format(
+                    self.fileName
+                ))
+
+        self._docs = data['docs']
+        self._postings = data['postings']
+        self._lengths = dict(
+            (k, _fromBytes('H', v)) for k, v in data['lengths'].items()
+        )
+        self._tracks = data['tracks']
+        self._weights = {}
+
+    def _save(self):
+        def packed(postings):
+            return dict(
+                (k, v if isinstance(v, bytes) else _toBytes(v))
+                for k, v in postings.items()
+            )
+
+        data = {
+            'version': _VERSION,
+            'docs': self._docs,
+            'postings': dict(
+                (f, packed(p)) for f, p in self._postings.items()
+            ),
+            'lengths': dict(
+                (f, _toBytes(a)) for f, a in self._lengths.items()
+            ),
+            'tracks': packed(self._tracks)
+        }
+        with io.open(self.fileName, 'wb') as f:
+            marshal.dump(data, f, _MARSHAL_VERSION)
+
+    def _rows(self, postings, key):
+        rows = postings.get(key)
+        if isinstance(rows, bytes):
+            rows = postings[key] = _fromBytes('i', rows)
+        return rows or ()
+
+    def _add(self, doc):
+        row = len(self._docs)
+        self._docs.append(doc)
+        self._weights = {}
+
+        for f in fields:
+            terms = tokenize(doc.get(f))
+            self._lengths[f].append(min(len(terms), 0xffff))
+            postings = self._postings[f]
+            for term in terms:
+                rows = self._rows(postings, term)
+                if not rows:
+                    rows = postings[term] = array(str('i'))
+                rows.append(row)
+
+        track = _asTrack(doc.get('track'))
+        if track is not None:
+            rows = self._rows(self._tracks, track)
+            if not rows:
+                rows = self._tracks[track] = array(str('i'))
+            rows.append(row)
+
+    # -------------------------------------------------------------------------
+    # The same methods as the Elasticsearch client
+
+    def exists(self):
+        return os.path.exists(self.fileName)
+
+    def create(self):
+        self._clear()
+        self._loaded = True
+        self._save()
+        return True
+
+    def load(self, snapshot):
+        """Adds the tracks in a snapshot to the index and saves it
+
+        Returns:
+            tuple: The number of tracks loaded and the number that failed
+        """
+        if isinstance(snapshot, dict) and snapshot:
+            pairs = snapshot.items()
+        elif isinstance(snapshot, Iterator):
+            pairs = snapshot
+        else:
+            raise TypeError("'snapshot' must be dictionary or iterator")
+
+        self._ensureLoaded()
+
+        success, error = 0, 0
+        for k, v in pairs:
+            if not isinstance(v, dict):
+                self.log.warning("'%s' could not be loaded", k)
+                error += 1
+                continue
+
+            doc = dict(v)
+            doc['path'] = k
+            self._add(doc)
+            success += 1
+            if success % 1000 == 0:
+                self.log.info("%d records loaded", success)
+
+        self._save()
+        return (success, error)
+
+    def delete(self):
+        if os.path.exists(self.fileName):
+            os.remove(self.fileName)
+        self._clear()
+        self._loaded = True
+        return True
+
+    def _idf(self, df):
+        n = len(self._docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _fieldWeights(self, field):
+        # The part of the BM25 score that depends on the length of the tag
+        if field not in self._weights:
+            lengths = self._lengths[field]
+            documents = sum(1 for x in lengths if x)
+            average = float(sum(lengths)) / documents if documents else 1.0
+            self._weights[field] = array(str('d'), [
+                (_k1 + 1) / (1 + _k1 * (1 - _b + _b * x / average))
+                for x in lengths
+            ])
+        return self._weights[field]
+
+    def _scoreMatches(self, scores, matches):
+        for (field, terms), (anyCount, allCount) in matches.items():
+            weights = self._fieldWeights(field)
+            postings = [self._rows(self._postings[field], t) for t in terms]
+            idfs = [self._idf(len(rows)) for rows in postings]
+
+            if len(terms) == 1:
+                anyCount += allCount
+                allCount = 0
+
+            get = scores.get
+            if anyCount:
+                for rows, idf in zip(postings, idfs):
+                    idf *= anyCount
+                    for row in rows:
+                        scores[row] = get(row, 0.0) + idf * weights[row]
+
+            if allCount:
+                common = set(postings[0])
+                for rows in postings[1:]:
+                    common.intersection_update(rows)
+                total = sum(idfs) * allCount
+                for row in common:
+                    scores[row] = get(row, 0.0) + total * weights[row]
+
+    def _scoreTerm(self, scores, field, value):
+        if field != 'track':
+            raise ValueError(
+                "'term' is only supported on 'track', not '{0}'".format(field)
+            )
+        rows = self._rows(self._tracks, _asTrack(value))
+        # Numbers have no length, so a match is worth the idf alone
+        idf = self._idf(len(rows))
+        for row in rows:
+            scores[row] = scores.get(row, 0.0) + idf
+
+    def _excluded(self, clauses):
+        if isinstance(clauses, dict):
+            clauses = [clauses]
+
+        excluded = []
+        for clause in clauses:
+            (kind, body), = clause.items()
+            if kind != 'term':
+                raise ValueError(
+                    "'{0}' is not supported in 'must_not'".format(kind)
+                )
+            (field, value), = body.items()
+            excluded.append((field, value))
+        return excluded
+
+    def search(self, dsl):
+        """Answers a ``bool`` query of ``should`` clauses
+
+        Returns:
+            dict: The same ``hits`` that Elasticsearch would send back
+        """
+        self._ensureLoaded()
+
+        query = dsl.get('query', {}).get('bool', {})
+        should = query.get('should', [])
+        if isinstance(should, dict):
+            should = [should]
+        excluded = self._excluded(query.get('must_not', []))
+
+        scores = {}
+        # The same words are often matched with both operators, so each
+        # set of words is looked up once and counted for every clause
+        matches = {}
+        for clause in should:
+            (kind, body), = clause.items()
+            (field, options), = body.items()
+            if kind == 'match' and field in fields:
+                if not isinstance(options, dict):
+                    options = {'query': options}
+                terms = tuple(tokenize(options.get('query')))
+                if terms:
+                    operators = matches.setdefault((field, terms), [0, 0])
+                    if options.get('operator', 'or').lower() == 'and':
+                        operators[1] += 1
+                    else:
+                        operators[0] += 1
+            elif kind == 'term':
+                self._scoreTerm(scores, field, options)
+            else:
+                raise ValueError(
+                    "'{0}' on '{1}' is not supported".format(kind, field)
+                )
+        self._scoreMatches(scores, matches)
+
+        minScore = float(dsl.get('min_score') or 0)
+        matches = [
+            (score, row) for row, score in scores.items()
+            if score >= minScore and not any(
+                self._docs[row].get(f) == v for f, v in excluded
+            )
+        ]
+
+        start = dsl.get('from', 0)
+        size = dsl.get('size', 10)
+        # Ties go to the track that was loaded first
+        best = heapq.nlargest(start + size, matches,
+                              key=lambda x: (x[0], -x[1]))
+
+        return {'hits': {
+            'total': len(matches),
+            'max_score': best[0][0] if best else None,
+            'hits': [{
+                '_score': score,
+                '_source': dict(self._docs[row])
+            } for score, row in best[start:]]
+        }}
+
+    def msearch(self, dsls):
+        return [self.search(dsl) for dsl in dsls]
@@ -0,0 +1,270 @@
+from __future__ import unicode_literals
+import json
+import sqlite3
+from itertools import count
+from pyTagger.models import COMPARISON, Snapshot
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # pragma: no cover
+    from collections import MutableMapping
+
+try:
+    _text = (str, unicode)
+except NameError:  # pragma: no cover
+    _text = (str,)
+
+indexedColumns = Snapshot.basic + ['id', 'fileHash']
+"""Tags that are stored in their own, indexed, column"""
+
+_comparisonSql = {
+    COMPARISON.EQUAL: 'IS',
+    COMPARISON.NOT: 'IS NOT',
+    COMPARISON.GT: '>',
+    COMPARISON.GTE: '>=',
+    COMPARISON.LT: '<',
+    COMPARISON.LTE: '<=',
+    COMPARISON.LIKE: 'LIKE'
+}
+
+
+def _quote(column):
+    return '"{0}"'.format(column)
+
+
+def _likePattern(value):
+    escaped = (value.replace('\\', '\\\\')
+                    .replace('%', '\\%')
+                    .replace('_', '\\_'))
+    return '%' + escaped + '%'
+
+
+def _isAscii(value):
+    return all(ord(c) < 128 for c in value)
+
+
+def _indexedValue(tags, column):
+    value = tags.get(column)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+# -----------------------------------------------------------------------------
+# Class
+
+
+class SnapshotStore(MutableMapping):
+    """A snapshot kept in a SQLite database
+
+    There is one row per path.  The tags in :data:`indexedColumns` are copied
+    into their own indexed columns, and the complete set of tags is kept as a
+    JSON blob, so reading a row returns exactly what was written.
+
+    The store acts like a snapshot ``dict`` that is updated in place.  Use
+    :meth:`saveIncremental` to write many rows in batched transactions.
+    """
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.db = sqlite3.connect(fileName)
+        # Batches are committed often, so avoid waiting on the disk each time
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self._createSchema()
+
+    def _createSchema(self):
+        columns = ''.join(', {0}'.format(_quote(c)) for c in indexedColumns)
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS snapshot ('
+                'path TEXT PRIMARY KEY{0}, tags TEXT NOT NULL)'.format(columns)
+            )
+            for c in indexedColumns:
+                self.db.execute(
+                    'CREATE INDEX IF NOT EXISTS "snapshot_{0}" '
+                    'ON snapshot({1})'.format(c, _quote(c))
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    # -------------------------------------------------------------------------
+    # Mapping
+
+    def __getitem__(self, path):
+        row = self.db.execute(
+            'SELECT tags FROM snapshot WHERE path = ?', (path,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return json.loads(row[0])
+
+    def __setitem__(self, path, tags):
+        with self.db:
+            self._upsert([(path, tags)])
+
+    def __delitem__(self, path):
+        with self.db:
+            deleted = self.db.execute(
+                'DELETE FROM snapshot WHERE path = ?', (path,)
+            ).rowcount
+        if not deleted:
+            raise KeyError(path)
+
+    def __contains__(self, path):
+        return self.db.execute(
+            'SELECT 1 FROM snapshot WHERE path = ?', (path,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        for row in self.db.execute('SELECT path FROM snapshot ORDER BY path'):
+            yield row[0]
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM snapshot').fetchone()[0]
+
+    def iterPairs(self):
+        """Yields every ``(path, tags)`` pair in path order"""
+        return self._pairs('SELECT path, tags FROM snapshot ORDER BY path')
+
+    def _pairs(self, sql, parameters=()):
+        for path, tags in self.db.execute(sql, parameters):
+            yield path, json.loads(tags)
+
+    # -------------------------------------------------------------------------
+    # Writing
+
+    def _upsert(self, pairs):
+        placeholders = ', '.join(['?'] * (len(indexedColumns) + 2))
+        sql = 'INSERT OR REPLACE INTO snapshot VALUES ({0})'.format(
+            placeholders
+        )
+        self.db.executemany(sql, [
+            [path] +
+            [_indexedValue(tags, c) for c in indexedColumns] +
+            [json.dumps(tags, separators=(',', ':'))]
+            for path, tags in pairs
+        ])
+
+    def saveIncremental(self, escaped=False, batchSize=5000, replace=True):
+        """Writes pairs into the store, one at a time
+
+        This follows the same protocol as
+        :func:`pyTagger.utils.saveJsonIncrementalDict`.  Rows are committed in
+        transactions of ``batchSize``.
+
+        Args:
+            escaped (bool): ``True`` if the paths have their backslashes
+            escaped, as they are for
+            :func:`pyTagger.utils.saveJsonIncrementalDict`
+
+            batchSize (int): The number of rows in a transaction
+
+            replace (bool): ``True`` if the existing rows should be removed,
+            like overwriting a file.  Otherwise the rows are added to the
+            store, replacing any with the same path
+
+        Yields:
+            int: The current number of rows processed
+        """
+        batch = []
+
+        def flush():
+            with self.db:
+                self._upsert(batch)
+            del batch[:]
+
+        # committed along with the first batch
+        if replace:
+            self.db.execute('DELETE FROM snapshot')
+
+        try:
+            for i in count():  # pragma: no branch
+                key, value = yield i
+                if escaped:
+                    key = key.replace('\\\\', '\\')
+
+                batch.append((key, value))
+                if len(batch) >= batchSize:
+                    flush()
+        finally:
+            flush()
+
+    # -------------------------------------------------------------------------
+    # Queries
+
+    def findBy(self, column, value):
+        """Yields the ``(path, tags)`` pairs where ``column`` is ``value``
+
+        Args:
+            column (str): One of :data:`indexedColumns`
+        """
+        if column not in indexedColumns:
+            raise ValueError("'{0}' is not indexed".format(column))
+
+        sql = 'SELECT path, tags FROM snapshot WHERE {0} IS ?'.format(
+            _quote(column)
+        )
+        return self._pairs(sql, (value,))
+
+    def select(self, conditions):
+        """Yields the ``(path, tags)`` pairs that might meet ``conditions``
+
+        The conditions on :data:`indexedColumns` are run as SQL, so they can
+        use the indexes.  The other conditions are ignored, and SQLite only
+        folds the case of ASCII text for ``LIKE``, so the caller should still
+        test every condition against the rows that are returned.
+
+        Args:
+            conditions (list[:class:`pyTagger.models.FilterCondition`]): The
+            conditions that must all be met
+        """
+        clauses, parameters = [], []
+        for c in conditions:
+            if c.field not in indexedColumns:
+                continue
+
+            value = c.value
+            if value is None and c.comparison not in (COMPARISON.EQUAL,
+                                                      COMPARISON.NOT):
+                continue
+            if c.comparison == COMPARISON.LIKE:
+                # Numbers are matched as text by the caller
+                if not isinstance(value, _text) or not value or \
+                        not _isAscii(value):
+                    continue
+                value = _likePattern(value)
+
+            clause = '{0} {1} ?'.format(_quote(c.field),
+                                        _comparisonSql[c.comparison])
+            if c.comparison == COMPARISON.LIKE:
+                clause += " ESCAPE '\\'"
+            clauses.append(clause)
+            parameters.append(value)
+
+        sql = 'SELECT path, tags FROM snapshot'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return self._pairs(sql + ' ORDER BY path', parameters)
+
+    def duplicates(self, column='fileHash'):
+        """Yields ``(value, path)`` for every path that shares the value of
+        ``column`` with another path.  Empty values are skipped
+        """
+        if column not in indexedColumns:
+            raise ValueError("'{0}' is not indexed".format(column))
+
+        c = _quote(column)
+        sql = (
+            'SELECT {0}, path FROM snapshot WHERE {0} IN ('
+            'SELECT {0} FROM snapshot WHERE {0} IS NOT NULL AND {0} != \'\' '
+            'GROUP BY {0} HAVING COUNT(*) > 1'
+            ') ORDER BY {0}, path'
+        ).format(c)
+        for row in self.db.execute(sql):
+            yield row[0], row[1]
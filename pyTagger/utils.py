@@ -1,13 +1,23 @@
 from __future__ import unicode_literals
 import binascii
+import heapq
 import io
 import json
+import marshal
+import multiprocessing
 import os
+import struct
 import sys
+import tempfile
 import uuid
 from configargparse import getArgumentParser
 from itertools import count
 
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
 if sys.version < '3':  # pragma: no cover
     _unicode = unicode
 else:  # pragma: no cover
@@ -65,9 +75,18 @@ def loadJson(fileName):
     Args:
         fileName (str): The absolute path to a JSON file
 
+    Snapshots with the :data:`BINARY_SNAPSHOT_EXTENSION` or the
+    :data:`SQLITE_SNAPSHOT_EXTENSION` are read from those formats instead
+
     Returns:
         A fully-loaded, deserialized version of the JSON file
     """
+    if isBinarySnapshot(fileName):
+        return loadBinarySnapshot(fileName)
+    if isSqliteSnapshot(fileName):
+        with openSnapshotStore(fileName) as store:
+            return dict(store.iterPairs())
+
     with io.open(fileName, 'r', encoding='utf-8', newline='') as f:
         return json.load(f)
 
@@ -86,7 +105,17 @@ def saveJson(fileName, o):
       2. Ensure the string is Unicode
       3. Write out to the filename using UTF-8 encoding
 
+    A snapshot ``dict`` is written with :func:`saveJsonIncrementalDict` if
+    the filename is for the binary or SQLite formats
     """
+    if isBinarySnapshot(fileName) or isSqliteSnapshot(fileName):
+        output = saveJsonIncrementalDict(fileName)
+        next(output)
+        for k, v in o.items():
+            output.send((k.replace('\\', '\\\\'), v))
+        output.close()
+        return
+
     with io.open(fileName, 'w', encoding='utf-8', newline='') as f:
         f.write(_unicode(json.dumps(o, ensure_ascii=False)))
 
@@ -159,7 +188,19 @@ def saveJsonIncrementalDict(fileName, compact=False):
 
        output.close()
 
+    Keys are expected to have their backslashes escaped.  If the filename has
+    the :data:`BINARY_SNAPSHOT_EXTENSION` the binary format is written
+    instead, and the :data:`SQLITE_SNAPSHOT_EXTENSION` replaces the contents
+    of a :class:`pyTagger.proxies.sqlite.SnapshotStore`
     """
+    if isBinarySnapshot(fileName):
+        return saveBinarySnapshotIncremental(fileName, escaped=True)
+    if isSqliteSnapshot(fileName):
+        return _saveSqliteIncrementalDict(fileName)
+    return _saveJsonIncrementalDict(fileName, compact)
+
+
+def _saveJsonIncrementalDict(fileName, compact):
     sep = '\n'
     indent = None if compact else 2
 
@@ -180,6 +221,433 @@ def saveJsonIncrementalDict(fileName, compact=False):
         finally:
             f.write('\n}')
 
+
+class _JsonStream(object):
+    """Decodes JSON values one at a time from a text file"""
+    whitespace = ' \t\r\n'
+    delimiters = whitespace + ',:]}'
+
+    def __init__(self, f, chunkSize):
+        self.f = f
+        self.chunkSize = chunkSize
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0
+        self.atEnd = False
+
+    def _read(self):
+        chunk = self.f.read(self.chunkSize)
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.atEnd = not chunk
+
+    def tell(self):
+        """The number of characters read from the file so far"""
+        return self.offset + self.pos
+
+    def peek(self):
+        """Returns the next character that is not whitespace, or '' at EOF"""
+        while True:
+            while (self.pos < len(self.buf) and
+                   self.buf[self.pos] in self.whitespace):
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.atEnd:
+                return ''
+            self._read()
+
+    def expect(self, c):
+        if self.peek() != c:
+            raise ValueError('Expecting {0} at character {1}'.format(
+                c, self.pos))
+        self.pos += 1
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number could continue in the next chunk
+                if self.atEnd or (end < len(self.buf) and
+                                  self.buf[end] in self.delimiters):
+                    break
+            except ValueError:
+                if self.atEnd:
+                    raise
+            self._read()
+
+        self.pos = end
+        if self.pos > self.chunkSize:
+            self.offset += self.pos
+            self.buf, self.pos = self.buf[self.pos:], 0
+        return value
+
+
+def _iterPairs(f, chunkSize):
+    with f:
+        stream = _JsonStream(f, chunkSize)
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+
+        while True:
+            key = stream.decode()
+            stream.expect(':')
+            yield key, stream.decode()
+
+            if stream.peek() == '}':
+                return
+            stream.expect(',')
+
+
+def iterSnapshot(fileName, chunkSize=65536):
+    """Reads a snapshot one file at a time, instead of loading all of it
+
+    Any JSON object can be read, but it is intended for the files written by
+    :func:`saveJsonIncrementalDict`.  Only the pair being decoded is kept in
+    memory.  The file is opened right away, so a missing file raises an
+    ``IOError`` before anything is iterated.
+
+    Args:
+        fileName (str): The absolute path to a JSON snapshot
+
+        chunkSize (int): The number of characters read at a time
+
+    Returns:
+        An iterator of ``(path, tags)`` in the order they appear in the file.
+        It raises ``ValueError`` if the file is not a JSON object
+    """
+    if isBinarySnapshot(fileName):
+        return iterBinarySnapshot(fileName)
+    if isSqliteSnapshot(fileName):
+        return _iterSqliteSnapshot(openSnapshotStore(fileName))
+
+    f = io.open(fileName, 'r', encoding='utf-8', newline='')
+    return _iterPairs(f, chunkSize)
+
+
+def _iterSpans(f, chunkSize):
+    with f:
+        stream = _JsonStream(f, chunkSize)
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+
+        while True:
+            stream.decode()
+            stream.expect(':')
+            stream.peek()
+            start = stream.tell()
+            stream.decode()
+            yield start, stream.tell()
+
+            if stream.peek() == '}':
+                return
+            stream.expect(',')
+
+
+def iterSnapshotSpans(fileName, chunkSize=65536):
+    """Finds where the tags of each file are in a JSON snapshot
+
+    The file is decoded as Latin-1, which has one character for every byte.
+    The strings it decodes are wrong, but the structure, and so the offsets,
+    are the same as UTF-8.
+
+    Returns:
+        An iterator of ``(start, end)`` byte offsets, in the same order as
+        :func:`iterSnapshot`.  ``json.loads`` of the UTF-8 text between
+        them returns the tags of that file
+    """
+    f = io.open(fileName, 'r', encoding='latin-1', newline='')
+    return _iterSpans(f, chunkSize)
+
+
+def readRun(f):
+    """Reads back every item written to ``f`` by :func:`writeBlock`
+
+    The file is read from the start and closed once it is exhausted.
+
+    Returns:
+        An iterator of the items, in the order they were written
+    """
+    with f:
+        f.seek(0)
+        header = f.read(_recordHeader.size)
+        while header:
+            size, = _recordHeader.unpack(header)
+            for item in marshal.loads(f.read(size)):
+                yield item
+            header = f.read(_recordHeader.size)
+
+
+def writeBlock(f, items):
+    """Appends a list of items to a binary file, e.g. a temporary file
+
+    The items must be JSON types.  Read them back with :func:`readRun`.
+    """
+    # marshal is much faster loading one list from bytes than from a file
+    data = marshal.dumps(items, _MARSHAL_VERSION)
+    f.write(_recordHeader.pack(len(data)))
+    f.write(data)
+
+
+def _spill(run, blockSize=1024):
+    f = tempfile.TemporaryFile()
+    for i in range(0, len(run), blockSize):
+        writeBlock(f, run[i:i + blockSize])
+    return f
+
+
+def iterSortedPairs(pairs, bufferSize=100000):
+    """Sorts ``(key, value)`` pairs without holding all of them in memory
+
+    Pairs are sorted ``bufferSize`` at a time and each sorted run is written
+    to a temporary file, then the runs are merged.  Nothing is written when
+    all of the pairs fit in the buffer.  Pairs with the same key stay in the
+    order they were read.
+
+    Args:
+        pairs: An iterable of ``(key, value)``, e.g. :func:`iterSnapshot`.
+        The values must be JSON types
+
+        bufferSize (int): The number of pairs sorted in memory
+
+    Returns:
+        An iterator of ``(key, value)`` in key order
+    """
+    runs = []
+    buffer = []
+
+    # the sequence number keeps the sort stable and the values uncompared
+    for i, (key, value) in enumerate(pairs):
+        buffer.append((key, i, value))
+        if len(buffer) >= bufferSize:
+            buffer.sort()
+            runs.append(_spill(buffer))
+            buffer = []
+
+    buffer.sort()
+    if runs:
+        if buffer:
+            runs.append(_spill(buffer))
+        merged = heapq.merge(*[readRun(f) for f in runs])
+    else:
+        merged = iter(buffer)
+
+    return ((key, value) for key, _, value in merged)
+
+# -----------------------------------------------------------------------------
+# Binary Snapshots
+
+BINARY_SNAPSHOT_EXTENSION = '.snap'
+"""Snapshots with this extension are written in the binary format"""
+
+_MAGIC = b'pyTagger'
+_recordHeader = struct.Struct('<I')
+_footer = struct.Struct('<Q8s')
+_MARSHAL_VERSION = 2
+
+
+def isBinarySnapshot(fileName):
+    """``True`` if the file should be in the binary snapshot format"""
+    return os.path.splitext(fileName)[1].lower() == BINARY_SNAPSHOT_EXTENSION
+
+
+def saveBinarySnapshotIncremental(fileName, escaped=False, blockSize=64):
+    """Writes a snapshot in the binary format, one pair at a time
+
+    The file starts with a magic number, followed by length-prefixed
+    :mod:`marshal` blocks of up to ``blockSize`` ``(path, tags)`` pairs.  The
+    footer is an index of path to block offset, which allows random access
+    through :class:`BinarySnapshot`.  Only dictionaries, lists, strings and
+    numbers can be written.
+
+    Args:
+        fileName (str): The absolute path to where the file should be written
+
+        escaped (bool): ``True`` if the paths have their backslashes escaped,
+        as they are for :func:`saveJsonIncrementalDict`
+
+        blockSize (int): The number of pairs in a block
+
+    Yields:
+        int: The current number of rows processed
+    """
+    index = {}
+    block = []
+
+    with io.open(fileName, 'wb') as f:
+        f.write(_MAGIC)
+        offset = [len(_MAGIC)]
+
+        def flush():
+            record = marshal.dumps(block, _MARSHAL_VERSION)
+            f.write(_recordHeader.pack(len(record)))
+            f.write(record)
+            for k, _ in block:
+                index[k] = offset[0]
+            offset[0] += _recordHeader.size + len(record)
+            del block[:]
+
+        try:
+            for i in count():  # pragma: no branch
+                key, value = yield i
+                if escaped:
+                    key = key.replace('\\\\', '\\')
+
+                block.append((key, value))
+                if len(block) >= blockSize:
+                    flush()
+
+        finally:
+            if block:
+                flush()
+            f.write(marshal.dumps(index, _MARSHAL_VERSION))
+            f.write(_footer.pack(offset[0], _MAGIC))
+
+
+class BinarySnapshot(Mapping):
+    """A read-only view of a binary snapshot
+
+    Only the index is loaded when the file is opened.  The tags of a path are
+    read from the file when they are accessed.
+
+    **Example Usage:**
+
+    .. code-block:: python
+
+       with BinarySnapshot(fileName) as snapshot:
+           tags = snapshot[fullPath]
+
+    """
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self._f = io.open(fileName, 'rb')
+        try:
+            if self._f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(
+                    "'{0}' is not a binary snapshot".format(fileName)
+                )
+
+            self._f.seek(-_footer.size, os.SEEK_END)
+            end = self._f.tell()
+            self.dataEnd, magic = _footer.unpack(self._f.read(_footer.size))
+            if magic != _MAGIC:
+                raise ValueError("'{0}' is incomplete".format(fileName))
+
+            self._f.seek(self.dataEnd)
+            self._index = marshal.loads(self._f.read(end - self.dataEnd))
+        except Exception:
+            self._f.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getitem__(self, path):
+        self._f.seek(self._index[path])
+        for k, v in self._readBlock():
+            if k == path:
+                return v
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def _readBlock(self):
+        size, = _recordHeader.unpack(self._f.read(_recordHeader.size))
+        return marshal.loads(self._f.read(size))
+
+    def close(self):
+        self._f.close()
+
+    def iterPairs(self):
+        """Yields every ``(path, tags)`` pair in the order it was written"""
+        offset = len(_MAGIC)
+        while offset < self.dataEnd:
+            self._f.seek(offset)
+            block = self._readBlock()
+            offset = self._f.tell()
+            for pair in block:
+                yield pair
+
+
+def iterBinarySnapshot(fileName):
+    """The binary version of :func:`iterSnapshot`"""
+    snapshot = BinarySnapshot(fileName)
+
+    def inner():
+        with snapshot:
+            for pair in snapshot.iterPairs():
+                yield pair
+
+    return inner()
+
+
+def loadBinarySnapshot(fileName):
+    """The binary version of :func:`loadJson`"""
+    with BinarySnapshot(fileName) as snapshot:
+        return dict(snapshot.iterPairs())
+
+# -----------------------------------------------------------------------------
+# SQLite Snapshots
+
+SQLITE_SNAPSHOT_EXTENSION = '.sqlite'
+"""Snapshots with this extension are kept in a SQLite database"""
+
+
+def isSqliteSnapshot(fileName):
+    """``True`` if the snapshot should be kept in a SQLite database"""
+    return os.path.splitext(fileName)[1].lower() == SQLITE_SNAPSHOT_EXTENSION
+
+
+def openSnapshotStore(fileName, create=False):
+    """Opens a :class:`pyTagger.proxies.sqlite.SnapshotStore`
+
+    Args:
+        fileName (str): The absolute path to the database
+
+        create (bool): ``True`` if the database should be created when it does
+        not exist.  Otherwise an ``IOError`` is raised, just like opening a
+        missing JSON file
+    """
+    # imported here since the store needs the models, which need this module
+    from pyTagger.proxies.sqlite import SnapshotStore
+
+    if not create and not os.path.exists(fileName):
+        raise IOError("'{0}' does not exist".format(fileName))
+    return SnapshotStore(fileName)
+
+
+def _iterSqliteSnapshot(store):
+    with store:
+        for pair in store.iterPairs():
+            yield pair
+
+
+def _saveSqliteIncrementalDict(fileName):
+    # Python 2 does not have `yield from`
+    with openSnapshotStore(fileName, create=True) as store:
+        output = store.saveIncremental(escaped=True)
+        i = next(output)
+        try:
+            while True:
+                pair = yield i
+                i = output.send(pair)
+        finally:
+            output.close()
+
 # -----------------------------------------------------------------------------
 
 
@@ -193,9 +661,51 @@ def generateUfid():
     return binascii.b2a_base64(ufid.bytes).strip()
 
 
+# -----------------------------------------------------------------------------
+# Parallel Processing
+
+
+def parallelMap(fn, iterable, workers=1, initializer=None, initargs=(),
+                chunksize=8):
+    """Applies a function to every item, spreading the work across processes
+
+    Args:
+        fn (function): A module-level function that accepts one item
+
+        iterable (iterable): The items to process
+
+        workers (int): The number of processes to use.  Values less than 2
+        run everything in the current process
+
+        initializer (function): Called once in each process with
+        ``initargs`` before any items are processed
+
+        chunksize (int): The number of items sent to a process at a time
+
+    Yields:
+        The result of ``fn`` for each item, in the same order as ``iterable``
+    """
+    if workers < 2:
+        if initializer:
+            initializer(*initargs)
+        for x in iterable:
+            yield fn(x)
+        return
+
+    pool = multiprocessing.Pool(workers, initializer, initargs)
+    try:
+        for result in pool.imap(fn, iterable, chunksize):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 # -----------------------------------------------------------------------------
 # Functional FTW
 
+
 def fmap(fns, x):
     """A version of the Haskell `functor` concept
 
@@ -0,0 +1,94 @@
+from __future__ import unicode_literals
+import unittest
+import pyTagger.actions.clones as target
+from pyTagger.models import CloneGroup
+from pyTagger.utils import configurationOptions
+try:
+    from unittest.mock import patch, Mock
+except ImportError:
+    from mock import patch, Mock
+
+
+class TestClonesAction(unittest.TestCase):
+    def setUp(self):
+        import sys
+        with patch.object(sys, 'argv', ['test', 'mp3s.json']):
+            self.options = configurationOptions('clones')
+
+    def run_process(self, isdir):
+        module = 'pyTagger.actions.clones.'
+        with patch(module + 'os.path.isdir') as isDir, \
+                patch(module + 'iterSnapshot') as iterSnapshot, \
+                patch(module + '_groupDirectory') as groupDirectory, \
+                patch(module + 'groupClones') as groupClones, \
+                patch(module + 'saveJsonIncrementalArray') as saveJson:
+            isDir.return_value = isdir
+            groups = iter([
+                CloneGroup('a', ['x', 'y'], [10, 12]),
+                CloneGroup('b', ['p', 'q', 'r'], [5, None, 5])
+            ])
+            groupClones.return_value = groups
+            groupDirectory.return_value = groups
+            output = saveJson.return_value
+            output.__next__ = Mock(return_value=0)
+            output.next = output.__next__
+            output.send.side_effect = [1, 2]
+
+            actual = target.process(self.options)
+
+        if isdir:
+            groupDirectory.assert_called_once_with(self.options)
+            self.assertEqual(iterSnapshot.call_count, 0)
+        else:
+            iterSnapshot.assert_called_once_with('mp3s.json')
+            groupClones.assert_called_once_with(iterSnapshot.return_value)
+        saveJson.assert_called_once_with('clones.json')
+        sent = [x[0][0] for x in output.send.call_args_list]
+        return actual, sent
+
+    def test_process(self):
+        actual, sent = self.run_process(False)
+        self.assertEqual(sent[0], {
+            'fileHash': 'a', 'paths': ['x', 'y'], 'sizes': [10, 12],
+            'reclaimable': 10
+        })
+        self.assertEqual(actual, 'Found 2 groups of clones\nDuplicates 3\n'
+                                 'Reclaimable 15 bytes')
+
+    def test_process_directory(self):
+        actual, _ = self.run_process(True)
+        self.assertEqual(actual, 'Found 2 groups of clones\nDuplicates 3\n'
+                                 'Reclaimable 15 bytes')
+
+    @patch('pyTagger.actions.clones.walk')
+    @patch('pyTagger.actions.clones.groupIdenticalFiles')
+    @patch('pyTagger.actions.clones.ID3Proxy')
+    def test_groupDirectory_audio(self, id3Proxy, groupIdenticalFiles, walk):
+        groupIdenticalFiles.return_value = iter(['group'])
+        hashCache = id3Proxy.return_value.hashCache
+
+        actual = list(target._groupDirectory(self.options))
+
+        self.assertEqual(actual, ['group'])
+        walk.assert_called_once_with('mp3s.json')
+        groupIdenticalFiles.assert_called_once_with(
+            walk.return_value, target.tagSize, hashCache.hashFile
+        )
+        self.assertEqual(hashCache.save.call_count, 1)
+
+    @patch('pyTagger.actions.clones.walkAll')
+    @patch('pyTagger.actions.clones.groupIdenticalFiles')
+    @patch('pyTagger.actions.clones.ID3Proxy')
+    def test_groupDirectory_allFiles(self, id3Proxy, groupIdenticalFiles,
+                                     walkAll):
+        groupIdenticalFiles.return_value = iter(['group'])
+        self.options.all_files = True
+
+        actual = list(target._groupDirectory(self.options))
+
+        self.assertEqual(actual, ['group'])
+        groupIdenticalFiles.assert_called_once_with(walkAll.return_value)
+        self.assertEqual(id3Proxy.call_count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
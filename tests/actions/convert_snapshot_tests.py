@@ -0,0 +1,54 @@
+from __future__ import unicode_literals
+import unittest
+import pyTagger.actions.convert_snapshot as target
+from pyTagger.utils import configurationOptions
+try:
+    from unittest.mock import patch, Mock
+except ImportError:
+    from mock import patch, Mock
+
+
+class TestConvertSnapshotAction(unittest.TestCase):
+    def setUp(self):
+        import sys
+        with patch.object(sys, 'argv', ['test', 'foo.json']):
+            self.options = configurationOptions('convert-snapshot')
+
+    def test_getOutputName_fileSpecified(self):
+        self.options.outfile = 'bar.snap'
+        actual = target._getOutputName(self.options)
+        self.assertEqual(actual, 'bar.snap')
+
+    def test_getOutputName_toBinary(self):
+        actual = target._getOutputName(self.options)
+        self.assertEqual(actual, 'foo.snap')
+
+    def test_getOutputName_toJson(self):
+        self.options.infile = 'foo.snap'
+        actual = target._getOutputName(self.options)
+        self.assertEqual(actual, 'foo.json')
+
+    def test_process_same_file(self):
+        self.options.outfile = 'foo.json'
+        with self.assertRaises(ValueError):
+            target.process(self.options)
+
+    @patch('pyTagger.actions.convert_snapshot.saveJsonIncrementalDict')
+    @patch('pyTagger.actions.convert_snapshot.iterSnapshot')
+    def test_process(self, iterSnapshot, saveJsonIncrementalDict):
+        iterSnapshot.return_value = [('C:\\foo.mp3', {'a': 1}),
+                                     ('bar.mp3', {'b': 2})]
+        output = saveJsonIncrementalDict.return_value
+        output.__next__ = Mock(return_value=0)
+        output.next = output.__next__
+        output.send.side_effect = [1, 2]
+
+        actual = target.process(self.options)
+
+        saveJsonIncrementalDict.assert_called_once_with('foo.snap', False)
+        output.send.assert_any_call(('C:\\\\foo.mp3', {'a': 1}))
+        self.assertEqual(output.close.call_count, 1)
+        self.assertEqual(actual, 'Converted 2 files to foo.snap')
+
+if __name__ == '__main__':
+    unittest.main()
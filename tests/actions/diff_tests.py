@@ -1,7 +1,10 @@
 from __future__ import unicode_literals
 import unittest
+import os
+import shutil
+import tempfile
 import pyTagger.actions.diff as target
-from pyTagger.utils import configurationOptions
+from pyTagger.utils import configurationOptions, saveJson
 try:
     from unittest.mock import patch
 except ImportError:
@@ -69,5 +72,121 @@ class TestDiffAction(unittest.TestCase):
         actual = target.process(self.options)
         self.assertEqual(actual, '0 tags processed')
 
+
+class TestDiffSqlite(unittest.TestCase):
+    def setUp(self):
+        import sys
+        self.directory = tempfile.mkdtemp()
+        left = os.path.join(self.directory, 'a.json')
+        right = os.path.join(self.directory, 'b.sqlite')
+        args = ['test', left, right, 'c.json']
+        with patch.object(sys, 'argv', args):
+            self.options = configurationOptions('diff')
+
+        saveJson(left, {
+            'foo': {'album': None, 'artist': 'w', 'id': '123456'},
+            'bar': {'album': 1, 'artist': None, 'id': '987654'},
+            'qaz': {'album': 3, 'id': 'y'}
+        })
+        saveJson(right, {
+            'foo': {'album': 1, 'artist': 'www', 'id': '123456'},
+            'bar': {'album': 1, 'artist': 'w', 'id': '987654'},
+            'baz': {'album': 2, 'id': 'x'}
+        })
+        self.output = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def coroutine(self, outfile, compact):
+        for i in range(10):
+            k, v = yield i
+            self.output[k] = v
+
+    @patch('pyTagger.actions.diff.saveJsonIncrementalDict')
+    def test_process(self, saveJson):
+        saveJson.side_effect = self.coroutine
+        actual = target.process(self.options)
+        self.assertEqual(actual, '1 tags processed')
+        self.assertEqual(self.output, {'foo': {'artist': 'w'}})
+
+    @patch('pyTagger.actions.diff.saveJsonIncrementalDict')
+    def test_process_match_on_ids(self, saveJson):
+        self.options.match_on = 'id'
+        saveJson.side_effect = self.coroutine
+        actual = target.process(self.options)
+        self.assertEqual(actual, '1 tags processed')
+        self.assertEqual(self.output, {
+            '123456': {'artist': 'w'}
+        })
+
+
+class TestDiffMerge(unittest.TestCase):
+    def setUp(self):
+        import sys
+        self.directory = tempfile.mkdtemp()
+        left = os.path.join(self.directory, 'a.json')
+        right = os.path.join(self.directory, 'b.json')
+        args = ['test', left, right, 'c.json', '--merge',
+                '--left-only', 'left.json', '--right-only', 'right.json',
+                '--buffer-size', '1']
+        with patch.object(sys, 'argv', args):
+            self.options = configurationOptions('diff')
+
+        saveJson(left, {
+            'foo': {'album': None, 'artist': 'w', 'id': '123456'},
+            'bar': {'album': 1, 'artist': None, 'id': '987654'},
+            'qaz': {'album': 3, 'id': 'y'}
+        })
+        saveJson(right, {
+            'foo': {'album': 1, 'artist': 'www', 'id': '123456'},
+            'bar': {'album': 1, 'artist': 'w', 'id': '987654'},
+            'baz': {'album': 2, 'id': 'x'}
+        })
+        self.output = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def coroutine(self, outfile, compact):
+        self.output[outfile] = {}
+        for i in range(10):
+            k, v = yield i
+            self.output[outfile][k] = v
+
+    @patch('pyTagger.actions.diff.saveJsonIncrementalDict')
+    def test_process(self, saveJson):
+        saveJson.side_effect = self.coroutine
+        actual = target.process(self.options)
+        self.assertEqual(actual, '1 tags processed')
+        self.assertEqual(self.output, {
+            'c.json': {'foo': {'artist': 'w'}},
+            'left.json': {'qaz': {'album': 3, 'id': 'y'}},
+            'right.json': {'baz': {'album': 2, 'id': 'x'}}
+        })
+
+    @patch('pyTagger.actions.diff.saveJsonIncrementalDict')
+    def test_process_match_on_ids(self, saveJson):
+        self.options.match_on = 'id'
+        saveJson.side_effect = self.coroutine
+        actual = target.process(self.options)
+        self.assertEqual(actual, '1 tags processed')
+        self.assertEqual(self.output['c.json'], {'123456': {'artist': 'w'}})
+        self.assertEqual(self.output['right.json'], {
+            'x': {'album': 2, 'id': 'x', 'path': 'baz'}
+        })
+
+    @patch('pyTagger.actions.diff.saveJsonIncrementalDict')
+    def test_process_loaded(self, saveJson):
+        self.options.merge = False
+        saveJson.side_effect = self.coroutine
+        target.process(self.options)
+        self.assertEqual(self.output['left.json'], {
+            'qaz': {'album': 3, 'id': 'y'}
+        })
+        self.assertEqual(self.output['right.json'], {
+            'baz': {'album': 2, 'id': 'x'}
+        })
+
 if __name__ == '__main__':
     unittest.main()
@@ -30,12 +30,25 @@ class TestExportAction(unittest.TestCase):
         self.assertEqual(actual, 'foo.txt')
 
     @patch('pyTagger.actions.export.writeCsv')
-    @patch('pyTagger.actions.export.loadJson')
-    def test_process(self, loadJson, writeCsv):
+    @patch('pyTagger.actions.export.iterSnapshot')
+    def test_process(self, iterSnapshot, writeCsv):
         actual = target.process(self.options)
         self.assertEqual(actual, "Exported to foo.txt")
-        self.assertEqual(loadJson.call_count, 1)
-        self.assertEqual(writeCsv.call_count, 1)
+        self.assertEqual(iterSnapshot.call_count, 1)
+        writeCsv.assert_called_once_with(
+            iterSnapshot.return_value, 'foo.txt', True
+        )
+
+    @patch('pyTagger.actions.export.writeCsv')
+    @patch('pyTagger.actions.export.iterSnapshot')
+    def test_process_columnar(self, iterSnapshot, writeCsv):
+        self.options.columnar = True
+        iterSnapshot.return_value = [('a.mp3', {'title': 'x'})]
+        target.process(self.options)
+
+        snapshot = writeCsv.call_args[0][0]
+        self.assertIsInstance(snapshot, target.ColumnarSnapshot)
+        self.assertEqual(dict(snapshot.items()), {'a.mp3': {'title': 'x'}})
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,27 @@
+from __future__ import unicode_literals
+import unittest
+import pyTagger.actions.index_snapshot as target
+from pyTagger.utils import configurationOptions
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+
+class TestIndexSnapshotAction(unittest.TestCase):
+    def setUp(self):
+        import sys
+        with patch.object(sys, 'argv', ['test', 'foo.json']):
+            self.options = configurationOptions('index-snapshot')
+
+    @patch('pyTagger.actions.index_snapshot.buildIndex')
+    def test_process(self, buildIndex):
+        buildIndex.return_value = 12
+
+        actual = target.process(self.options)
+
+        buildIndex.assert_called_once_with('foo.json')
+        self.assertEqual(actual, 'Indexed 12 files in foo.json.idx')
+
+if __name__ == '__main__':
+    unittest.main()
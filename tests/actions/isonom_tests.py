@@ -63,6 +63,10 @@ class TestIsonomAction(unittest.TestCase):
 
         actual = target._findIsonoms(self.options, self.client)
         self.assertEqual(actual, '1 track(s) produced 3 rows')
+        findIsonoms.assert_called_once_with(
+            self.client, self.snapshot, self.options.min_score,
+            self.client.batchSize, self.client.threads
+        )
         self.assertEqual(self.loadJson.call_count, 1)
 
     @patch('pyTagger.actions.isonom._findIsonoms')
@@ -75,7 +79,36 @@ class TestIsonomAction(unittest.TestCase):
         actual = target.process(self.options)
 
         self.assertEqual(actual, "Success")
-        target._buildIndex.assert_called_once_with(self.options)
+        target._buildIndex.assert_called_once_with(
+            self.options, self.client.return_value
+        )
+
+    @patch('pyTagger.actions.isonom._findIsonoms')
+    @patch('pyTagger.actions.isonom.IsonomIndex')
+    def test_process_local(self, isonomIndex, findIsonoms):
+        self.path_exists.return_value = False
+        self.options.engine = 'local'
+        findIsonoms.return_value = 'foo'
+
+        actual = target.process(self.options)
+
+        self.assertEqual(actual, "Success")
+        isonomIndex.assert_called_once_with(self.options.isonom_index)
+        self.assertEqual(self.client.call_count, 0)
+        findIsonoms.assert_called_once_with(self.options,
+                                            isonomIndex.return_value)
+
+    @patch('pyTagger.actions.isonom.uploadToElasticsearch')
+    @patch('pyTagger.actions.isonom.iterSnapshot')
+    def test_buildIndex_local(self, iterSnapshot, uploader):
+        from pyTagger.proxies.isonom_index import IsonomIndex
+        client = Mock(IsonomIndex)
+
+        target._buildIndex(self.options, client)
+
+        iterSnapshot.assert_called_once_with(self.options.library_snapshot)
+        client.load.assert_called_once_with(iterSnapshot.return_value)
+        self.assertEqual(uploader.call_count, 0)
 
     @patch('pyTagger.actions.isonom._findIsonoms')
     def test_process_isonoms_not_exist(self, findIsonoms):
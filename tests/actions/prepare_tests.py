@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 import io
 import unittest
+from collections import Counter
 import pyTagger.actions.prepare as target
 from pyTagger.utils import configurationOptions
 try:
@@ -20,13 +21,16 @@ class TestPrepareAction(unittest.TestCase):
     @patch('pyTagger.actions.prepare.buildSnapshot')
     @patch('pyTagger.actions.prepare.prepareForLibrary')
     def test_process_step1(self, a, b, c, d):
+        a.return_value = Counter(written=7, rewritten=1, unchanged=0,
+                                 failed=0)
         b.return_value = 99, 1
+        self.options.workers = 4
 
         actual = target.process(self.options)
 
         self.assertEqual(actual, "Success")
-        self.assertEqual(a.call_count, 1)
-        self.assertEqual(b.call_count, 1)
+        a.assert_called_once_with(self.options.download_dir, 4)
+        self.assertEqual(b.call_args[1], {'workers': 4})
         self.assertEqual(c.call_count, 1)
         self.assertEqual(d.call_count, 1)
 
@@ -44,7 +48,8 @@ class TestPrepareAction(unittest.TestCase):
     def test_process_step2(self, exists, a, b, c, d, e):
         exists.return_value = True
         a.return_value = 99, 1
-        d.return_value = 99, 1
+        d.return_value = Counter(written=99, rewritten=9, unchanged=0,
+                                 failed=1)
 
         target._step2(self.options)
 
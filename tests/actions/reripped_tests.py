@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 import io
 import unittest
+from collections import Counter
 import pyTagger.actions.reripped as target
 from nose_parameterized import parameterized
 from pyTagger.utils import configurationOptions
@@ -172,7 +173,8 @@ class TestRerippedAction(unittest.TestCase):
 
         self.path_exists.side_effect = [True, False]
         loadJson.side_effect = [interview, snapshot]
-        update.return_value = (99, 13)
+        update.return_value = Counter(written=99, rewritten=9, unchanged=0,
+                                      failed=13)
         extract.return_value = {}
 
         output = FakeFile()
@@ -196,7 +198,8 @@ class TestRerippedAction(unittest.TestCase):
 
         self.path_exists.side_effect = [True, True]
         loadJson.side_effect = [interview, snapshot]
-        update.return_value = (99, 13)
+        update.return_value = Counter(written=99, rewritten=9, unchanged=0,
+                                      failed=13)
         extract.return_value = {}
 
         output = FakeFile()
@@ -4,9 +4,9 @@ import pyTagger.actions.scan as target
 from collections import namedtuple
 from pyTagger.utils import configurationOptions
 try:
-    from unittest.mock import patch
+    from unittest.mock import patch, ANY, Mock
 except ImportError:
-    from mock import patch
+    from mock import patch, ANY, Mock
 
 MockStats = namedtuple('_stat', ['st_mtime'])
 
@@ -64,6 +64,19 @@ class TestScanAction(unittest.TestCase):
         actual = filterFn('foo.mp3')
         self.assertEqual(actual, False)
 
+    @patch('pyTagger.actions.scan.creationDate')
+    @patch('os.stat')
+    def test_buildFilter_entry(self, stat, creationDate):
+        entry = Mock()
+        entry.stat.return_value = MockStats(1)
+        creationDate.return_value = 2
+        filterFn = target.buildFilter(self.options)
+        actual = filterFn('foo.mp3', entry)
+        self.assertTrue(filterFn.usesEntry)
+        self.assertEqual(actual, True)
+        stat.assert_not_called()
+        creationDate.assert_called_once_with('foo.mp3', MockStats(1))
+
     @patch('pyTagger.actions.scan.ID3Proxy')
     @patch('pyTagger.actions.scan.buildSnapshot')
     def test_process(self, buildSnapshot, id3Proxy):
@@ -76,7 +89,7 @@ class TestScanAction(unittest.TestCase):
         buildSnapshot.assert_called_once_with(self.options.path,
                                               self.options.outfile,
                                               'id3Proxy goes here',
-                                              False, None)
+                                              False, None, 1, None, ANY, 1)
         self.assertEqual(actual, 'Extracted tags from 420 files\nFailed 99')
 
     @patch('pyTagger.actions.scan.ID3Proxy')
@@ -94,8 +107,29 @@ class TestScanAction(unittest.TestCase):
         buildSnapshot.assert_called_once_with(self.options.path,
                                               self.options.outfile,
                                               'id3Proxy goes here',
-                                              False, 'filter!')
+                                              False, 'filter!', 1, None,
+                                              ANY, 1)
         self.assertEqual(actual, 'Extracted tags from 420 files\nFailed 99')
 
+    @patch('pyTagger.actions.scan.ID3Proxy')
+    @patch('pyTagger.actions.scan.buildSnapshot')
+    def test_process_incremental(self, buildSnapshot, id3Proxy):
+        def fakeBuild(*args):
+            report = args[7]
+            report['reused'] = 400
+            report['refreshed'] = 15
+            report['added'] = 5
+            report['removed'] = 2
+            return (420, 99)
+
+        self.options.incremental = True
+        buildSnapshot.side_effect = fakeBuild
+
+        actual = target.process(self.options)
+
+        self.assertEqual(buildSnapshot.call_args[0][6], self.options.outfile)
+        self.assertEqual(actual, 'Extracted tags from 420 files\nFailed 99\n'
+                         'Reused 400\nRefreshed 15\nAdded 5\nRemoved 2')
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,11 @@
 import unittest
+from collections import Counter
 import pyTagger.actions.update as target
 from pyTagger.utils import configurationOptions
 try:
-    from unittest.mock import patch
+    from unittest.mock import patch, Mock
 except ImportError:
-    from mock import patch
+    from mock import patch, Mock
 
 
 class TestUpdateAction(unittest.TestCase):
@@ -13,20 +14,56 @@ class TestUpdateAction(unittest.TestCase):
         with patch.object(sys, 'argv', ['test', 'foo.json']):
             self.options = configurationOptions('update')
 
-    @patch('pyTagger.actions.update.loadJson')
+    @patch('pyTagger.actions.update.iterSnapshot')
     @patch('pyTagger.actions.update.ID3Proxy')
     @patch('pyTagger.actions.update.updateFromSnapshot')
-    def test_process(self, updateFromSnapshot, id3Proxy, loadJson):
+    def test_process(self, updateFromSnapshot, id3Proxy, iterSnapshot):
         id3Proxy.return_value = 'id3Proxy goes here'
-        loadJson.return_value = 'loadJson goes here'
+        iterSnapshot.return_value = 'iterSnapshot goes here'
+        updateFromSnapshot.return_value = Counter(
+            written=2, rewritten=1, unchanged=3, failed=1
+        )
 
         actual = target.process(self.options)
 
         self.assertEqual(id3Proxy.call_count, 1)
-        self.assertEqual(loadJson.call_count, 1)
+        self.assertEqual(iterSnapshot.call_count, 1)
         updateFromSnapshot.assert_called_once_with('id3Proxy goes here',
-                                                   'loadJson goes here',
-                                                   False)
+                                                   'iterSnapshot goes here',
+                                                   False, 1)
+        self.assertEqual(actual, 'Written 2\nRewritten in full 1\n'
+                                 'Unchanged 3\nFailed 1')
+
+    @patch('pyTagger.actions.update.saveJsonIncrementalDict')
+    @patch('pyTagger.actions.update.iterSnapshot')
+    @patch('pyTagger.actions.update.ID3Proxy')
+    @patch('pyTagger.actions.update.updateFromSnapshot')
+    @patch('pyTagger.actions.update.planFromSnapshot')
+    def test_process_plan(self, planFromSnapshot, updateFromSnapshot,
+                          id3Proxy, iterSnapshot, saveJson):
+        self.options.plan = 'plan.json'
+        self.options.workers = 2
+        planFromSnapshot.return_value = iter([
+            ('C:\\a.mp3', {'status': 'written', 'delta': {'title': 'x'},
+                           'bytes': 2048}),
+            ('b.mp3', {'status': 'unchanged', 'delta': {}, 'bytes': 0}),
+            ('d.mp3', {'status': 'rewritten', 'delta': {'title': 'y'},
+                       'bytes': 4000000}),
+            ('c.mp3', {'status': 'failed', 'error': 'IOError()'})
+        ])
+        output = saveJson.return_value
+        output.__next__ = Mock(return_value=0)
+        output.next = output.__next__
+
+        actual = target.process(self.options)
+
+        self.assertEqual(actual, 'Would write 2\nRewrite in full 1\n'
+                                 'Unchanged 1\nFailed 1\nBytes 4002048')
+        saveJson.assert_called_once_with('plan.json')
+        sent = [x[0][0][0] for x in output.send.call_args_list]
+        self.assertEqual(sent, ['C:\\\\a.mp3', 'd.mp3', 'c.mp3'])
+        self.assertEqual(planFromSnapshot.call_args[0][2:], (False, 2))
+        updateFromSnapshot.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
@@ -13,29 +13,29 @@ class TestUploadAction(unittest.TestCase):
         self.options = configurationOptions('upload')
 
     @patch('pyTagger.actions.upload.Client')
-    @patch('pyTagger.actions.upload.loadJson')
-    def test_uploadToElasticsearch_happy(self, loadJson, es_module):
+    @patch('pyTagger.actions.upload.iterSnapshot')
+    def test_uploadToElasticsearch_happy(self, iterSnapshot, es_module):
         client = es_module.return_value
         client.exists.return_value = False
         client.load.return_value = (1, 0)
 
-        loadJson.return_value = self.snapshot
+        iterSnapshot.return_value = self.snapshot
 
         actual = target.uploadToElasticsearch(self.options)
 
-        loadJson.assert_called_once_with(self.options.library_snapshot)
+        iterSnapshot.assert_called_once_with(self.options.library_snapshot)
         self.assertEqual(client.exists.call_count, 1)
         client.load.assert_called_once_with(self.snapshot)
         self.assertEqual(actual, 'Loaded 1 records\nFailed 0')
 
     @patch('pyTagger.actions.upload.Client')
-    @patch('pyTagger.actions.upload.loadJson')
-    def test_uploadToElasticsearch_reload(self, loadJson, es_module):
+    @patch('pyTagger.actions.upload.iterSnapshot')
+    def test_uploadToElasticsearch_reload(self, iterSnapshot, es_module):
         client = es_module.return_value
         client.exists.return_value = True
         client.load.return_value = (1, 0)
 
-        loadJson.return_value = self.snapshot
+        iterSnapshot.return_value = self.snapshot
 
         self.options.reload = True
 
@@ -47,13 +47,13 @@ class TestUploadAction(unittest.TestCase):
         self.assertEqual(actual, 'Loaded 1 records\nFailed 0')
 
     @patch('pyTagger.actions.upload.Client')
-    @patch('pyTagger.actions.upload.loadJson')
-    def test_uploadToElasticsearch_append(self, loadJson, es_module):
+    @patch('pyTagger.actions.upload.iterSnapshot')
+    def test_uploadToElasticsearch_append(self, iterSnapshot, es_module):
         client = es_module.return_value
         client.exists.return_value = True
         client.load.return_value = (1, 0)
 
-        loadJson.return_value = self.snapshot
+        iterSnapshot.return_value = self.snapshot
 
         self.options.append = True
 
@@ -65,21 +65,21 @@ class TestUploadAction(unittest.TestCase):
         self.assertEqual(actual, 'Loaded 1 records\nFailed 0')
 
     @patch('pyTagger.actions.upload.Client')
-    @patch('pyTagger.actions.upload.loadJson')
-    def test_uploadToElasticsearch_no_overwrite(self, loadJson, es_module):
+    @patch('pyTagger.actions.upload.iterSnapshot')
+    def test_uploadToElasticsearch_no_overwrite(self, iterSnapshot, es_module):
         client = es_module.return_value
         client.exists.return_value = True
 
-        loadJson.return_value = self.snapshot
+        iterSnapshot.return_value = self.snapshot
 
         with self.assertRaises(ValueError):
             actual = target.uploadToElasticsearch(self.options)
 
     @patch('pyTagger.actions.upload.Client')
-    @patch('pyTagger.actions.upload.loadJson')
-    def test_uploadToElasticsearch_no_file(self, loadJson, es_module):
+    @patch('pyTagger.actions.upload.iterSnapshot')
+    def test_uploadToElasticsearch_no_file(self, iterSnapshot, es_module):
         client = es_module.return_value
-        loadJson.side_effect = IOError
+        iterSnapshot.side_effect = IOError
 
         with self.assertRaises(IOError):
             actual = target.uploadToElasticsearch(self.options)
@@ -0,0 +1,159 @@
+from __future__ import unicode_literals
+import unittest
+import pyTagger.actions.where as target
+from pyTagger.models import COMPARISON, GROUP, ConditionGroup
+from pyTagger.models import FilterCondition
+from pyTagger.utils import configurationOptions
+try:
+    from unittest.mock import patch, Mock
+except ImportError:
+    from mock import patch, Mock
+
+
+class TestCompileConditions(unittest.TestCase):
+    def setUp(self):
+        self.tags = {'artist': 'The Beatles', 'track': 3, 'year': None}
+
+    def check(self, expected, *conditions, **kwargs):
+        test = target.compileConditions([
+            FilterCondition(*c) for c in conditions
+        ], **kwargs)
+        self.assertEqual(test(self.tags), expected)
+
+    def test_equal(self):
+        self.check(True, ('artist', COMPARISON.EQUAL, 'The Beatles'))
+        self.check(False, ('artist', COMPARISON.EQUAL, 'the beatles'))
+        self.check(True, ('year', COMPARISON.EQUAL, None))
+        self.check(True, ('album', COMPARISON.EQUAL, None))
+
+    def test_not(self):
+        self.check(False, ('artist', COMPARISON.NOT, 'The Beatles'))
+        self.check(True, ('album', COMPARISON.NOT, 'Help'))
+
+    def test_like(self):
+        self.check(True, ('artist', COMPARISON.LIKE, 'BEAT'))
+        self.check(False, ('artist', COMPARISON.LIKE, 'Stones'))
+        self.check(False, ('album', COMPARISON.LIKE, 'Help'))
+        self.check(True, ('track', COMPARISON.LIKE, 3))
+
+    def test_range(self):
+        self.check(True, ('track', COMPARISON.GT, 2))
+        self.check(True, ('track', COMPARISON.GTE, 3))
+        self.check(False, ('track', COMPARISON.LT, 3))
+        self.check(True, ('track', COMPARISON.LTE, 3))
+
+    def test_range_missing(self):
+        self.check(False, ('year', COMPARISON.GT, 1960))
+        self.check(False, ('track', COMPARISON.GT, None))
+        self.check(False, ('artist', COMPARISON.GT, 1))
+
+    def test_integerCoerced(self):
+        self.check(True, ('track', COMPARISON.EQUAL, '3'))
+
+    def test_all(self):
+        self.check(True, ('artist', COMPARISON.LIKE, 'beat'),
+                   ('track', COMPARISON.LT, 5))
+        self.check(False, ('artist', COMPARISON.LIKE, 'beat'),
+                   ('track', COMPARISON.GT, 5))
+
+    def test_any(self):
+        self.check(True, ('artist', COMPARISON.LIKE, 'stones'),
+                   ('track', COMPARISON.LT, 5), match=GROUP.ANY)
+        self.check(False, ('artist', COMPARISON.LIKE, 'stones'),
+                   ('track', COMPARISON.GT, 5), match=GROUP.ANY)
+
+    def test_none(self):
+        self.check(False, ('artist', COMPARISON.LIKE, 'stones'),
+                   ('track', COMPARISON.LT, 5), match=GROUP.NONE)
+        self.check(True, ('artist', COMPARISON.LIKE, 'stones'),
+                   ('track', COMPARISON.GT, 5), match=GROUP.NONE)
+
+    def test_nested(self):
+        test = target.compileConditions([
+            FilterCondition('track', COMPARISON.EQUAL, 3),
+            ConditionGroup(GROUP.ANY, [
+                FilterCondition('artist', COMPARISON.LIKE, 'stones'),
+                FilterCondition('artist', COMPARISON.LIKE, 'beatles')
+            ])
+        ])
+        self.assertTrue(test(self.tags))
+
+
+class TestWhereAction(unittest.TestCase):
+    def setUp(self):
+        import sys
+        with patch.object(sys, 'argv', ['test', 'in.json', 'out.json']):
+            self.options = configurationOptions('where')
+        self.snapshot = [
+            ('C:\\a.mp3', {'artist': 'The Beatles', 'track': 1}),
+            ('b.mp3', {'artist': 'The Rolling Stones', 'track': 2}),
+            ('c.mp3', {'artist': 'The Who', 'track': 3})
+        ]
+
+    def test_buildCondition_empty(self):
+        actual = list(target._buildCondition('artist', self.options))
+        self.assertEqual(actual, [])
+
+    def test_process_noConditions(self):
+        actual = target.process(self.options)
+        self.assertEqual(actual, 'No conditions specified.  Exiting')
+
+    def run_process(self, index=None):
+        module = 'pyTagger.actions.where.'
+        with patch(module + 'loadIndex') as loadIndex, \
+                patch(module + 'iterSnapshot') as iterSnapshot, \
+                patch(module + 'saveJsonIncrementalDict') as saveJson:
+            loadIndex.return_value = index
+            iterSnapshot.return_value = iter(self.snapshot)
+            output = saveJson.return_value
+            output.__next__ = Mock(return_value=0)
+            output.next = output.__next__
+
+            actual = target.process(self.options)
+
+        sent = [x[0][0][0] for x in output.send.call_args_list]
+        return actual, sent
+
+    def test_process(self):
+        self.options.artist = ['%the', '!The Who']
+        actual, sent = self.run_process()
+        self.assertEqual(sent, ['C:\\\\a.mp3', 'b.mp3'])
+        self.assertEqual(actual, 'Matched 2 files\nSkipped 1 files')
+
+    def test_process_index(self):
+        index = Mock()
+        index.__len__ = Mock(return_value=3)
+        index.candidates.return_value = set([1, 2])
+        index.fetch.return_value = iter(self.snapshot[1:])
+        self.options.artist = ['%the', '!The Who']
+
+        actual, sent = self.run_process(index)
+
+        index.fetch.assert_called_once_with(set([1, 2]))
+        self.assertEqual(sent, ['b.mp3'])
+        self.assertEqual(actual, 'Matched 1 files\nSkipped 2 files')
+
+    def test_process_any(self):
+        self.options.artist = ['=The Who']
+        self.options.track = ['<2']
+        self.options.any = True
+        _, sent = self.run_process()
+        self.assertEqual(sent, ['C:\\\\a.mp3', 'c.mp3'])
+
+    def test_process_invert(self):
+        self.options.artist = ['%the']
+        self.options.track = ['<3']
+        self.options.invert = True
+        _, sent = self.run_process()
+        self.assertEqual(sent, ['c.mp3'])
+
+    def test_process_invertAny(self):
+        self.options.artist = ['=The Who']
+        self.options.track = ['<2']
+        self.options.any = True
+        self.options.invert = True
+        _, sent = self.run_process()
+        self.assertEqual(sent, ['b.mp3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from pyTagger.models import Snapshot
+from pyTagger.models import ColumnarSnapshot, Snapshot
 from pyTagger.utils import configurationOptions
 from tests import *
 
@@ -55,5 +55,89 @@ class TestSnapshot(unittest.TestCase):
         self.assertEqual(actual, Snapshot.orderedAllColumns())
 
 
+class TestColumnarSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'b.mp3': {
+                'title': 'foo', 'album': 'Blue', 'track': 2, 'genre': None,
+                'comments': [{'lang': 'eng', 'description': '', 'text': 'x'}]
+            },
+            'a.mp3': {'title': 'bar', 'album': 'Blue', 'track': 1, 'zzz': 3},
+            'c.mp3': {'album': 'Red', 'track': 10}
+        }
+        self.target = ColumnarSnapshot(self.data)
+
+    def test_roundTrip(self):
+        self.assertEqual(len(self.target), 3)
+        self.assertTrue('a.mp3' in self.target)
+        self.assertEqual(dict(self.target.items()), self.data)
+
+    def test_getitem_isCopy(self):
+        self.target['a.mp3']['title'] = 'changed'
+        self.assertEqual(self.target['a.mp3']['title'], 'bar')
+
+    def test_add_replaces(self):
+        self.target.add('a.mp3', {'title': 'baz'})
+        self.assertEqual(len(self.target), 3)
+        self.assertEqual(self.target['a.mp3'], {'title': 'baz'})
+        self.assertEqual(self.target['c.mp3'], self.data['c.mp3'])
+
+    def test_add_replaces_inPlace(self):
+        self.target.add('c.mp3', {'album': None, 'track': 'ten', 'x': [1]})
+        self.target.add('d.mp3', {'album': 'Red'})
+
+        self.assertEqual(self.target.paths,
+                         ['b.mp3', 'a.mp3', 'c.mp3', 'd.mp3'])
+        self.assertEqual(self.target['c.mp3'],
+                         {'album': None, 'track': 'ten', 'x': [1]})
+        self.assertEqual(self.target['b.mp3'], self.data['b.mp3'])
+        self.assertEqual(self.target.distinct('album'), {'Blue', 'Red', None})
+
+    def test_missing_values_not_pooled(self):
+        target = ColumnarSnapshot([
+            ('a', {'title': None}),
+            ('b', {'album': 'x'}),
+            ('c', {'title': 'y'})
+        ])
+        self.assertEqual(target._columns['title'].pool, ['y'])
+        self.assertEqual(target._columns['album'].pool, ['x'])
+        self.assertEqual(target['a'], {'title': None})
+        self.assertEqual(target['c'], {'title': 'y'})
+
+    def test_columns(self):
+        expected = Snapshot.columnsFromSnapshot(self.data)
+        self.assertEqual(self.target.columns(), expected)
+        actual = Snapshot.columnsFromSnapshot(self.target)
+        self.assertEqual(actual, expected)
+
+    def test_column(self):
+        actual = sorted(self.target.column('title'))
+        self.assertEqual(actual, [('a.mp3', 'bar'), ('b.mp3', 'foo')])
+        self.assertEqual(list(self.target.column('nothing')), [])
+
+    def test_distinct(self):
+        self.assertEqual(self.target.distinct('album'), {'Blue', 'Red'})
+        self.assertEqual(self.target.distinct('track'), {1, 2, 10})
+        self.assertEqual(self.target.distinct('genre'), {None})
+        self.assertEqual(self.target.distinct('nothing'), set())
+        self.assertRaises(TypeError, self.target.distinct, 'comments')
+
+    def test_sortedPaths(self):
+        actual = self.target.sortedPaths('track')
+        self.assertEqual(actual, ['a.mp3', 'b.mp3', 'c.mp3'])
+        actual = self.target.sortedPaths('title', reverse=True)
+        self.assertEqual(actual, ['b.mp3', 'a.mp3', 'c.mp3'])
+
+    def test_mixedTypes(self):
+        target = ColumnarSnapshot([
+            ('a', {'track': 1, 'bpm': 'fast'}),
+            ('b', {'track': 'one', 'bpm': ['x']}),
+            ('c', {'track': 2 ** 70, 'bpm': None})
+        ])
+        self.assertEqual(target['a'], {'track': 1, 'bpm': 'fast'})
+        self.assertEqual(target['b'], {'track': 'one', 'bpm': ['x']})
+        self.assertEqual(target['c'], {'track': 2 ** 70, 'bpm': None})
+
+
 if __name__ == '__main__':
     unittest.main()
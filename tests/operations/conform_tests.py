@@ -6,9 +6,9 @@ from nose_parameterized import parameterized
 from tests import *
 from pyTagger.operations.conform import LibraryStandard
 try:
-    from unittest.mock import patch, Mock
+    from unittest.mock import patch
 except ImportError:
-    from mock import patch, Mock
+    from mock import patch
 
 
 class TestConform(unittest.TestCase):
@@ -151,11 +151,8 @@ class TestConform(unittest.TestCase):
         self.assertEqual(actual, {'subtitle': expected})
         self.assertEqual(actual, self.tags)
 
-    @patch('pyTagger.operations.conform.updateOne')
     @patch('pyTagger.operations.conform.fmap')
-    def test_processFile(self, fmap, updateOne):
-        self.target.reader = Mock(spec=['extractTags'])
-        self.target.reader.extractTags.return_value = {}
+    def test_conform(self, fmap):
         expected = [
             self.target.extractArtist,
             self.target.removeAnnotations,
@@ -166,10 +163,21 @@ class TestConform(unittest.TestCase):
             self.target.clearRating
         ]
 
-        self.target.processFile('/path/to/yasss')
+        actual = self.target.conform({})
 
         fmap.assert_called_with(expected, {})
-        self.assertEqual(updateOne.call_count, 1)
+        self.assertEqual(actual, fmap.return_value)
+
+    @patch('pyTagger.operations.conform.updateOne')
+    def test_processFile(self, updateOne):
+        updateOne.return_value = 'written'
+
+        actual = self.target.processFile('/path/to/yasss')
+
+        self.assertEqual(actual, 'written')
+        updateOne.assert_called_once_with(
+            self.target.reader, '/path/to/yasss', self.target.conform, True
+        )
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,8 +2,12 @@ from __future__ import unicode_literals
 import unittest
 import logging
 import json
+import os
+import shutil
+import tempfile
 import pyTagger.operations.find_duplicates as sut
 from pyTagger.proxies.es import Client
+from pyTagger.proxies.sqlite import SnapshotStore
 try:
     from unittest.mock import patch, Mock
 except ImportError:
@@ -36,6 +40,109 @@ class TestFindClones(unittest.TestCase):
             ('foo', 'baz')
         ])
 
+    def test_findClones_store(self):
+        store = Mock(SnapshotStore)
+        store.duplicates.return_value = iter([('foo', 'bar'), ('foo', 'baz')])
+
+        actual = list(sut.findClones(store))
+        store.duplicates.assert_called_once_with('fileHash')
+        self.assertEqual(actual, [('foo', 'bar'), ('foo', 'baz')])
+
+
+class TestGroupClones(unittest.TestCase):
+    def test_groupClones(self):
+        pairs = iter([
+            ('d', {'fileHash': 'h2'}),
+            ('a', {'fileHash': 'h1'}),
+            ('b', {'fileHash': 'h3'}),
+            ('c', {'fileHash': 'h1'}),
+            ('e', {'fileHash': 'h2'}),
+            ('f', {'fileHash': 'h1'}),
+            ('g', {'fileHash': ''}),
+            ('h', {'fileHash': ''}),
+            ('i', {}),
+            ('j', None)
+        ])
+        sizes = {'a': 10, 'c': 12, 'f': 11, 'd': 7}
+
+        actual = list(sut.groupClones(pairs, sizes.get))
+        self.assertEqual(actual, [
+            ('h1', ['a', 'c', 'f'], [10, 12, 11]),
+            ('h2', ['d', 'e'], [7, None])
+        ])
+        self.assertEqual(actual[0].size, 33)
+        self.assertEqual(actual[0].reclaimable, 21)
+        self.assertEqual(actual[1].reclaimable, 0)
+
+    def test_groupClones_noSizes(self):
+        pairs = [('a', {'fileHash': 'h'}), ('b', {'fileHash': 'h'})]
+        actual = list(sut.groupClones(pairs, lambda x: None))
+        self.assertEqual(actual[0].size, 0)
+        self.assertEqual(actual[0].reclaimable, 0)
+
+    def test_groupClones_fileSize(self):
+        actual = list(sut.groupClones([
+            (__file__, {'fileHash': 'h'}), ('missing.mp3', {'fileHash': 'h'})
+        ]))
+        self.assertIsNone(actual[0].sizes[1])
+        self.assertGreater(actual[0].sizes[0], 0)
+
+
+class TestGroupIdenticalFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.hashed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        fileName = os.path.join(self.directory, name)
+        with open(fileName, 'wb') as f:
+            f.write(data)
+        return fileName
+
+    def hasher(self, fileName, offset=0):
+        self.hashed.append(os.path.basename(fileName))
+        return sut.hashFile(fileName, offset)
+
+    def test_stages(self):
+        body = bytes(bytearray(range(256))) * 64
+        paths = [
+            self.write('a', body),
+            self.write('b', body),
+            self.write('c', body[:-1] + b'x'),
+            self.write('d', b'x' + body[1:]),
+            self.write('e', body[:8000] + b'x' + body[8001:]),
+            self.write('f', body + b'longer'),
+            os.path.join(self.directory, 'missing')
+        ]
+
+        actual = list(sut.groupIdenticalFiles(paths, hasher=self.hasher,
+                                              sampleSize=1024))
+
+        self.assertEqual(len(actual), 1)
+        self.assertEqual(actual[0].paths, paths[:2])
+        self.assertEqual(actual[0].sizes, [len(body)] * 2)
+        self.assertEqual(actual[0].fileHash,
+                         sut.hashFile(paths[0]).decode('ascii'))
+        # c, d and f never read in full, e only because its samples match
+        self.assertEqual(sorted(self.hashed), ['a', 'b', 'e'])
+
+    def test_offset(self):
+        paths = [
+            self.write('a.mp3', b'tag1' + b'audio'),
+            self.write('b.mp3', b'longer tag' + b'audio'),
+            self.write('c.mp3', b'tag2' + b'other')
+        ]
+        offsets = {paths[0]: 4, paths[1]: 10, paths[2]: 4}
+
+        actual = list(sut.groupIdenticalFiles(paths, offsets.get))
+
+        self.assertEqual(len(actual), 1)
+        self.assertEqual(actual[0].paths, paths[:2])
+        self.assertEqual(actual[0].sizes, [9, 15])
+
 
 class TestFindIsonoms(unittest.TestCase):
     def setUp(self):
@@ -243,5 +350,49 @@ class TestFindIsonoms(unittest.TestCase):
         self.assertEqual(len(actual), 1)
         self.assertEqual(actual[0].status, 'nothing')
 
+
+class TestFindIsonomsInBatches(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = {
+            'track{0:02d}'.format(i): {
+                'title': 'Title {0}'.format(i), 'album': 'Album', 'track': i
+            } for i in range(1, 24)
+        }
+        self.snapshot['track05'] = {'title': '', 'album': ''}
+        self.client = Mock(Client)
+        self.client.log = logging.getLogger(__name__)
+        self.client.search.side_effect = self.search
+        self.client.msearch.side_effect = self.msearch
+
+    def search(self, query):
+        track = query['query']['bool']['should'][0]['term']['track']
+        hits = [{
+            '_score': 12.5 if track % 3 else 8.0 + i,
+            '_source': {'path': '/library/{0}/{1}'.format(track, i),
+                        'title': 'Title', 'album': 'Album'}
+        } for i in range(track % 4)]
+        return {'hits': {'hits': hits, 'max_score': 0.0, 'total': 9999}}
+
+    def msearch(self, queries):
+        return [self.search(q) for q in queries]
+
+    def test_sameAsSerial(self):
+        expected = list(sut.findIsonoms(self.client, self.snapshot, 4))
+        actual = list(sut.findIsonoms(self.client, self.snapshot, 4,
+                                      batchSize=5, threads=3))
+        self.assertEqual(actual, expected)
+        self.assertEqual(self.client.msearch.call_count, 5)
+        self.assertEqual(
+            [x.status for x in actual if x.newPath == 'track05'],
+            ['insufficient']
+        )
+
+    def test_onlyInsufficient(self):
+        snapshot = {'foo': {}, 'bar': {}}
+        actual = list(sut.findIsonoms(self.client, snapshot, 4, batchSize=5))
+        self.assertEqual([x.status for x in actual],
+                         ['insufficient', 'insufficient'])
+        self.assertEqual(self.client.msearch.call_count, 0)
+
 if __name__ == '__main__':
     unittest.main()
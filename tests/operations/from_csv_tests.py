@@ -59,6 +59,14 @@ class TestParseStateMachine(unittest.TestCase):
             actual = list(self.target.parse('foo'))
         self.assertEqual(actual, expected)
 
+    def test_parse_acrossChunks(self):
+        s = 'a\t"b\n""c"""\td\r\n"e\tf"\tg\nno newline'
+        instream = io.StringIO('\ufeff' + s)
+        with patch.object(io, 'open') as fmocked:
+            fmocked.return_value = instream
+            actual = list(sut.Context(chunkSize=2).parse('foo'))
+        self.assertEqual(actual, [['a', 'b\n"c"', 'd'], ['e\tf', 'g']])
+
 
 class TestFromCsv(unittest.TestCase):
     def setUp(self):
@@ -1,6 +1,13 @@
 from __future__ import unicode_literals
 import unittest
+import os
+import shutil
+import tempfile
 import pyTagger.operations.hash as target
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
 
 
 class TestHash(unittest.TestCase):
@@ -8,5 +15,188 @@ class TestHash(unittest.TestCase):
         actual = target.hashFile('foo.mp3')
         self.assertEqual(actual, '')
 
+    def test_hashFile_matches_hashBuffer(self):
+        data = bytes(bytearray(range(256))) * 9000
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(data)
+        try:
+            for algorithm in ['sha1', 'md5']:
+                actual = target.hashFile(f.name, 100, algorithm)
+                expected = target.hashBuffer(data[100:], algorithm)
+                self.assertEqual(actual, expected)
+        finally:
+            os.remove(f.name)
+
+    def test_tagSize(self):
+        # 0x01 0x7f as a sync safe integer is 255
+        for data, expected in [
+            (b'ID3\x03\x00\x00\x00\x00\x01\x7f' + b'\x00' * 255, 255),
+            (b'\xff\xfb audio with no tag', 0),
+            (b'ID3', 0)
+        ]:
+            with tempfile.NamedTemporaryFile(delete=False) as f:
+                f.write(data)
+            try:
+                self.assertEqual(target.tagSize(f.name), expected)
+            finally:
+                os.remove(f.name)
+
+        self.assertEqual(target.tagSize('foo.mp3'), 0)
+
+    def test_hashFile_default_is_sha1(self):
+        data = b'audio' * 100
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(data)
+        try:
+            actual = target.hashFile(f.name)
+            self.assertEqual(actual, b'HPLNaLr9wh46fahb3KevyD5kpEQ=')
+        finally:
+            os.remove(f.name)
+
+    def test_newDigest_unknown(self):
+        with self.assertRaises(ValueError):
+            target.newDigest('foo')
+
+
+class TestHashCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'foo.mp3')
+        self.cacheName = os.path.join(self.directory, 'hashes.json')
+        self._write(b'TAG1' + b'audio' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, data, mtime=1000000000):
+        with open(self.fileName, 'wb') as f:
+            f.write(data)
+        os.utime(self.fileName, (mtime, mtime))
+
+    def test_matches_hashFile(self):
+        cache = target.HashCache()
+        actual = cache.hashFile(self.fileName, 4)
+        self.assertEqual(actual, target.hashFile(self.fileName, 4))
+
+    def test_badfile(self):
+        cache = target.HashCache()
+        actual = cache.hashFile('foo.mp3')
+        self.assertEqual(actual, '')
+        self.assertEqual(len(cache), 0)
+
+    @patch('pyTagger.operations.hash.hashFile', wraps=target.hashFile)
+    def test_unchanged_file_is_not_hashed(self, hashFile):
+        cache = target.HashCache()
+        expected = cache.hashFile(self.fileName, 4)
+        actual = cache.hashFile(self.fileName, 4)
+        self.assertEqual(actual, expected)
+        self.assertEqual(hashFile.call_count, 1)
+
+    @patch('pyTagger.operations.hash.hashFile', wraps=target.hashFile)
+    def test_new_tags_are_hashed(self, hashFile):
+        cache = target.HashCache()
+        expected = cache.hashFile(self.fileName, 4)
+
+        self._write(b'TAG2-longer' + b'audio' * 100, 1000000500)
+        actual = cache.hashFile(self.fileName, 11)
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(hashFile.call_count, 2)
+
+    @patch('pyTagger.operations.hash.hashSample')
+    def test_no_sample_by_default(self, hashSample):
+        cache = target.HashCache()
+        cache.hashFile(self.fileName, 4)
+        self._write(b'TAG2-longer' + b'audio' * 100, 1000000500)
+        cache.hashFile(self.fileName, 11)
+
+        hashSample.assert_not_called()
+
+    @patch('pyTagger.operations.hash.hashFile', wraps=target.hashFile)
+    def test_new_tags_same_audio_sampled(self, hashFile):
+        cache = target.HashCache(sampleAudio=True)
+        expected = cache.hashFile(self.fileName, 4)
+
+        self._write(b'TAG2-longer' + b'audio' * 100, 1000000500)
+        actual = cache.hashFile(self.fileName, 11)
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(hashFile.call_count, 1)
+
+    def test_same_size_edit_is_hashed(self):
+        cache = target.HashCache()
+        before = cache.hashFile(self.fileName, 4)
+
+        self._write(b'TAG1' + b'audio' * 50 + b'music' + b'audio' * 49,
+                    1000000500)
+        actual = cache.hashFile(self.fileName, 4)
+
+        self.assertNotEqual(actual, before)
+        self.assertEqual(actual, target.hashFile(self.fileName, 4))
+
+    def test_new_audio(self):
+        cache = target.HashCache()
+        before = cache.hashFile(self.fileName, 4)
+
+        self._write(b'TAG1' + b'music' * 100, 1000000500)
+        actual = cache.hashFile(self.fileName, 4)
+
+        self.assertNotEqual(actual, before)
+        self.assertEqual(actual, target.hashFile(self.fileName, 4))
+
+    def test_evicts_least_recently_used(self):
+        cache = target.HashCache(maxEntries=2)
+        cache.merge([
+            ['a', 1, 2, 0, 'x', 'y'],
+            ['b', 1, 2, 0, 'x', 'y'],
+        ])
+        cache.hashFile(self.fileName)
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn('a', cache._entries)
+
+    def test_save_and_load(self):
+        cache = target.HashCache(self.cacheName)
+        expected = cache.hashFile(self.fileName, 4)
+        cache.save()
+
+        actual = target.HashCache(self.cacheName)
+        self.assertEqual(len(actual), 1)
+        with patch('pyTagger.operations.hash.hashFile') as hashFile:
+            self.assertEqual(actual.hashFile(self.fileName, 4), expected)
+            hashFile.assert_not_called()
+
+    def test_hit_does_not_save(self):
+        cache = target.HashCache(self.cacheName)
+        cache.hashFile(self.fileName, 4)
+        cache.save()
+
+        actual = target.HashCache(self.cacheName)
+        actual.hashFile(self.fileName, 4)
+        with patch('pyTagger.operations.hash.saveJson') as saveJson:
+            actual.save()
+            saveJson.assert_not_called()
+
+    def test_other_algorithm_ignores_saved(self):
+        cache = target.HashCache(self.cacheName)
+        cache.hashFile(self.fileName, 4)
+        cache.save()
+
+        actual = target.HashCache(self.cacheName, algorithm='md5')
+        self.assertEqual(len(actual), 0)
+
+    def test_changes(self):
+        cache = target.HashCache()
+        cache.hashFile(self.fileName, 4)
+        changes = cache.changes()
+
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0][0], self.fileName)
+        self.assertEqual(cache.changes(), [])
+
+        other = target.HashCache()
+        other.merge(changes)
+        self.assertEqual(len(other), 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,7 @@ import io
 import os
 import shutil
 import sys
+import tempfile
 import pyTagger.operations.on_directory as target
 from collections import Counter
 from tests import *
@@ -44,7 +45,7 @@ class TestOnDirectory(unittest.TestCase):
         actual = list(target.walk('foo'))
 
         self.assertEqual(actual, expected)
-        innerWalk.assert_called_with('foo', target._filterMp3s)
+        innerWalk.assert_called_with('foo', target._filterMp3s, 1)
 
     @patch('pyTagger.operations.on_directory._walkDirectory')
     @patch('pyTagger.operations.on_directory.os')
@@ -57,10 +58,10 @@ class TestOnDirectory(unittest.TestCase):
         os.path.isfile.return_value = False
         innerWalk.return_value = expected
 
-        actual = list(target.walk('foo', filterFn))
+        actual = list(target.walk('foo', filterFn, 4))
 
         self.assertEqual(actual, expected)
-        innerWalk.assert_called_with('foo', filterFn)
+        innerWalk.assert_called_with('foo', filterFn, 4)
 
     @patch('pyTagger.operations.on_directory._walkFile')
     @patch('pyTagger.operations.on_directory.os')
@@ -90,7 +91,7 @@ class TestOnDirectory(unittest.TestCase):
         actual = list(target.walkAll('foo'))
 
         self.assertEqual(actual, expected)
-        innerWalk.assert_called_with('foo', target._filterAll)
+        innerWalk.assert_called_with('foo', target._filterAll, 1)
 
     @patch('pyTagger.operations.on_directory._walkFile')
     @patch('pyTagger.operations.on_directory.os')
@@ -133,6 +134,125 @@ class TestOnDirectory(unittest.TestCase):
     # -------------------------------------------------------------------------
     # Directory Functions
 
+    def noop_coroutine(self, outfile, compact):
+        for i in range(5):
+            k, v = yield i
+
+    @patch('pyTagger.operations.on_directory.saveJsonIncrementalDict')
+    @patch('pyTagger.operations.on_directory.walk')
+    def test_buildSnapshot(self, walk, saveJson):
+        reader = Mock()
+        reader.extractTags.side_effect = [{'a': 'b'}, None, {'c': 'd'}]
+        walk.return_value = ['foo', 'bar', 'baz']
+        saveJson.side_effect = self.noop_coroutine
+
+        actual = target.buildSnapshot('blah', 'out.json', reader)
+        self.assertEqual(actual, (2, 1))
+
+    @patch('pyTagger.operations.on_directory.parallelMap')
+    @patch('pyTagger.operations.on_directory.saveJsonIncrementalDict')
+    @patch('pyTagger.operations.on_directory.walk')
+    def test_buildSnapshot_workers(self, walk, saveJson, parallelMap):
+        reader = Mock()
+        reader.fieldSet = set(['title'])
+        walk.return_value = ['foo', 'bar']
+        saveJson.side_effect = self.noop_coroutine
+        parallelMap.return_value = [
+            ('foo', {'a': 'b'}, [['foo', 1, 2, 3, 'x', 'y']]),
+            ('bar', {}, [])
+        ]
+
+        actual = target.buildSnapshot('blah', 'out.json', reader, workers=4)
+        self.assertEqual(actual, (1, 1))
+        parallelMap.assert_called_once_with(
+            target._scanOne, ['foo', 'bar'], 4, target._initScanWorker,
+            (type(reader), ['title'])
+        )
+        reader.extractTags.assert_not_called()
+        reader.hashCache.merge.assert_any_call([['foo', 1, 2, 3, 'x', 'y']])
+        self.assertEqual(reader.hashCache.save.call_count, 1)
+
+    @patch('pyTagger.operations.on_directory.LibraryStandard')
+    @patch('pyTagger.operations.on_directory.walk')
+    def test_prepareForLibrary(self, walk, standard):
+        walk.return_value = ['foo', 'bar', 'baz']
+        process = standard.return_value.processFile
+        process.side_effect = ['written', 'rewritten', 'failed']
+
+        actual = target.prepareForLibrary('blah')
+
+        self.assertEqual(actual, {'written': 2, 'rewritten': 1,
+                                  'unchanged': 0, 'failed': 1})
+        self.assertEqual(standard.call_count, 1)
+        self.assertEqual(process.call_count, 3)
+
+    @patch('pyTagger.operations.on_directory.LibraryStandard')
+    @patch('pyTagger.operations.on_directory.parallelMap')
+    @patch('pyTagger.operations.on_directory.walk')
+    def test_prepareForLibrary_workers(self, walk, parallelMap, standard):
+        walk.return_value = ['foo', 'bar']
+        parallelMap.return_value = ['unchanged', 'written']
+
+        actual = target.prepareForLibrary('blah', 4)
+
+        self.assertEqual(actual['written'], 1)
+        self.assertEqual(actual['unchanged'], 1)
+        parallelMap.assert_called_once_with(
+            target._conformOne, ['foo', 'bar'], 4, target._initConformWorker
+        )
+        standard.assert_not_called()
+
+        target._initConformWorker()
+        standard.return_value.processFile.return_value = 'written'
+        self.assertEqual(target._conformOne('foo'), 'written')
+        standard.return_value.processFile.assert_called_once_with('foo')
+
+    @patch('pyTagger.operations.on_directory._fingerprint')
+    @patch('pyTagger.operations.on_directory._loadPrevious')
+    def test_planRescan(self, loadPrevious, fingerprint):
+        loadPrevious.return_value = (
+            {'foo': {'a': 'b'}, 'bar': {'c': 'd'}, 'baz': {'e': 'f'}},
+            {'foo': [1, 2.5, 3], 'bar': [1, 2.5, 3]}
+        )
+        fingerprint.side_effect = lambda x: [1, 2.5, 4 if x == 'bar' else 3]
+        report = Counter()
+
+        plan, current = target._planRescan(
+            ['foo', 'bar', 'qaz'], 'old.json', ['title'], report
+        )
+
+        self.assertEqual(plan, [
+            ('foo', {'a': 'b'}), ('bar', None), ('qaz', None)
+        ])
+        self.assertEqual(sorted(current), ['bar', 'foo', 'qaz'])
+        self.assertEqual(report, Counter(
+            reused=1, refreshed=1, added=1, removed=1
+        ))
+
+    @patch('pyTagger.operations.on_directory.saveJson')
+    @patch('pyTagger.operations.on_directory._planRescan')
+    @patch('pyTagger.operations.on_directory.saveJsonIncrementalDict')
+    @patch('pyTagger.operations.on_directory.walk')
+    def test_buildSnapshot_previous(self, walk, saveJson, plan, saveCache):
+        reader = Mock()
+        reader.fieldSet = ['title']
+        reader.extractTags.side_effect = lambda x: {'title': x}
+        saveJson.side_effect = self.noop_coroutine
+        plan.return_value = (
+            [('foo', {'title': 'old'}), ('bar', None), ('baz', None)],
+            {'foo': [1, 2, 3]}
+        )
+
+        actual = target.buildSnapshot(
+            'blah', 'out.json', reader, previous='out.json'
+        )
+
+        self.assertEqual(actual, (3, 0))
+        self.assertEqual(reader.extractTags.call_count, 2)
+        saveCache.assert_called_once_with('out.json.stat', {
+            'columns': ['title'], 'files': {'foo': [1, 2, 3]}
+        })
+
     @patch('pyTagger.operations.on_directory.hashFile')
     @patch('pyTagger.operations.on_directory.walkAll')
     def test_buildHashTable(self, walk, hashFile):
@@ -145,6 +265,17 @@ class TestOnDirectory(unittest.TestCase):
         for v in actual.values():
             self.assertEqual(v, 'qaz')
 
+    @patch('pyTagger.operations.on_directory.hashFile')
+    @patch('pyTagger.operations.on_directory.walkAll')
+    def test_buildHashTable_cached(self, walk, hashFile):
+        walk.return_value = ['foo', 'bar']
+        cache = Mock()
+        cache.hashFile.side_effect = ['123', '456']
+
+        actual = target.buildHashTable('blah', cache)
+        self.assertEqual(actual, {'123': 'foo', '456': 'bar'})
+        hashFile.assert_not_called()
+
     @patch('pyTagger.operations.on_directory.singleExtract')
     @patch('pyTagger.operations.on_directory.walk')
     @patch('pyTagger.operations.on_directory.os')
@@ -153,10 +284,13 @@ class TestOnDirectory(unittest.TestCase):
         walk.return_value = ['a']
         extract.return_value = Counter()
 
-        actual = target.extractImages('foo', 'bar', 'baz')
+        proxy = Mock()
+
+        actual = target.extractImages('foo', 'bar', proxy)
 
         os.path.exists.assert_called_with('bar')
         os.makedirs.assert_called_with('bar')
+        self.assertEqual(proxy.hashCache.save.call_count, 1)
         walk.assert_called_with('foo')
         self.assertEqual(extract.call_count, 1)
         self.assertEqual(actual, {})
@@ -171,11 +305,13 @@ class TestOnDirectory(unittest.TestCase):
         walk.return_value = ['a']
         extract.return_value = Counter()
 
-        actual = target.extractImages('foo', 'bar', 'baz')
+        proxy = Mock()
+
+        actual = target.extractImages('foo', 'bar', proxy)
 
         os.path.exists.assert_called_with('bar')
         os.makedirs.assert_not_called()
-        buildHash.assert_called_with('bar')
+        buildHash.assert_called_with('bar', proxy.hashCache)
         walk.assert_called_with('foo')
         self.assertEqual(extract.call_count, 1)
         self.assertEqual(actual, {})
@@ -253,6 +389,75 @@ class TestOnDirectory(unittest.TestCase):
         self.assertEqual(c['collisions'], 1)
 
 
+class TestWalkDirectory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        for parts in [('a.mp3',), ('b.txt',), ('x', 'c.mp3'),
+                      ('x', 'y', 'd.MP3'), ('x', 'z', 'e.mp3'), ('w', 'f.mp3'),
+                      ('v', 'u', 't', 'g.mp3')]:
+            fileName = os.path.join(self.directory, *parts)
+            if not os.path.exists(os.path.dirname(fileName)):
+                os.makedirs(os.path.dirname(fileName))
+            with open(fileName, 'w') as f:
+                f.write(fileName)
+
+    def legacyWalk(self):
+        return [
+            os.path.join(os.path.abspath(d), x)
+            for d, _, files in os.walk(self.directory)
+            for x in files
+            if target._filterMp3s(x)
+        ]
+
+    def test_walkDirectory_sameAsOsWalk(self):
+        actual = list(target._walkDirectory(self.directory,
+                                            target._filterMp3s))
+        self.assertEqual(actual, self.legacyWalk())
+        self.assertEqual(len(actual), 6)
+
+    def test_walkDirectory_threads(self):
+        actual = list(target._walkDirectory(self.directory,
+                                            target._filterMp3s, 4))
+        self.assertEqual(actual, self.legacyWalk())
+
+    def test_walkDirectory_entry(self):
+        seen = {}
+
+        def filterFn(fullPath, entry=None):
+            seen[fullPath] = entry.stat().st_size
+            return True
+        filterFn.usesEntry = True
+
+        actual = list(target._walkDirectory(self.directory, filterFn, 2))
+
+        self.assertEqual(len(actual), 7)
+        for fullPath in actual:
+            self.assertEqual(seen[fullPath], os.path.getsize(fullPath))
+
+    def test_walkDirectory_pathOnly(self):
+        def filterFn(fullPath):
+            return fullPath.lower().endswith('.mp3')
+
+        actual = list(target._walkDirectory(self.directory, filterFn))
+        self.assertEqual(actual, self.legacyWalk())
+
+    def test_walkDirectory_filterFails(self):
+        def filterFn(fullPath, entry=None):
+            raise OSError(fullPath)
+
+        with self.assertRaises(OSError):
+            list(target._walkDirectory(self.directory, filterFn, 2))
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'No symbolic links')
+    def test_walkDirectory_links(self):
+        os.symlink(os.path.join(self.directory, 'x'),
+                   os.path.join(self.directory, 'link'))
+        actual = list(target._walkDirectory(self.directory,
+                                            target._filterMp3s))
+        self.assertEqual(actual, self.legacyWalk())
+
+
 class TestOnDirectoryLive(unittest.TestCase):
     @unittest.skipUnless(sampleFilesExist, 'MP3 Files missing')
     def setUp(self):
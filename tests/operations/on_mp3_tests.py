@@ -8,9 +8,9 @@ import pyTagger.operations.on_mp3 as target
 from pyTagger.proxies.id3 import ID3Proxy
 from tests import *
 try:
-    from unittest.mock import patch
+    from unittest.mock import patch, Mock
 except ImportError:
-    from mock import patch
+    from mock import patch, Mock
 
 IMAGES_DIRECTORY = os.path.join(RESULT_DIRECTORY, r'images')
 
@@ -85,7 +85,148 @@ class TestOnMp3s(unittest.TestCase):
         instance.extractTagsFromTrack.side_effect = IOError
 
         actual = target.updateOne(instance, 'foo.mp3', {})
-        self.assertEqual(actual, 0)
+        self.assertEqual(actual, 'failed')
+
+
+class TestUpdate(unittest.TestCase):
+    def setUp(self):
+        self.reader = Mock()
+        self.reader.fieldSet = set(['title'])
+        self.reader.extractTagsFromTrack.return_value = {'title': 'foo'}
+        self.reader.needsSave.side_effect = lambda t, d, u: bool(d) or u
+        self.reader.saveID3.return_value = False
+
+    def test_updateOne_written(self):
+        actual = target.updateOne(self.reader, 'foo.mp3', {'title': 'bar'})
+        self.assertEqual(actual, 'written')
+        self.reader.saveID3.assert_called_once_with(
+            self.reader.loadID3.return_value, {'title': 'bar'}, False
+        )
+
+    def test_updateOne_unchanged(self):
+        actual = target.updateOne(self.reader, 'foo.mp3', {'title': 'foo'})
+        self.assertEqual(actual, 'unchanged')
+        self.reader.saveID3.assert_not_called()
+
+    def test_updateOne_upgrade(self):
+        actual = target.updateOne(self.reader, 'foo.mp3', {'title': 'foo'},
+                                  True)
+        self.assertEqual(actual, 'written')
+        self.reader.saveID3.assert_called_once_with(
+            self.reader.loadID3.return_value, {}, True
+        )
+
+    def test_updateOne_rewritten(self):
+        self.reader.saveID3.return_value = True
+        actual = target.updateOne(self.reader, 'foo.mp3', {'title': 'bar'})
+        self.assertEqual(actual, 'rewritten')
+
+    def test_updateOne_function(self):
+        self.reader.tagOnly = True
+        self.reader.extractTagsFromTrack.side_effect = [
+            {'title': 'foo', 'artist': 'bar'},
+            {'title': 'foo', 'artist': 'bar'}
+        ]
+        seen = []
+
+        def conform(tags):
+            seen.append(dict(tags))
+            tags['title'] = 'baz'
+            return tags
+
+        actual = target.updateOne(self.reader, 'foo.mp3', conform)
+
+        self.assertEqual(actual, 'written')
+        self.assertEqual(seen, [{'title': 'foo', 'artist': 'bar'}])
+        self.reader.loadID3.assert_called_once_with('foo.mp3', True)
+        self.reader.saveID3.assert_called_once_with(
+            self.reader.loadID3.return_value, {'title': 'baz'}, False
+        )
+
+    def test_updateOne_noTrack(self):
+        self.reader.loadID3.return_value = None
+        actual = target.updateOne(self.reader, 'foo.mp3', {'title': 'bar'})
+        self.assertEqual(actual, 'failed')
+
+    def test_updateFromSnapshot(self):
+        self.reader.saveID3.side_effect = [False, IOError, True]
+        snapshot = {
+            'a.mp3': {'title': 'bar'},
+            'b.mp3': {'title': 'foo'},
+            'c.mp3': {'title': 'baz'},
+            'd.mp3': {'title': 'qux'}
+        }
+        actual = target.updateFromSnapshot(self.reader, snapshot)
+        self.assertEqual(actual, {'written': 2, 'rewritten': 1,
+                                  'unchanged': 1, 'failed': 1})
+
+    def test_formatTally(self):
+        c = target.tallyUpdates(['written', 'rewritten', 'failed'])
+        self.assertEqual(target.formatTally(c), 'Written 2\n'
+                         'Rewritten in full 1\nUnchanged 0\nFailed 1')
+
+    @patch('pyTagger.operations.on_mp3.parallelMap')
+    def test_updateFromSnapshot_workers(self, parallelMap):
+        parallelMap.return_value = ['written', 'failed', 'rewritten']
+        snapshot = [('a.mp3', {}), ('b.mp3', {}), ('c.mp3', {})]
+
+        actual = target.updateFromSnapshot(self.reader, snapshot, True, 4)
+
+        self.assertEqual(actual, {'written': 2, 'rewritten': 1,
+                                  'unchanged': 0, 'failed': 1})
+        parallelMap.assert_called_once_with(
+            target._runWorker, snapshot, 4, target._initUpdateWorker,
+            (target._updatePair, type(self.reader), ['title'], True)
+        )
+        self.reader.loadID3.assert_not_called()
+
+    def test_updateOne_worker(self):
+        readerType = Mock(return_value=self.reader)
+        target._initUpdateWorker(target._updatePair, readerType, ['title'],
+                                 True)
+        readerType.assert_called_once_with(['title'])
+
+        actual = target._runWorker(('foo.mp3', {'title': 'foo'}))
+
+        self.assertEqual(actual, 'written')
+        self.reader.saveID3.assert_called_once_with(
+            self.reader.loadID3.return_value, {}, True
+        )
+
+    def test_planOne_written(self):
+        self.reader.projectSave.return_value = 2048, False
+        actual = target.planOne(self.reader, 'foo.mp3', {'title': 'bar'})
+        self.assertEqual(actual, {
+            'status': 'written', 'delta': {'title': 'bar'}, 'bytes': 2048
+        })
+        self.reader.saveID3.assert_not_called()
+
+    def test_planOne_rewritten(self):
+        self.reader.projectSave.return_value = 4000000, True
+        actual = target.planOne(self.reader, 'foo.mp3', {'title': 'bar'})
+        self.assertEqual(actual['status'], 'rewritten')
+        self.assertEqual(actual['bytes'], 4000000)
+
+    def test_planOne_unchanged(self):
+        actual = target.planOne(self.reader, 'foo.mp3', {'title': 'foo'})
+        self.assertEqual(actual, {'status': 'unchanged', 'delta': {},
+                                  'bytes': 0})
+        self.reader.projectSave.assert_not_called()
+
+    def test_planOne_failed(self):
+        self.reader.loadID3.return_value = None
+        actual = target.planOne(self.reader, 'foo.mp3', {'title': 'bar'})
+        self.assertEqual(actual['status'], 'failed')
+        self.assertIn('no ID3 tag', actual['error'])
+
+    def test_planFromSnapshot(self):
+        self.reader.projectSave.return_value = 100, False
+        snapshot = {'b.mp3': {'title': 'foo'}, 'a.mp3': {'title': 'bar'}}
+        actual = list(target.planFromSnapshot(self.reader, snapshot))
+        self.assertEqual([k for k, _ in actual], ['a.mp3', 'b.mp3'])
+        self.assertEqual(actual[0][1]['bytes'], 100)
+        self.assertEqual(actual[1][1]['status'], 'unchanged')
+        self.reader.saveID3.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+import unittest
+import pyTagger.operations.snapshot_index as target
+from pyTagger.models import COMPARISON, FilterCondition
+from pyTagger.utils import saveJson
+
+
+class TestSnapshotIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.snapshot = {
+            'C:\\foo%d.mp3' % i: {
+                'title': 'T\u00e9l\u00e9popmusik %d' % i,
+                'artist': 'The Beatles' if i % 2 else 'The Who',
+                'track': i,
+                'year': '19%d0' % (i % 5 + 5),
+                'bpm': i if i != 3 else 'fast',
+                'comments': [{'lang': 'eng', 'text': 'x', 'description': ''}]
+            } for i in range(10)
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, extension='.json'):
+        fileName = os.path.join(self.directory, 'foo' + extension)
+        saveJson(fileName, self.snapshot)
+        self.assertEqual(target.buildIndex(fileName), 10)
+        return fileName
+
+    def query(self, index, *conditions):
+        rows = index.candidates([FilterCondition(*c) for c in conditions])
+        if rows is None:
+            return None
+        return sorted(k for k, _ in index.fetch(rows))
+
+    def check_queries(self, extension):
+        index = target.loadIndex(self.build(extension))
+        self.assertEqual(len(index), 10)
+
+        actual = self.query(index, ('artist', COMPARISON.EQUAL, 'The Who'),
+                            ('track', COMPARISON.LT, 5))
+        self.assertEqual(actual, ['C:\\foo0.mp3', 'C:\\foo2.mp3',
+                                  'C:\\foo4.mp3'])
+
+        actual = self.query(index, ('title', COMPARISON.LIKE, 'popmusik 7'))
+        self.assertEqual(actual, ['C:\\foo7.mp3'])
+
+        actual = self.query(index, ('year', COMPARISON.GTE, '1980'))
+        self.assertEqual(actual, ['C:\\foo3.mp3', 'C:\\foo4.mp3',
+                                  'C:\\foo8.mp3', 'C:\\foo9.mp3'])
+
+        actual = self.query(index, ('title', COMPARISON.LIKE, 'BEATLES'))
+        self.assertEqual(actual, [])
+
+    def test_json(self):
+        self.check_queries('.json')
+
+    def test_binary(self):
+        self.check_queries('.snap')
+
+    def test_fetch_tags(self):
+        fileName = self.build()
+        index = target.loadIndex(fileName)
+        actual = dict(index.fetch(index.candidates([
+            FilterCondition('track', COMPARISON.EQUAL, '3')
+        ])))
+        expected = {'C:\\foo3.mp3': self.snapshot['C:\\foo3.mp3']}
+        self.assertEqual(actual, expected)
+
+    def test_notIndexed(self):
+        index = target.loadIndex(self.build())
+        self.assertIsNone(self.query(index, ('bpm', COMPARISON.EQUAL, 3)))
+        self.assertIsNone(self.query(index, ('artist', COMPARISON.NOT, 'x')))
+        self.assertIsNone(self.query(index, ('track', COMPARISON.LIKE, 1)))
+        self.assertIsNone(self.query(index, ('artist', COMPARISON.EQUAL,
+                                             None)))
+
+    def test_loadIndex_missing(self):
+        fileName = os.path.join(self.directory, 'foo.json')
+        saveJson(fileName, self.snapshot)
+        self.assertIsNone(target.loadIndex(fileName))
+
+    def test_loadIndex_stale(self):
+        fileName = self.build()
+        del self.snapshot['C:\\foo1.mp3']
+        saveJson(fileName, self.snapshot)
+        stats = os.stat(fileName)
+        os.utime(fileName, (stats.st_atime, stats.st_mtime + 10))
+        self.assertIsNone(target.loadIndex(fileName))
+
+    def test_buildIndex_sqlite(self):
+        with self.assertRaises(ValueError):
+            target.buildIndex('foo.sqlite')
+
+if __name__ == '__main__':
+    unittest.main()
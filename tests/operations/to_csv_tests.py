@@ -4,6 +4,7 @@ import io
 import os
 import sys
 import pyTagger.operations.to_csv as target
+from pyTagger.models import ColumnarSnapshot
 from nose_parameterized import parameterized
 try:
     from unittest.mock import patch
@@ -70,7 +71,9 @@ class TestToCsv(unittest.TestCase):
         ('a\nb', '"a\nb"'),
         ('a\rb', '"a\rb"'),
         ('a\r\nb', '"a\r\nb"'),
+        ('a\tb', '"a\tb"'),
         (123, '123'),
+        (['a,b'], "['a,b']"),
         (None, '')
     ])
     def test_encapsulate(self, field, expected):
@@ -86,6 +89,12 @@ class TestToCsv(unittest.TestCase):
             'ufid\u2027DJTagger', 'ufid\u2027Echonest'
         ])
 
+    def test_listFlattenedColumns_columnar(self):
+        snapshot = ColumnarSnapshot(self.snapshot)
+        actual = target.listFlattenedColumns(snapshot)
+        expected = target.listFlattenedColumns(self.snapshot)
+        self.assertEqual(actual, expected)
+
     def test_writeCsv(self):
         output = FakeFile()
         with patch.object(io, 'open') as fmocked:
@@ -102,5 +111,47 @@ class TestToCsv(unittest.TestCase):
 
         output.close()
 
+    def test_writeCsv_iterable(self):
+        columns = target.listFlattenedColumns(iter(self.snapshot.items()))
+        pairs = iter(sorted(self.snapshot.items()))
+
+        output = FakeFile()
+        with patch.object(io, 'open') as fmocked:
+            fmocked.return_value = output
+            target.writeCsv(pairs, 'foo.txt', True, columns)
+
+        rows = list(output)
+        self.assertEqual(len(rows), len(self.snapshot) + 1)
+        for r in rows:
+            self.assertEqual(len(r.split('\t')), 12)
+        self.assertEqual(len(columns), 11)
+
+        output.close()
+
+    def test_writeCsv_stream(self):
+        expected = FakeFile()
+        with patch.object(io, 'open') as fmocked:
+            fmocked.return_value = expected
+            target.writeCsv(self.snapshot, 'foo.txt')
+
+        # no columns, so the stream is spooled to a real temporary file
+        pairs = iter(sorted(self.snapshot.items()))
+        output = FakeFile()
+        realOpen = io.open
+
+        def fakeOpen(name, *args, **kwargs):
+            if name == 'foo.txt':
+                return output
+            return realOpen(name, *args, **kwargs)
+
+        with patch.object(io, 'open', side_effect=fakeOpen):
+            target.writeCsv(pairs, 'foo.txt')
+
+        self.assertEqual(output.getvalue(), expected.getvalue())
+        self.assertNotIn('fullPath', self.snapshot['path/one'])
+
+        output.close()
+        expected.close()
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,30 @@
+import json
+import threading
 import unittest
 from pyTagger.proxies.es import Client
-from elasticsearch import ConnectionError, RequestError
+from elasticsearch import ConnectionError, TransportError
+from elasticsearch.serializer import JSONSerializer
 try:
     from unittest.mock import patch, Mock
 except ImportError:
     from mock import patch, Mock
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+
+def _bulkItems(body, failOn=None):
+    lines = body.strip().split('\n')
+    items = []
+    for action, doc in zip(lines[::2], lines[1::2]):
+        doc = json.loads(doc)
+        if doc['path'] == failOn:
+            item = {'status': 400, 'error': 'MapperParsingException'}
+        else:
+            item = {'status': 201, '_id': doc['path']}
+        items.append({list(json.loads(action))[0]: item})
+    return {'took': 1, 'errors': False, 'items': items}
 
 
 class TestElasticsearchClient(unittest.TestCase):
@@ -14,8 +34,14 @@ class TestElasticsearchClient(unittest.TestCase):
         args = ['test', '--es-index', 'foo', '--es-type', 'bar']
         with patch.object(sys, 'argv', args):
             self.target = Client()
-            self.target.es.create = Mock(return_value={'created': True})
+            self.target.es.transport.serializer = JSONSerializer()
+            self.target.es.bulk = Mock(side_effect=self.bulk)
+            self.target.es.indices.get_settings.return_value = {}
             self.snapshot = {'foo': {'bar': 'baz'}}
+            self.failOn = None
+
+    def bulk(self, body, **kwargs):
+        return _bulkItems(body, self.failOn)
 
     def test_exists(self):
         self.target.exists()
@@ -37,6 +63,32 @@ class TestElasticsearchClient(unittest.TestCase):
         data = {k: {'baz': 'qaz'} for k in range(1, 1002)}
         actual = self.target.load(data)
         self.assertEqual(actual, (1001, 0))
+        self.assertEqual(self.target.es.bulk.call_count, 3)
+        _, kwargs = self.target.es.bulk.call_args
+        self.assertEqual(kwargs, {'index': 'foo', 'doc_type': 'bar'})
+
+    def test_load_batchSize(self):
+        self.target.batchSize = 10
+        data = {k: {'baz': 'qaz'} for k in range(1, 101)}
+        actual = self.target.load(data)
+        self.assertEqual(actual, (100, 0))
+        self.assertEqual(self.target.es.bulk.call_count, 10)
+
+    def test_load_refresh(self):
+        self.target.es.indices.get_settings.return_value = {
+            'foo': {'settings': {'index': {'refresh_interval': '30s'}}}
+        }
+        self.target.load(self.snapshot)
+        calls = self.target.es.indices.put_settings.call_args_list
+        self.assertEqual([c[1]['body'] for c in calls], [
+            {'index': {'refresh_interval': '-1'}},
+            {'index': {'refresh_interval': '30s'}}
+        ])
+
+    def test_load_iterator(self):
+        data = iter([('foo', {'baz': 'qaz'}), ('bar', {'baz': 'qaz'})])
+        actual = self.target.load(data)
+        self.assertEqual(actual, (2, 0))
 
     def test_load_null_input(self):
         with self.assertRaises(TypeError):
@@ -65,12 +117,27 @@ class TestElasticsearchClient(unittest.TestCase):
             self.target.load(self.snapshot)
 
     def test_load_bad_document(self):
-        def raiseRequestError(*args, **kwargs):
-            raise RequestError(400, 'error', {'a': 'b'})
+        self.failOn = 'bar'
+        data = {'foo': {'baz': 'qaz'}, 'bar': {'baz': 'qaz'}}
+        with patch.object(self.target.log, 'warning') as warning:
+            actual = self.target.load(data)
+        self.assertEqual(actual, (1, 1))
+        warning.assert_called_once_with("'%s' could not be loaded %s",
+                                        'bar', 'MapperParsingException')
 
-        self.target.es.create = Mock(side_effect=raiseRequestError)
-        actual = self.target.load(self.snapshot)
-        self.assertEqual(actual, (0, 1))
+    def test_load_bad_request(self):
+        error = TransportError(413, 'Request Entity Too Large')
+        self.target.es.bulk = Mock(side_effect=error)
+        data = {'foo': {'baz': 'qaz'}, 'bar': {'baz': 'qaz'}}
+        actual = self.target.load(data)
+        self.assertEqual(actual, (0, 2))
+
+    def test_load_connection_lost(self):
+        self.target.es.bulk = Mock(side_effect=ConnectionError(
+            'N/A', 'lost', IOError()))
+        with self.assertRaises(ConnectionError):
+            self.target.load(self.snapshot)
+        self.assertEqual(self.target.es.indices.put_settings.call_count, 2)
 
     def test_load_ufid_has_dots(self):
         data = {
@@ -80,12 +147,12 @@ class TestElasticsearchClient(unittest.TestCase):
         }
         actual = self.target.load(data)
         self.assertEqual(actual, (1, 0))
-        self.target.es.create.assert_called_once_with(
-            index='foo', doc_type='bar', body={
-                'path': 'foo',
-                'ufid': {'http://musicbrainz_org': 'bar'}
-            }
-        )
+        body = self.target.es.bulk.call_args[0][0].splitlines()
+        self.assertEqual(json.loads(body[0]), {'create': {}})
+        self.assertEqual(json.loads(body[1]), {
+            'path': 'foo',
+            'ufid': {'http://musicbrainz_org': 'bar'}
+        })
 
     def test_replaceDots(self):
         data = {
@@ -109,6 +176,23 @@ class TestElasticsearchClient(unittest.TestCase):
             index='foo', doc_type='bar', body=data
         )
 
+    def test_msearch(self):
+        expected = [{'hits': {'hits': []}}, {'hits': {'hits': []}}]
+        self.target.es.msearch = Mock(return_value={'responses': expected})
+
+        actual = self.target.msearch([{'a': 1}, {'b': 2}])
+        self.assertEqual(actual, expected)
+        self.target.es.msearch.assert_called_once_with(
+            index='foo', doc_type='bar', body=[{}, {'a': 1}, {}, {'b': 2}]
+        )
+
+    def test_msearch_error(self):
+        self.target.es.msearch = Mock(return_value={'responses': [
+            {'hits': {'hits': []}}, {'error': 'SearchPhaseExecutionException'}
+        ]})
+        with self.assertRaises(TransportError):
+            self.target.msearch([{'a': 1}, {'b': 2}])
+
     def test_delete(self):
         self.target.es.indices.delete = Mock(return_value={
             'acknowledged': True
@@ -119,5 +203,71 @@ class TestElasticsearchClient(unittest.TestCase):
             index='foo'
         )
 
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Answers the few requests that :meth:`Client.load` makes"""
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=None):
+        data = json.dumps(body or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def readBody(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length).decode('utf-8')
+
+    def do_HEAD(self):
+        self.reply(200)
+
+    def do_GET(self):
+        self.reply(200, {'foo': {'settings': self.server.settings}})
+
+    def do_PUT(self):
+        self.server.settings = json.loads(self.readBody())
+        self.server.refresh.append(
+            self.server.settings['index']['refresh_interval']
+        )
+        self.reply(200, {'acknowledged': True})
+
+    def do_POST(self):
+        self.server.paths.append(self.path)
+        self.reply(200, _bulkItems(self.readBody(), 'bad'))
+
+
+class TestElasticsearchBulkLoad(unittest.TestCase):
+    def setUp(self):
+        import sys
+        self.server = HTTPServer(('127.0.0.1', 0), _StandInHandler)
+        self.server.settings = {'index': {'refresh_interval': '5s'}}
+        self.server.refresh = []
+        self.server.paths = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        host = '127.0.0.1:{0}'.format(self.server.server_port)
+        args = ['test', '--es-host', host, '--es-index', 'foo',
+                '--es-type', 'bar', '--es-batch-size', '7']
+        with patch.object(sys, 'argv', args):
+            self.target = Client()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_load(self):
+        data = iter([('track{0}'.format(i), {'title': str(i)})
+                     for i in range(50)] + [('bad', {'title': 'bad'})])
+        actual = self.target.load(data)
+        self.assertEqual(actual, (50, 1))
+        self.assertEqual(self.server.paths, ['/foo/bar/_bulk'] * 8)
+        self.assertEqual(self.server.refresh, ['-1', '5s'])
+
 if __name__ == '__main__':
     unittest.main()
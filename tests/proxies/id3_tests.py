@@ -2,8 +2,10 @@ from __future__ import unicode_literals
 import unittest
 import itertools
 import pyTagger.proxies.id3 as sut
+import eyed3.id3
 import random
 import shutil
+import tempfile
 from tests import *
 from contextlib import contextmanager
 from pyTagger.models import Snapshot
@@ -11,9 +13,9 @@ from pyTagger.operations.hash import hashBuffer, hashFile
 from pyTagger.utils import generateUfid
 
 try:
-    from unittest.mock import Mock, patch
+    from unittest.mock import MagicMock, Mock, patch
 except ImportError:
-    from mock import Mock, patch
+    from mock import MagicMock, Mock, patch
 
 SANDBOX_DIRECTORY = os.path.join(RESULT_DIRECTORY, 'mp3s')
 
@@ -41,6 +43,88 @@ def buildFormula():
     return title
 
 
+def buildTrack():
+    tag = eyed3.id3.Tag()
+    tag.artist = 'Young MC'
+    tag.album = 'Stone Cold Rhymin\''
+    tag.title = 'Bust A Move'
+    tag.track_num = (1, 12)
+    tag.disc_num = (1, 1)
+    tag.setTextFrame('TCOM', 'Matt Dike')
+    tag.setTextFrame('TMED', 'DIG')
+    tag.comments.set('Nice', '', 'eng')
+
+    track = sut.TagOnlyAudioFile.__new__(sut.TagOnlyAudioFile)
+    track._tag = tag
+    track._info = None
+    return track
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.track = buildTrack()
+        self.fields = ['artist', 'composer', 'media', 'barcode', 'track',
+                       'totalTrack', 'disc', 'comments']
+
+    def legacy(self, fields):
+        projection = sut.ID3Proxy._projection
+        return dict((k, projection[k](self.track)) for k in fields)
+
+    def test_plan_groups_columns(self):
+        target = sut.ProjectionPlan(self.fields, sut.ID3Proxy._projection)
+
+        self.assertEqual(
+            [k for k, _ in target.textFrames], ['composer', 'media', 'barcode']
+        )
+        self.assertEqual(
+            target.numbers,
+            [('track_num', [('track', 0), ('totalTrack', 1)]),
+             ('disc_num', [('disc', 0)])]
+        )
+        self.assertEqual([k for k, _ in target.computed],
+                         ['artist', 'comments'])
+
+    def test_plan_matches_projection(self):
+        target = sut.ProjectionPlan(self.fields, sut.ID3Proxy._projection)
+        self.assertEqual(target(self.track), self.legacy(self.fields))
+
+    def test_plan_all_columns(self):
+        fields = [x for x in sut.ID3Proxy.columns if x != 'genre']
+        target = sut.ProjectionPlan(fields, sut.ID3Proxy._projection)
+        self.assertEqual(target(self.track), self.legacy(fields))
+
+    def test_lazyRow(self):
+        projection = {'artist': Mock(return_value='a'),
+                      'title': Mock(return_value='t')}
+        target = sut.LazyRow(self.track, ['artist', 'title'], projection)
+
+        self.assertEqual(target['artist'], 'a')
+        self.assertEqual(target['artist'], 'a')
+        projection['artist'].assert_called_once_with(self.track)
+        projection['title'].assert_not_called()
+
+        self.assertEqual(len(target), 2)
+        self.assertEqual(sorted(target.keys()), ['artist', 'title'])
+        self.assertEqual(dict(target), {'artist': 'a', 'title': 't'})
+        with self.assertRaises(KeyError):
+            target['album']
+
+    def test_extractTagsFromTrack(self):
+        target = sut.ID3Proxy(self.fields)
+        self.assertEqual(target.extractTagsFromTrack(self.track),
+                         self.legacy(self.fields))
+
+    def test_extractTagsFromTrack_lazy(self):
+        target = sut.ID3Proxy(self.fields)
+        actual = target.extractTagsFromTrack(self.track, lazy=True)
+        self.assertIsInstance(actual, sut.LazyRow)
+        self.assertEqual(dict(actual), self.legacy(self.fields))
+
+    def test_extractTagsFromTrack_notTrack(self):
+        target = sut.ID3Proxy(self.fields)
+        self.assertEqual(target.extractTagsFromTrack(None, lazy=True), {})
+
+
 class TestID3Proxy(unittest.TestCase):
     def setUp(self):
         self.target = sut.ID3Proxy()
@@ -50,6 +134,43 @@ class TestID3Proxy(unittest.TestCase):
         missing = set(self.target.columns) - set(columns)
         assert not missing
 
+    def test_tagOnly(self):
+        self.assertFalse(self.target.tagOnly)
+        self.assertFalse(sut.ID3Proxy(Snapshot.basic).tagOnly)
+        self.assertFalse(sut.ID3Proxy(Snapshot.mp3Info).tagOnly)
+        self.assertTrue(sut.ID3Proxy(['title', 'artist', 'fileHash']).tagOnly)
+
+    @patch('pyTagger.proxies.id3.eyed3.load')
+    @patch('pyTagger.proxies.id3.TagOnlyAudioFile')
+    def test_loadID3_tagOnly(self, tagOnlyFile, load):
+        actual = self.target.loadID3('foo.mp3', True)
+        self.assertEqual(actual, tagOnlyFile.return_value)
+        tagOnlyFile.assert_called_once_with('foo.mp3')
+        load.assert_not_called()
+
+    @patch('pyTagger.proxies.id3.TagOnlyAudioFile')
+    def test_loadID3_tagOnly_badfile(self, tagOnlyFile):
+        tagOnlyFile.side_effect = IOError
+        actual = self.target.loadID3('foo.mp3', True)
+        self.assertEqual(actual, None)
+
+    def test_extractTags_tagOnly(self):
+        self.target = sut.ID3Proxy(['title'])
+        self.target.loadID3 = Mock(return_value=None)
+        self.target.extractTags('foo.mp3')
+        self.target.loadID3.assert_called_once_with('foo.mp3', True)
+
+    @unittest.skipUnless(sampleFilesExist, 'MP3 Files missing')
+    def test_extract_tagOnly(self):
+        fileName = os.path.join(SOURCE_DIRECTORY, '01 - Bust A Move.mp3')
+
+        full = self.target.extractTags(fileName)
+        self.target = sut.ID3Proxy(['title', 'artist', 'track', 'fileHash'])
+        row = self.target.extractTags(fileName)
+
+        for k, v in row.items():
+            self.assertEqual(v, full[k], k)
+
     @unittest.skipUnless(sampleFilesExist, 'MP3 Files missing')
     def test_extractImages(self):
         fileName = os.path.join(SOURCE_DIRECTORY, '08 - Aeroplane.mp3')
@@ -172,6 +293,102 @@ class TestID3Proxy(unittest.TestCase):
         self.assertNotEqual(hash1, hash2)
 
 
+class TestSaveID3(unittest.TestCase):
+    def setUp(self):
+        self.target = sut.ID3Proxy(['title'])
+        self.track = buildTrack()
+
+    def test_needsSave(self):
+        self.track.tag.version = (2, 4, 0)
+        self.assertTrue(self.target.needsSave(self.track, {'title': 'x'}))
+        self.assertFalse(self.target.needsSave(self.track, {}))
+        self.assertFalse(self.target.needsSave(self.track, {}, True))
+
+    def test_needsSave_compliance(self):
+        self.track.tag.version = (2, 2, 0)
+        self.assertTrue(self.target.needsSave(self.track, {}))
+
+        self.track.tag.version = (1, 1, 0)
+        self.assertFalse(self.target.needsSave(self.track, {}))
+        self.assertTrue(self.target.needsSave(self.track, {}, True))
+
+        self.track.tag.version = (2, 3, 0)
+        self.assertFalse(self.target.needsSave(self.track, {}))
+        self.track.tag.setTextFrame('TMOO', 'Happy')
+        self.assertTrue(self.target.needsSave(self.track, {}))
+
+    def buildMock(self, fileName, rewrite):
+        track = MagicMock()
+        track.tag.version = (2, 3, 0)
+        track.tag.isV2.return_value = True
+        track.tag.file_info.name = fileName
+        # Stale, the file says 1000
+        track.tag.file_info.tag_size = 1200
+        track.tag.frame_set.getAllFrames.return_value = []
+
+        def render(version, current, maxPadding):
+            # The frames take 900 bytes, the rest is padding
+            return (rewrite and current == 1000, b'T' * 900,
+                    b'\0' * (current - 900))
+        track.tag._render.side_effect = render
+        return track
+
+    def writeFile(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        fileName = os.path.join(directory, 'foo.mp3')
+
+        # A 1000 byte tag, 990 after the header, then the audio
+        with open(fileName, 'wb') as f:
+            f.write(b'ID3\x03\0\0\0\0\x07\x5e' + b'\0' * 990 +
+                    b'A' * 4000)
+        return fileName
+
+    def projectSave(self, rewrite):
+        track = self.buildMock(self.writeFile(), rewrite)
+        actual = self.target.projectSave(track, {})
+
+        track.tag.save.assert_not_called()
+        return actual
+
+    def test_projectSave_inPlace(self):
+        self.assertEqual(self.projectSave(False), (1000, False))
+
+    def test_projectSave_rewrite(self):
+        self.assertEqual(self.projectSave(True), (900 + 8192 + 4000, True))
+
+    def saveID3(self, rewrite):
+        fileName = self.writeFile()
+        track = self.buildMock(fileName, rewrite)
+        actual = self.target.saveID3(track, {})
+
+        with open(fileName, 'rb') as f:
+            data = f.read()
+        track.tag.save.assert_not_called()
+        self.assertEqual(track.tag.file_info.tag_size, len(data) - 4000)
+        self.assertEqual(data[-4000:], b'A' * 4000)
+        self.assertEqual(os.listdir(os.path.dirname(fileName)), ['foo.mp3'])
+        return actual, data
+
+    def test_saveID3_inPlace(self):
+        actual, data = self.saveID3(False)
+        self.assertFalse(actual)
+        self.assertEqual(data[:1000], b'T' * 900 + b'\0' * 100)
+
+    def test_saveID3_rewrite(self):
+        self.target.padding = 2048
+        actual, data = self.saveID3(True)
+        self.assertTrue(actual)
+        self.assertEqual(data[:2948], b'T' * 900 + b'\0' * 2048)
+        self.assertEqual(len(data), 2948 + 4000)
+
+    def test_saveID3_missing(self):
+        track = self.buildMock('missing.mp3', False)
+        with self.assertRaises(IOError):
+            self.target.saveID3(track, {})
+        track.tag.save.assert_not_called()
+
+
 class BaseSpecifications(unittest.TestCase):
     stringFields = ['title',  'artist', 'albumArtist', 'album',
                     'composer', 'conductor', 'remixer', 'publisher',
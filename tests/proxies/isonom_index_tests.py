@@ -0,0 +1,189 @@
+from __future__ import unicode_literals
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from pyTagger.operations.find_duplicates import _isonomQuery, findIsonoms
+from pyTagger.proxies.isonom_index import IsonomIndex, tokenize
+from nose_parameterized import parameterized
+
+
+class TestTokenize(unittest.TestCase):
+    @parameterized.expand([
+        ('The Beatles', ['beatles']),
+        ('Simon & Garfunkel', ['simon', 'garfunkel']),
+        ('Crosby + Nash', ['crosby', 'nash']),
+        ('Télépopmusik', ['telepopmusik']),
+        ("Don't Stop Me Now", ['don', 't', 'stop', 'me', 'now']),
+        ("Bob's Song", ['bob', 'song']),
+        ('AC/DC', ['ac', 'dc']),
+        ('iPod SD500', ['i', 'pod', 'sd', '500']),
+        ('Again and again AGAIN', ['again']),
+        ('', []),
+        (None, [])
+    ])
+    def test_tokenize(self, value, expected):
+        self.assertEqual(tokenize(value), expected)
+
+
+class TestIsonomIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'library.isonom')
+        self.library = {
+            '/library/help/yesterday.mp3': {
+                'id': 'a1', 'title': 'Yesterday', 'album': 'Help!',
+                'artist': 'The Beatles', 'track': 13
+            },
+            '/library/help/help.mp3': {
+                'id': 'a2', 'title': 'Help!', 'album': 'Help!',
+                'artist': 'The Beatles', 'track': 1
+            },
+            '/library/covers/yesterday.mp3': {
+                'id': 'a3', 'title': 'Yesterday', 'album': 'Covers',
+                'artist': 'Marvin Gaye', 'track': 4
+            },
+            '/library/abbey/something.mp3': {
+                'id': 'a4', 'title': 'Something', 'album': 'Abbey Road',
+                'artist': 'The Beatles', 'track': 2
+            }
+        }
+        self.target = IsonomIndex(self.fileName)
+        self.target.log = logging.getLogger(__name__)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def search(self, track, minScore=0):
+        response = self.target.search(_isonomQuery(track, minScore))
+        return [(h['_source']['path'], h['_score'])
+                for h in response['hits']['hits']]
+
+    def test_load(self):
+        self.assertFalse(self.target.exists())
+        actual = self.target.load(self.library)
+        self.assertEqual(actual, (4, 0))
+        self.assertTrue(self.target.exists())
+
+    def test_load_badInput(self):
+        with self.assertRaises(TypeError):
+            self.target.load(None)
+
+    def test_load_badTrack(self):
+        actual = self.target.load(iter([('foo', 'bar')]))
+        self.assertEqual(actual, (0, 1))
+
+    def test_search_ranking(self):
+        self.target.load(self.library)
+        actual = self.search({
+            'title': 'Yesterday', 'album': 'Help', 'artist': 'Beatles',
+            'track': 13
+        })
+        self.assertEqual([p for p, _ in actual], [
+            '/library/help/yesterday.mp3',
+            '/library/help/help.mp3',
+            '/library/covers/yesterday.mp3',
+            '/library/abbey/something.mp3'
+        ])
+        scores = [s for _, s in actual]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_search_mustNot(self):
+        self.target.load(self.library)
+        actual = self.search({'title': 'Yesterday', 'id': 'a1'})
+        self.assertEqual([p for p, _ in actual],
+                         ['/library/covers/yesterday.mp3'])
+
+    def test_search_minScore(self):
+        self.target.load(self.library)
+        actual = self.search({'title': 'Yesterday', 'artist': 'Gaye'})
+        self.assertEqual(len(actual), 2)
+        best = actual[0][1]
+        actual = self.search({'title': 'Yesterday', 'artist': 'Gaye'}, best)
+        self.assertEqual(actual, [('/library/covers/yesterday.mp3', best)])
+
+    def test_search_operatorAnd(self):
+        self.target.load(self.library)
+        partial = self.target.search({'query': {'bool': {'should': [
+            {'match': {'album': {'query': 'Abbey Help', 'operator': 'and'}}}
+        ]}}})
+        self.assertEqual(partial['hits']['total'], 0)
+
+        whole = self.target.search({'query': {'bool': {'should': [
+            {'match': {'album': {'query': 'Abbey Road', 'operator': 'and'}}}
+        ]}}})
+        self.assertEqual(whole['hits']['total'], 1)
+
+    def test_search_size(self):
+        self.target.load(self.library)
+        response = self.target.search({
+            'from': 2, 'size': 2,
+            'query': {'bool': {'should': [{'match': {'artist': 'Beatles'}}]}}
+        })
+        self.assertEqual(response['hits']['total'], 3)
+        self.assertEqual(len(response['hits']['hits']), 1)
+
+    def test_search_sourceIsCopy(self):
+        self.target.load(self.library)
+        response = self.target.search(_isonomQuery({'title': 'Help'}, 0))
+        del response['hits']['hits'][0]['_source']['path']
+        response = self.target.search(_isonomQuery({'title': 'Help'}, 0))
+        self.assertIn('path', response['hits']['hits'][0]['_source'])
+
+    def test_search_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.target.search({'query': {'bool': {'should': [
+                {'prefix': {'title': 'Yes'}}
+            ]}}})
+        with self.assertRaises(ValueError):
+            self.target.search({'query': {'bool': {'should': [
+                {'term': {'title': 'Yes'}}
+            ]}}})
+        with self.assertRaises(ValueError):
+            self.target.search({'query': {'bool': {'must_not': [
+                {'match': {'title': 'Yes'}}
+            ]}}})
+
+    def test_persisted(self):
+        self.target.load(self.library)
+        expected = self.search({'title': 'Yesterday', 'track': 4})
+
+        reopened = IsonomIndex(self.fileName)
+        response = reopened.search(
+            _isonomQuery({'title': 'Yesterday', 'track': 4}, 0)
+        )
+        actual = [(h['_source']['path'], h['_score'])
+                  for h in response['hits']['hits']]
+        self.assertEqual(actual, expected)
+
+        reopened.load({'/intake/yesterday.mp3': {'title': 'Yesterday'}})
+        self.assertEqual(len(self.search({'title': 'Yesterday'})), 2)
+        self.assertEqual(
+            len(IsonomIndex(self.fileName).search(
+                _isonomQuery({'title': 'Yesterday'}, 0)
+            )['hits']['hits']), 3
+        )
+
+    def test_delete(self):
+        self.target.load(self.library)
+        self.assertTrue(self.target.delete())
+        self.assertFalse(self.target.exists())
+        self.assertEqual(self.search({'title': 'Yesterday'}), [])
+
+    def test_findIsonoms(self):
+        self.target.load(self.library)
+        intake = {
+            '/intake/01.mp3': {
+                'title': 'Yesterday', 'album': 'Help!', 'artist': 'Beatles',
+                'track': 13
+            },
+            '/intake/02.mp3': {'title': '', 'album': ''}
+        }
+        actual = list(findIsonoms(self.target, intake, 4))
+        self.assertEqual(actual[0].status, 'single')
+        self.assertEqual(actual[0].oldPath, '/library/help/yesterday.mp3')
+        self.assertEqual(actual[-1].status, 'insufficient')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+from __future__ import unicode_literals
+import unittest
+import os
+import shutil
+import tempfile
+import pyTagger.proxies.sqlite as sut
+from pyTagger.models import COMPARISON, FilterCondition
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'foo.sqlite')
+        self.snapshot = {
+            'C:\\foo.mp3': {'title': 'Help!', 'artist': 'The Beatles',
+                            'track': 7, 'fileHash': 'abc',
+                            'comments': [{'lang': 'eng', 'text': 'x',
+                                          'description': ''}]},
+            'bar.mp3': {'title': 'Angie', 'artist': 'The Rolling Stones',
+                        'track': 2, 'fileHash': 'def', 'id': '1234'},
+            'baz.mp3': {'title': 'Yesterday', 'artist': 'The Beatles',
+                        'track': 13, 'fileHash': 'abc', 'id': None},
+            'qaz.mp3': {'title': 'Caf\u00e9', 'artist': '100%_Hits',
+                        'fileHash': ''}
+        }
+        self.target = sut.SnapshotStore(self.fileName)
+        self.target.update(self.snapshot)
+
+    def tearDown(self):
+        self.target.close()
+        shutil.rmtree(self.directory)
+
+    def select(self, *conditions):
+        return [k for k, _ in self.target.select(conditions)]
+
+    def test_mapping(self):
+        self.assertEqual(len(self.target), 4)
+        self.assertIn('C:\\foo.mp3', self.target)
+        self.assertNotIn('foo.mp3', self.target)
+        self.assertEqual(self.target['C:\\foo.mp3'],
+                         self.snapshot['C:\\foo.mp3'])
+        self.assertEqual(list(self.target),
+                         ['C:\\foo.mp3', 'bar.mp3', 'baz.mp3', 'qaz.mp3'])
+        self.assertEqual(dict(self.target.iterPairs()), self.snapshot)
+        with self.assertRaises(KeyError):
+            self.target['foo.mp3']
+
+    def test_update_in_place(self):
+        self.target['bar.mp3'] = {'title': 'Wild Horses'}
+        del self.target['baz.mp3']
+
+        with sut.SnapshotStore(self.fileName) as other:
+            self.assertEqual(len(other), 3)
+            self.assertEqual(other['bar.mp3'], {'title': 'Wild Horses'})
+            self.assertEqual(list(other.findBy('title', 'Angie')), [])
+
+        with self.assertRaises(KeyError):
+            del self.target['baz.mp3']
+
+    def test_saveIncremental(self):
+        output = self.target.saveIncremental(escaped=True, batchSize=2)
+        next(output)
+        output.send(('C:\\\\new.mp3', {'title': 'New'}))
+        output.send(('old.mp3', {'title': 'Old'}))
+        output.send(('bar.mp3', {'title': 'Bar'}))
+        output.close()
+
+        self.assertEqual(list(self.target),
+                         ['C:\\new.mp3', 'bar.mp3', 'old.mp3'])
+
+    def test_saveIncremental_append(self):
+        output = self.target.saveIncremental(replace=False)
+        next(output)
+        output.send(('bar.mp3', {'title': 'Bar'}))
+        output.close()
+
+        self.assertEqual(len(self.target), 4)
+        self.assertEqual(self.target['bar.mp3'], {'title': 'Bar'})
+
+    def test_findBy(self):
+        actual = list(self.target.findBy('id', '1234'))
+        self.assertEqual(actual, [('bar.mp3', self.snapshot['bar.mp3'])])
+
+        with self.assertRaises(ValueError):
+            list(self.target.findBy('comments', 'x'))
+
+    def test_select(self):
+        actual = self.select(
+            FilterCondition('artist', COMPARISON.LIKE, 'beatles'),
+            FilterCondition('track', COMPARISON.GT, 7)
+        )
+        self.assertEqual(actual, ['baz.mp3'])
+
+    def test_select_equal_null(self):
+        actual = self.select(FilterCondition('id', COMPARISON.EQUAL, None))
+        self.assertEqual(actual, ['C:\\foo.mp3', 'baz.mp3', 'qaz.mp3'])
+
+        actual = self.select(FilterCondition('id', COMPARISON.NOT, None))
+        self.assertEqual(actual, ['bar.mp3'])
+
+    def test_select_like_escapes(self):
+        actual = self.select(FilterCondition('artist', COMPARISON.LIKE, '0%_'))
+        self.assertEqual(actual, ['qaz.mp3'])
+
+        actual = self.select(FilterCondition('artist', COMPARISON.LIKE, '0_'))
+        self.assertEqual(actual, [])
+
+    def test_select_skips_what_sql_cannot_answer(self):
+        # Not indexed, not ASCII, or not comparable to null
+        actual = self.select(
+            FilterCondition('genre', COMPARISON.EQUAL, 'Rock'),
+            FilterCondition('title', COMPARISON.LIKE, 'CAF\u00c9'),
+            FilterCondition('track', COMPARISON.GT, None)
+        )
+        self.assertEqual(len(actual), 4)
+
+    def test_select_like_integer(self):
+        from pyTagger.actions.where import _parseComparison, compileConditions
+        pair = _parseComparison('track', '1')
+        conditions = [FilterCondition('track', *pair)]
+        matches = compileConditions(conditions)
+
+        expected = sorted(k for k, v in self.snapshot.items() if matches(v))
+        actual = [k for k, v in self.target.select(conditions) if matches(v)]
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual, ['baz.mp3'])
+
+    def test_select_uses_index(self):
+        plan = self.target.db.execute(
+            'EXPLAIN QUERY PLAN SELECT path FROM snapshot WHERE "track" > ?',
+            (7,)
+        ).fetchall()
+        self.assertIn('snapshot_track', ' '.join(str(x) for x in plan))
+
+    def test_duplicates(self):
+        actual = list(self.target.duplicates('fileHash'))
+        self.assertEqual(actual, [('abc', 'C:\\foo.mp3'), ('abc', 'baz.mp3')])
+
+if __name__ == '__main__':
+    unittest.main()
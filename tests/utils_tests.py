@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 import unittest
 import io
 import os
+import shutil
+import tempfile
 import pyTagger.utils as target
 from tests import *
 try:
@@ -64,6 +66,214 @@ class TestIO(unittest.TestCase):
                              '{\n"key":\n"T\u00e9l\u00e9popmusik"')
             gen.close()
 
+    def iterSnapshot(self, text, chunkSize=65536):
+        with patch.object(io, 'open') as fmocked:
+            fmocked.return_value = io.StringIO(text)
+            return list(target.iterSnapshot('foo.json', chunkSize))
+
+    def test_iterSnapshot(self):
+        text = ('{\n"C:\\\\foo.mp3":\n{\n  "artist": "T\u00e9l\u00e9popmusik"'
+                '\n},\n"bar.mp3":\n{"track": 12345, "bpm": -1e2}\n}')
+
+        expected = [('C:\\foo.mp3', {'artist': 'T\u00e9l\u00e9popmusik'}),
+                    ('bar.mp3', {'track': 12345, 'bpm': -100.0})]
+        for chunkSize in [1, 2, 7, 65536]:
+            actual = self.iterSnapshot(text, chunkSize)
+            self.assertEqual(actual, expected)
+
+    def test_iterSnapshot_empty(self):
+        self.assertEqual(self.iterSnapshot(' { }\n'), [])
+
+    def test_iterSnapshot_not_object(self):
+        with self.assertRaises(ValueError):
+            self.iterSnapshot('["foo.mp3"]')
+
+    def test_iterSnapshot_truncated(self):
+        with self.assertRaises(ValueError):
+            self.iterSnapshot('{"foo.mp3": {"title": "bar"}', 4)
+
+    def test_iterSnapshot_missing(self):
+        with self.assertRaises(IOError):
+            target.iterSnapshot(os.path.join('missing', 'foo.json'))
+
+    def test_iterSnapshot_saveJsonIncrementalDict(self):
+        output = io.StringIO()
+        output.close = lambda: None
+        with patch.object(io, 'open') as fmocked:
+            fmocked.return_value = output
+            gen = target.saveJsonIncrementalDict('foo.json')
+            next(gen)
+            gen.send(('C:\\\\foo.mp3', {'title': 'T\u00e9l\u00e9'}))
+            gen.send(('bar.mp3', {'lyrics': [{'text': 'a\nb'}]}))
+            gen.close()
+
+        actual = self.iterSnapshot(output.getvalue(), 3)
+        self.assertEqual(actual, [
+            ('C:\\foo.mp3', {'title': 'T\u00e9l\u00e9'}),
+            ('bar.mp3', {'lyrics': [{'text': 'a\nb'}]})
+        ])
+
+
+class TestIterSortedPairs(unittest.TestCase):
+    def setUp(self):
+        self.pairs = [('c', {'a': 1}), ('a', [2]), ('b', None), ('a', 'x')]
+
+    def test_inMemory(self):
+        actual = list(target.iterSortedPairs(iter(self.pairs)))
+        self.assertEqual(actual, [('a', [2]), ('a', 'x'), ('b', None),
+                                  ('c', {'a': 1})])
+
+    def test_spilled(self):
+        expected = list(target.iterSortedPairs(iter(self.pairs)))
+        for bufferSize in [1, 2, 3]:
+            actual = list(target.iterSortedPairs(iter(self.pairs), bufferSize))
+            self.assertEqual(actual, expected)
+
+    def test_empty(self):
+        self.assertEqual(list(target.iterSortedPairs([])), [])
+
+    def test_writeBlock_readRun(self):
+        f = tempfile.TemporaryFile()
+        target.writeBlock(f, [{'a': 1}, 'b'])
+        target.writeBlock(f, [['c']])
+
+        self.assertEqual(list(target.readRun(f)), [{'a': 1}, 'b', ['c']])
+        self.assertTrue(f.closed)
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'foo.snap')
+        self.snapshot = {
+            'C:\\foo%d.mp3' % i: {
+                'title': 'T\u00e9l\u00e9popmusik %d' % i,
+                'track': i,
+                'comments': [{'lang': 'eng', 'text': 'x', 'description': ''}]
+            } for i in range(10)
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, blockSize=3):
+        output = target.saveBinarySnapshotIncremental(self.fileName, True,
+                                                      blockSize)
+        next(output)
+        for k, v in sorted(self.snapshot.items()):
+            output.send((k.replace('\\', '\\\\'), v))
+        output.close()
+
+    def test_isBinarySnapshot(self):
+        self.assertTrue(target.isBinarySnapshot('foo.snap'))
+        self.assertTrue(target.isBinarySnapshot('FOO.SNAP'))
+        self.assertFalse(target.isBinarySnapshot('foo.json'))
+
+    def test_iterPairs(self):
+        self.write()
+        with target.BinarySnapshot(self.fileName) as snapshot:
+            actual = list(snapshot.iterPairs())
+        self.assertEqual(actual, sorted(self.snapshot.items()))
+
+    def test_random_access(self):
+        self.write()
+        with target.BinarySnapshot(self.fileName) as snapshot:
+            self.assertEqual(len(snapshot), 10)
+            self.assertIn('C:\\foo7.mp3', snapshot)
+            self.assertNotIn('C:\\\\foo7.mp3', snapshot)
+            self.assertEqual(snapshot['C:\\foo7.mp3'],
+                             self.snapshot['C:\\foo7.mp3'])
+            self.assertEqual(sorted(snapshot), sorted(self.snapshot))
+            with self.assertRaises(KeyError):
+                snapshot['bar.mp3']
+
+    def test_same_api_as_json(self):
+        output = target.saveJsonIncrementalDict(self.fileName)
+        next(output)
+        for k, v in self.snapshot.items():
+            output.send((k.replace('\\', '\\\\'), v))
+        output.close()
+
+        self.assertEqual(target.loadJson(self.fileName), self.snapshot)
+        self.assertEqual(dict(target.iterSnapshot(self.fileName)),
+                         self.snapshot)
+
+    def test_saveJson(self):
+        target.saveJson(self.fileName, self.snapshot)
+        self.assertEqual(target.loadJson(self.fileName), self.snapshot)
+
+    def test_empty(self):
+        target.saveJson(self.fileName, {})
+        self.assertEqual(target.loadJson(self.fileName), {})
+
+    def test_not_binary(self):
+        with io.open(self.fileName, 'w', encoding='utf-8') as f:
+            f.write('{}')
+        with self.assertRaises(ValueError):
+            target.loadJson(self.fileName)
+
+    def test_incomplete(self):
+        self.write()
+        with io.open(self.fileName, 'r+b') as f:
+            f.truncate(os.path.getsize(self.fileName) - 1)
+        with self.assertRaises(ValueError):
+            target.BinarySnapshot(self.fileName)
+
+
+class TestSqliteSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'foo.sqlite')
+        self.snapshot = {
+            'C:\\foo.mp3': {'title': 'T\u00e9l\u00e9popmusik', 'track': 1},
+            'bar.mp3': {'lyrics': [{'lang': 'eng', 'text': 'x',
+                                    'description': ''}]}
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_isSqliteSnapshot(self):
+        self.assertTrue(target.isSqliteSnapshot('foo.sqlite'))
+        self.assertFalse(target.isSqliteSnapshot('foo.json'))
+
+    def test_same_api_as_json(self):
+        target.saveJson(self.fileName, self.snapshot)
+        self.assertEqual(target.loadJson(self.fileName), self.snapshot)
+        self.assertEqual(dict(target.iterSnapshot(self.fileName)),
+                         self.snapshot)
+
+    def test_saveJsonIncrementalDict_replaces(self):
+        target.saveJson(self.fileName, self.snapshot)
+
+        output = target.saveJsonIncrementalDict(self.fileName)
+        next(output)
+        output.send(('C:\\\\new.mp3', {'title': 'New'}))
+        output.close()
+
+        self.assertEqual(target.loadJson(self.fileName),
+                         {'C:\\new.mp3': {'title': 'New'}})
+
+    def test_missing(self):
+        with self.assertRaises(IOError):
+            target.iterSnapshot(self.fileName)
+        with self.assertRaises(IOError):
+            target.loadJson(self.fileName)
+        self.assertFalse(os.path.exists(self.fileName))
+
+
+class TestParallel(unittest.TestCase):
+    def test_parallelMap_serial(self):
+        calls = []
+        actual = target.parallelMap(abs, [-3, 2, -1], 1, calls.append, (1,))
+        self.assertEqual(list(actual), [3, 2, 1])
+        self.assertEqual(calls, [1])
+
+    def test_parallelMap_keeps_order(self):
+        values = [-x for x in range(100)]
+        actual = target.parallelMap(abs, values, 2)
+        self.assertEqual(list(actual), list(range(100)))
+
 
 if __name__ == '__main__':
     unittest.main()
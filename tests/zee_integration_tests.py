@@ -65,7 +65,7 @@ class TestIntegration(unittest.TestCase):
 
         # Execute
         id3Proxy = ID3Proxy()
-        u, f = updateFromSnapshot(id3Proxy, snapshot, True)
+        c = updateFromSnapshot(id3Proxy, snapshot, True)
 
         # Validate
         for fullPath in walk(INTEGRATION_TEST_DIRECTORY):
@@ -86,8 +86,8 @@ class TestIntegration(unittest.TestCase):
                         self.assertEqual(actual[k]['DJTagger'], ufid)
                     else:
                         self.assertEqual(actual[k], expected[k])
-        self.assertEqual(u, 53)
-        self.assertEqual(f, 2)
+        self.assertEqual(c['written'], 53)
+        self.assertEqual(c['failed'], 2)
 
     def test_02_scan(self):
         from pyTagger.operations.on_directory import buildSnapshot
@@ -179,7 +179,8 @@ class TestIntegration(unittest.TestCase):
             shutil.copy(f, cloneDir)
 
         processed = prepareForLibrary(cloneDir)
-        self.assertEqual(processed, 7)
+        self.assertEqual(processed['written'], 7)
+        self.assertEqual(processed['failed'], 0)
 
         c = renameFiles(cloneDir, targetDir, ID3Proxy())
         self.assertEqual(c['moved'], 7)